@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks des étapes de validation et d'export JSON sur couches synthétiques.
+
+    python benchmarks/bench.py --sizes 1k,10k,100k
+    python benchmarks/bench.py --sizes 1k,10k --save-baseline
+
+Chaque étape est mesurée (meilleur temps sur --repeat exécutions) puis
+comparée aux valeurs de référence de --baseline : une étape plus lente que
+la référence au-delà de --tolerance est signalée comme régression
+(code retour 1).
+"""
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import synthetic
+
+STAGES = [
+    "diagnose_mapping",
+    "validate_observation_structure",
+    "validate_photo_structure",
+    "temporal_constraints",
+    "apply_normalization_after_validation",
+    "generate_json",
+]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    if factor != 1:
+        text = text[:-1]
+    return int(float(text) * factor)
+
+
+def scenario_key(args):
+    return (
+        f"{args.geometry}|obs={args.obs}|photos={args.photos}"
+        f"|invalid={args.invalid_rate:g}"
+    )
+
+
+def best_of(repeat, fn, setup=None):
+    """Meilleur temps (s) sur `repeat` exécutions et dernier résultat."""
+    best = None
+    result = None
+    for _ in range(max(1, repeat)):
+        arg = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(arg) if setup else fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_stages(gdf, cols, schema, workdir, repeat):
+    from sirs_import.diag_des import diagnose_mapping
+    from sirs_import.diag_obs import validate_observation_structure
+    from sirs_import.diag_pho import detect_photo_patterns, validate_photo_structure
+    from sirs_import.check_dates import temporal_constraints
+    from sirs_import.helpers import apply_normalization_after_validation
+    from sirs_import.json_builder import generate_json
+
+    user_ids = set(synthetic.USER_IDS)
+    contact_ids = set(synthetic.CONTACT_IDS)
+    timings = {}
+
+    timings["diagnose_mapping"], _ = best_of(
+        repeat, lambda: diagnose_mapping(cols, gdf, schema, user_ids)
+    )
+    timings["validate_observation_structure"], obs_data = best_of(
+        repeat, lambda: validate_observation_structure(cols, gdf, schema, contact_ids)
+    )
+    observations = obs_data["patterns"]["observations"]
+    photo_patterns = detect_photo_patterns(cols)
+    observation_dates = {
+        obs: gdf[f"{obs}_date"] for obs in observations if f"{obs}_date" in gdf.columns
+    }
+    timings["validate_photo_structure"], _ = best_of(
+        repeat,
+        lambda: validate_photo_structure(
+            photo_patterns, cols, gdf, observation_dates, schema, contact_ids
+        ),
+    )
+    timings["temporal_constraints"], _ = best_of(
+        repeat,
+        lambda: temporal_constraints(
+            gdf, observations, observation_dates, photo_patterns, schema
+        ),
+    )
+    timings["apply_normalization_after_validation"], normalized = best_of(
+        repeat, apply_normalization_after_validation, setup=gdf.copy
+    )
+
+    patterns = {"observations": observations, "photos": photo_patterns}
+    output = os.path.join(workdir, f"{synthetic.LAYER}.json")
+    timings["generate_json"], _ = best_of(
+        repeat, lambda: generate_json(normalized, patterns, output=output)
+    )
+    return timings
+
+
+def load_baselines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Renvoie les régressions (taille, étape, référence, mesure)."""
+    regressions = []
+    for size, timings in results.items():
+        ref = baseline.get(size, {})
+        for stage, seconds in timings.items():
+            before = ref.get(stage)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+                regressions.append((size, stage, before, seconds))
+    return regressions
+
+
+def print_results(results, baseline):
+    sizes = list(results)
+    print()
+    print(f"{'étape':<38}" + "".join(f"{s:>14}" for s in sizes))
+    for stage in STAGES:
+        cells = []
+        for size in sizes:
+            seconds = results[size][stage]
+            before = baseline.get(size, {}).get(stage)
+            delta = f" {100 * (seconds - before) / before:+.0f}%" if before else ""
+            cells.append(f"{seconds:>8.3f}s{delta:>5}" if delta else f"{seconds:>13.3f}s")
+        print(f"{stage:<38}" + "".join(f"{c:>14}" for c in cells))
+    print(f"{'débit (lignes/s, total)':<38}" + "".join(
+        f"{int(size) / sum(results[size].values()):>14.0f}" for size in sizes
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmarks validation + export JSON")
+    parser.add_argument("--sizes", default="1k,10k,100k",
+                        help="tailles de couche, ex. 1k,10k,100k,1m")
+    parser.add_argument("--obs", type=int, default=2)
+    parser.add_argument("--photos", type=int, default=1)
+    parser.add_argument("--geometry", choices=["Point", "LineString"], default="Point")
+    parser.add_argument("--invalid-rate", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(HERE, ".data"),
+                        help="dossier des couches générées (réutilisées)")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baselines.json"))
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="enregistre les mesures comme nouvelle référence")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="écart relatif toléré avant de signaler une régression")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="écart absolu (s) en dessous duquel on ignore")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+
+    # la configuration est chargée avant l'import des modules qui la lisent
+    config = synthetic.write_config(args.workdir)
+    from sirs_import.config_loader import load_config
+    load_config(config)
+    from sirs_import.helpers import open_gpkg_layer
+
+    # les confirmations (ex. simplification des LineString) sont acceptées
+    import builtins
+    builtins.input = lambda prompt="": "1"
+
+    key = scenario_key(args)
+    results = {}
+    for size in [parse_size(s) for s in args.sizes.split(",")]:
+        name = f"bench_{size}_{args.geometry}_{args.obs}o{args.photos}p_{args.invalid_rate:g}.gpkg"
+        path = os.path.join(args.workdir, name)
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            synthetic.write_gpkg(path, size, args.obs, args.photos,
+                                 args.geometry, args.invalid_rate)
+            print(f"⚙️ {name} généré en {time.perf_counter() - start:.1f} s")
+
+        gpkg = open_gpkg_layer(path, synthetic.LAYER)
+        repeat = args.repeat if size <= 100_000 else 1
+        print(f"⚙️ {size} lignes ({repeat} exécution(s) par étape)")
+        results[str(size)] = run_stages(
+            gpkg.gdf, gpkg.columns, dict(gpkg.schema), args.workdir, repeat
+        )
+
+    baselines = load_baselines(args.baseline)
+    baseline = baselines.get(key, {}).get("sizes", {})
+    print_results(results, baseline)
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print()
+        print(f"⚠️ {len(regressions)} régression(s) par rapport à {args.baseline} :")
+        for size, stage, before, now in regressions:
+            print(f"   - {stage} @ {size} lignes : {before:.3f}s → {now:.3f}s")
+
+    if args.save_baseline:
+        entry = baselines.setdefault(key, {"sizes": {}})
+        entry["sizes"].update(results)
+        entry["machine"] = f"{platform.node()} / {platform.processor() or platform.machine()}"
+        entry["python"] = platform.python_version()
+        entry["saved"] = time.strftime("%Y-%m-%d")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print()
+        print(f"✅ Référence enregistrée dans {args.baseline}")
+        return 0
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Générateur de couches GPKG synthétiques pour les benchmarks.
+
+    python benchmarks/synthetic.py sortie.gpkg --rows 10000 --obs 2 --photos 1
+
+La couche respecte la configuration écrite par write_config() ; une part
+`invalid_rate` des lignes reçoit des valeurs invalides (références hors
+domaine, UUID inconnus, dates incohérentes) pour exercer les chemins d'erreur.
+"""
+import os
+import sys
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LAYER = "bench"
+CRS = "EPSG:2154"
+
+# identifiants connus de la base simulée
+USER_IDS = [uuid.uuid5(uuid.NAMESPACE_URL, f"bench/user/{i}").hex for i in range(5)]
+CONTACT_IDS = [uuid.uuid5(uuid.NAMESPACE_URL, f"bench/contact/{i}").hex for i in range(20)]
+N_TRONCONS = 50
+TRONCONS = [f"T{i:04d}" for i in range(N_TRONCONS)]
+LINEAR_IDS = [uuid.uuid5(uuid.NAMESPACE_URL, f"bench/troncon/{i}").hex for i in range(N_TRONCONS)]
+
+CONFIG_TEMPLATE = """\
+# configuration générée par benchmarks/synthetic.py
+COUCH_URL  = "http://localhost:5984"
+COUCH_DB   = "bench"
+REF_CACHE  = false
+
+GPKG_FILE  = "{gpkg_file}"
+GPKG_LAYER = "{layer}"
+
+COL_TRONCONS    = "troncons"
+COL_LINEAR_ID   = "linearId"
+COL_DATE_DEBUT  = "date_debut"
+COL_DATE_FIN    = "date_fin"
+COL_AUTHOR      = "{author}"
+COL_DESIGNATION = "designation"
+COL_COMMENTAIRE = "commentaire"
+COL_POSITION_ID = "position"
+COL_COTE_ID     = "cote"
+COL_SOURCE_ID   = 2
+COL_TYPE_DESORDRE_ID = "type"
+COL_CATEGORIE_DESORDRE_ID = 3
+
+OBS_FALLBACK_OBSERVATEUR_ID = "{contact}"
+OBS_FALLBACK_NB_DESORDRES = 1
+OBS_FALLBACK_URGENCE = 99
+OBS_FALLBACK_SUITE = 2
+
+PHO_FALLBACK_PHOTOGRAPH_ID = "{contact}"
+PHO_FALLBACK_OBS_DATE = true
+PHO_FALLBACK_DES_GEOM = true
+PHO_FALLBACK_ORIENTATION = 99
+PHO_FALLBACK_COTE = 99
+"""
+
+
+def write_config(directory, gpkg_file="bench.gpkg"):
+    path = os.path.join(directory, "config_sirs.toml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(CONFIG_TEMPLATE.format(
+            gpkg_file=gpkg_file, layer=LAYER, author=USER_IDS[0], contact=CONTACT_IDS[0],
+        ))
+    return path
+
+
+def _dates(rng, n, start, span_days):
+    import numpy as np
+    base = np.datetime64(start, "D")
+    return base + rng.integers(0, span_days, n).astype("timedelta64[D]")
+
+
+def _with_invalid(rng, values, invalid, bad_value):
+    import numpy as np
+    out = np.asarray(values, dtype=object).copy()
+    out[invalid & (rng.random(len(out)) < 0.5)] = bad_value
+    return out
+
+
+def generate(rows, obs=2, photos=1, geometry="Point", invalid_rate=0.0, seed=0):
+    """
+    Renvoie (gdf, schema) : `obs` préfixes obsN avec `photos` photos
+    chacun, géométries Point ou LineString.
+    """
+    import numpy as np
+    import pandas as pd
+    import geopandas as gpd
+    import shapely
+
+    rng = np.random.default_rng(seed)
+    invalid = rng.random(rows) < invalid_rate
+
+    t = rng.integers(0, N_TRONCONS, rows)
+    data = {
+        "troncons": np.array(TRONCONS, dtype=object)[t],
+        "linearId": np.array(LINEAR_IDS, dtype=object)[t],
+        "designation": np.array([f"D{i}" for i in range(rows)], dtype=object),
+        "commentaire": np.where(rng.random(rows) < 0.3, None, "commentaire de test").astype(object),
+        "position": _with_invalid(rng, rng.integers(3, 16, rows), invalid, 42),
+        "cote": _with_invalid(
+            rng, np.char.add("RefCote:", rng.integers(1, 9, rows).astype(str)), invalid, "RefCote:0"
+        ),
+        "type": _with_invalid(rng, rng.integers(1, 74, rows), invalid, 500),
+    }
+    schema = {
+        "troncons": "str", "linearId": "str", "designation": "str", "commentaire": "str",
+        "position": "int32", "cote": "str", "type": "int32",
+    }
+
+    debut = _dates(rng, rows, "2015-01-01", 3000)
+    data["date_debut"] = debut
+    data["date_fin"] = debut + np.timedelta64(3650, "D")
+    schema["date_debut"] = schema["date_fin"] = "date"
+
+    contacts = np.array(CONTACT_IDS, dtype=object)
+    unknown = uuid.uuid5(uuid.NAMESPACE_URL, "bench/inconnu").hex
+    for o in range(1, obs + 1):
+        key = f"obs{o}"
+        obs_date = debut + rng.integers(0, 300, rows).astype("timedelta64[D]")
+        # observation antérieure au désordre
+        obs_date = np.where(invalid & (rng.random(rows) < 0.5), debut - np.timedelta64(10, "D"), obs_date)
+        data[f"{key}_date"] = obs_date
+        data[f"{key}_urgenceId"] = _with_invalid(rng, rng.integers(1, 5, rows), invalid, 7)
+        data[f"{key}_suiteApporterId"] = _with_invalid(rng, rng.integers(1, 9, rows), invalid, 12)
+        data[f"{key}_nombreDesordres"] = rng.integers(0, 5, rows)
+        data[f"{key}_evolution"] = np.array(["stable", "aggravation", None], dtype=object)[rng.integers(0, 3, rows)]
+        data[f"{key}_observateurId"] = _with_invalid(
+            rng, contacts[rng.integers(0, len(contacts), rows)], invalid, unknown
+        )
+        schema.update({
+            f"{key}_date": "date", f"{key}_urgenceId": "int32",
+            f"{key}_suiteApporterId": "int32", f"{key}_nombreDesordres": "int32",
+            f"{key}_evolution": "str", f"{key}_observateurId": "str",
+        })
+
+        for p in range(1, photos + 1):
+            pkey = f"{key}_pho{p}"
+            data[f"{pkey}_chemin"] = np.char.add(
+                np.char.add(data["troncons"].astype(str), f"/{pkey}_"),
+                np.char.add(np.arange(rows).astype(str), ".jpg"),
+            ).astype(object)
+            data[f"{pkey}_date"] = obs_date + rng.integers(0, 5, rows).astype("timedelta64[D]")
+            data[f"{pkey}_orientationPhoto"] = _with_invalid(rng, rng.integers(1, 10, rows), invalid, 50)
+            data[f"{pkey}_photographeId"] = contacts[rng.integers(0, len(contacts), rows)]
+            schema.update({
+                f"{pkey}_chemin": "str", f"{pkey}_date": "date",
+                f"{pkey}_orientationPhoto": "int32", f"{pkey}_photographeId": "str",
+            })
+
+    x = 700000 + rng.random(rows) * 50000
+    y = 6600000 + rng.random(rows) * 50000
+    if geometry == "Point":
+        geoms = shapely.points(x, y)
+    elif geometry == "LineString":
+        coords = np.stack([x, y, x + 25, y + 25], axis=1).reshape(rows, 2, 2)
+        geoms = shapely.linestrings(coords)
+    else:
+        raise ValueError(f"géométrie inconnue : {geometry}")
+
+    for col, ctype in schema.items():
+        if ctype == "date":
+            data[col] = pd.to_datetime(data[col])
+    gdf = gpd.GeoDataFrame(data, geometry=geoms, crs=CRS)
+    return gdf, schema
+
+
+def write_gpkg(path, rows, obs=2, photos=1, geometry="Point", invalid_rate=0.0, seed=0):
+    from sirs_import.helpers import write_gpkg_layer
+
+    gdf, schema = generate(rows, obs, photos, geometry, invalid_rate, seed)
+    write_gpkg_layer(gdf, path, LAYER, schema, geometry, CRS)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="génère une couche GPKG synthétique")
+    parser.add_argument("output")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--obs", type=int, default=2)
+    parser.add_argument("--photos", type=int, default=1)
+    parser.add_argument("--geometry", choices=["Point", "LineString"], default="Point")
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # la configuration est chargée avant l'import des modules qui la lisent
+    directory = os.path.dirname(os.path.abspath(args.output))
+    config = write_config(directory, os.path.basename(args.output))
+    from sirs_import.config_loader import load_config
+    load_config(config)
+    write_gpkg(args.output, args.rows, args.obs, args.photos,
+               args.geometry, args.invalid_rate, args.seed)
+    print(f"{args.rows} désordres écrits dans {args.output} (configuration : {config})")
+
+
+if __name__ == "__main__":
+    main()
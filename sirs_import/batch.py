@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Traitement non interactif de plusieurs projets :
+
+    sirs_import_batch "digues/*" --policy politique.toml --workers 4 --upload
+
+Chaque projet (dossier contenant config_sirs.toml, ou chemin d'un fichier
+.toml) est traité par un processus sirs_import distinct, sans entrée
+standard : les questions reçoivent les réponses de --policy, une question
+sans réponse annule le projet. La sortie de chaque projet est écrite dans
+<projet>/sirs_import_batch.log et un récapitulatif est affiché à la fin.
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+CONFIG_NAME = "config_sirs.toml"
+LOG_NAME = "sirs_import_batch.log"
+
+# codes retour de sirs_import
+EXIT_STATUS = {
+    0: "ok",
+    1: "erreur",
+    3: "données invalides",
+    4: "annulé",
+}
+
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def find_projects(patterns):
+    """Chemins (absolus, sans doublon) des fichiers de configuration."""
+    configs = []
+    missing = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.expanduser(pattern)))
+        if not matches:
+            missing.append(pattern)
+        for path in matches:
+            if os.path.isdir(path):
+                path = os.path.join(path, CONFIG_NAME)
+            if not os.path.isfile(path):
+                missing.append(path)
+                continue
+            path = os.path.abspath(path)
+            if path not in configs:
+                configs.append(path)
+    return configs, missing
+
+
+def build_command(config, policy=None, flags=()):
+    cmd = [sys.executable, "-m", "sirs_import", "--config", config]
+    if policy:
+        cmd += ["--policy", policy]
+    return cmd + list(flags)
+
+
+def _last_error(output):
+    lines = [ANSI.sub("", line).strip() for line in output.splitlines()]
+    lines = [line for line in lines if line]
+    for line in reversed(lines):
+        if line.startswith(("⛔", "❌")):
+            return line
+    return lines[-1] if lines else ""
+
+
+def run_project(config, command, timeout=None):
+    """Exécute `command` dans le dossier du projet, sortie dans LOG_NAME."""
+    project = os.path.dirname(config)
+    log_path = os.path.join(project, LOG_NAME)
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        try:
+            proc = subprocess.run(
+                command, cwd=project, env=env, stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8", errors="replace", timeout=timeout,
+            )
+            code, output = proc.returncode, proc.stdout
+        except subprocess.TimeoutExpired as e:
+            code = None
+            output = e.stdout or ""
+            if isinstance(output, bytes):
+                output = output.decode("utf-8", "replace")
+            output += f"\n⛔ Délai dépassé ({timeout} s)\n"
+        log.write(output)
+
+    status = "délai dépassé" if code is None else EXIT_STATUS.get(code, f"code {code}")
+    return {
+        "project": project,
+        "config": config,
+        "status": status,
+        "exit_code": code,
+        "seconds": round(time.perf_counter() - start, 2),
+        "log": log_path,
+        "message": "" if code == 0 else _last_error(output),
+    }
+
+
+def print_summary(results):
+    width = max([len(r["project"]) for r in results] + [6])
+    print()
+    print(f"{'projet':<{width}}  {'statut':<18} {'durée (s)':>9}  message")
+    for r in results:
+        print(f"{r['project']:<{width}}  {r['status']:<18} {r['seconds']:>9.1f}  {r['message']}")
+    ok = sum(1 for r in results if r["exit_code"] == 0)
+    print()
+    print(f"{ok}/{len(results)} projet(s) traité(s) sans erreur.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="sirs_import_batch",
+        description="traite plusieurs projets sirs_import sans interaction",
+    )
+    parser.add_argument("projects", nargs="+",
+                        help="dossiers projet, fichiers .toml ou motifs glob")
+    parser.add_argument("--policy", required=True,
+                        help="fichier TOML de réponses aux questions (obligatoire ; "
+                             "une question sans réponse annule le projet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="nombre de projets traités simultanément")
+    parser.add_argument("--timeout", type=float,
+                        help="durée maximale par projet (s)")
+    parser.add_argument("--summary",
+                        help="écrit le récapitulatif au format JSON")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--extract", action="store_true")
+    mode.add_argument("--upload", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    configs, missing = find_projects(args.projects)
+    for path in missing:
+        print(f"⚠️ Aucune configuration trouvée : {path}")
+    if not configs:
+        print("⛔ Aucun projet à traiter.")
+        return 1
+
+    policy = os.path.abspath(args.policy)
+    flags = [f for f in ("--extract", "--upload", "--profile") if getattr(args, f[2:])]
+
+    # un processus par projet : la configuration de sirs_import est
+    # globale au processus, les threads se contentent d'attendre
+    workers = max(1, min(args.workers, len(configs)))
+    print(f"⚙️ {len(configs)} projet(s), {workers} en parallèle")
+
+    def job(config):
+        result = run_project(config, build_command(config, policy, flags), args.timeout)
+        print(f"   {result['status']:<18} {result['project']}")
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(job, configs))
+
+    print_summary(results)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 0 if all(r["exit_code"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
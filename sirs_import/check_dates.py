@@ -11,16 +11,26 @@ COL_DESIGNATION  = CONFIG["COL_DESIGNATION"]
 COL_LIBELLE      = CONFIG["COL_LIBELLE"]
 
 
+_ISNA = None
+
+# dates ISO strictes (AAAA-MM-JJ, année 0000 exclue), seules acceptées par _to_date
+_ISO_DATE = r"(?!0000)[0-9]{4}-[0-9]{2}-[0-9]{2}"
+
+
 def _lazy_isna():
     """
     Retourne une fonction isna compatible pandas si dispo,
     sinon une fonction qui retourne toujours False.
+    Résolue une seule fois.
     """
-    try:
-        from pandas import isna
-        return isna
-    except ImportError:
-        return lambda x: False
+    global _ISNA
+    if _ISNA is None:
+        try:
+            from pandas import isna
+            _ISNA = isna
+        except ImportError:
+            _ISNA = lambda x: False
+    return _ISNA
 
 
 def _to_date(value) -> Optional[datetime.date]:
@@ -91,6 +101,80 @@ def _resolve_bounds_per_row(
     return dd_series, df_series, dd_static, df_static
 
 
+def _date_array(values):
+    """
+    Colonne → tableau numpy datetime64[D] (NaT si non convertible).
+    Les colonnes datetime64 sont converties directement ; les autres sont
+    factorisées puis leurs valeurs distinctes converties : les chaînes en
+    un seul appel à pd.to_datetime, le reste (objets date, types mélangés)
+    via _to_date.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        if values.dt.tz is not None:
+            values = values.dt.tz_localize(None)
+        return values.to_numpy().astype("datetime64[D]")
+
+    try:
+        codes, uniques = pd.factorize(values)
+    except TypeError:
+        # valeurs non hachables : conversion valeur par valeur
+        codes, uniques = np.arange(len(values)), values.tolist()
+
+    # dernière case = NaT pour les valeurs nulles (code -1)
+    table = np.full(len(uniques) + 1, np.datetime64("NaT"), dtype="datetime64[D]")
+    if len(uniques) and pd.api.types.infer_dtype(uniques, skipna=False) == "string":
+        text = pd.Series(uniques, dtype=object).str.strip()
+        iso = text.str.fullmatch(_ISO_DATE).to_numpy(dtype=bool)
+        parsed = pd.to_datetime(text.where(iso), format="%Y-%m-%d", errors="coerce")
+        table[:-1] = parsed.to_numpy().astype("datetime64[D]")
+        # dates impossibles (2021-02-30) ou hors de la plage datetime64[ns]
+        # des pandas < 3 : tranchées par _to_date
+        rest = np.flatnonzero(iso & np.isnat(table[:-1]))
+    else:
+        rest = range(len(uniques))
+
+    for i in rest:
+        d = _to_date(uniques[i])
+        if d is not None:
+            table[i] = np.datetime64(d, "D")
+    return table[codes]
+
+
+def _bound_array(series, static, n):
+    import numpy as np
+
+    if series is not None:
+        return _date_array(series)
+    value = np.datetime64(static, "D") if static is not None else np.datetime64("NaT")
+    return np.full(n, value, dtype="datetime64[D]")
+
+
+def _desordre_ids(gdf):
+    """
+    Référence métier TRONCON:DESORDRE d'une ligne (par position),
+    calculée uniquement pour les lignes en erreur.
+    """
+    cols = set(gdf.columns)
+    ids = {}
+
+    def value(col, pos):
+        if col not in cols:
+            return ""
+        return str(gdf[col].iat[pos]).strip()
+
+    def get(pos):
+        if pos not in ids:
+            designation = value(COL_DESIGNATION, pos)
+            desordre = designation if designation else value(COL_LIBELLE, pos)
+            ids[pos] = f"{value(COL_TRONCONS, pos)}:{desordre}"
+        return ids[pos]
+
+    return get
+
+
 def temporal_constraints(
     gdf,
     observations: Dict[str, Iterable[str]],
@@ -110,33 +194,24 @@ def temporal_constraints(
             date_debut <= pho <= date_fin
             obs_date  <= pho
 
+    Toutes les dates sont converties une fois en datetime64[D] et les règles
+    évaluées par comparaison de tableaux ; les messages ne sont construits
+    que pour les lignes en erreur.
+
     Retourne une liste d'erreurs avec une référence métier TRONCON:DESORDRE au lieu de l’index.
     """
+    import numpy as np
+
     errors: List[str] = []
 
     columns = list(gdf.columns)
     dd_series, df_series, dd_static, df_static = _resolve_bounds_per_row(gdf, columns)
     cols_set = set(columns)
+    n = len(gdf)
 
-    # =====================================================================
-    # Ids lisibles pour les messages d’erreur
-    # =====================================================================
-    ids = {}
-    for idx, row in gdf.iterrows():
-        troncon = str(row.get(COL_TRONCONS, "")).strip()
-        designation = str(row.get(COL_DESIGNATION, "")).strip()
-        libelle = str(row.get(COL_LIBELLE, "")).strip()
-        desordre = designation if designation else libelle
-        ids[idx] = f"{troncon}:{desordre}"
-
-    # Y a-t-il au moins une limite temporelle quelque part ?
-    have_bounds = any([
-        dd_series is not None,
-        df_series is not None,
-        dd_static is not None,
-        df_static is not None
-    ])
-
+    dd = _bound_array(dd_series, dd_static, n)
+    df = _bound_array(df_series, df_static, n)
+    ident = _desordre_ids(gdf)
 
     # =====================================================================
     # 1) obsN_date
@@ -146,83 +221,58 @@ def temporal_constraints(
         if date_col not in cols_set:
             continue
 
-        obs_series = gdf[date_col]
-
-        for idx, obs_val in obs_series.items():
-            od = _to_date(obs_val)
-            if od is None:
-                continue
-
-            if have_bounds:
-                if dd_series is not None:
-                    dd = _to_date(dd_series.iloc[idx])
-                else:
-                    dd = dd_static
-
-                if df_series is not None:
-                    df = _to_date(df_series.iloc[idx])
-                else:
-                    df = df_static
-
-                if dd is not None and od < dd:
-                    errors.append(
-                        f"{date_col} ({od}) < date_debut ({dd}) sur {ids[idx]}"
-                    )
-
-                if df is not None and od > df:
-                    errors.append(
-                        f"{date_col} ({od}) > date_fin ({df}) sur {ids[idx]}"
-                    )
+        od = _date_array(gdf[date_col])
+        before = od < dd
+        after = od > df
 
+        for pos in np.flatnonzero(before | after):
+            if before[pos]:
+                errors.append(
+                    f"{date_col} ({od[pos]}) < date_debut ({dd[pos]}) sur {ident(pos)}"
+                )
+            if after[pos]:
+                errors.append(
+                    f"{date_col} ({od[pos]}) > date_fin ({df[pos]}) sur {ident(pos)}"
+                )
 
     # =====================================================================
     # 2) obsN_phoM_date
     # =====================================================================
+    obs_arrays = {}
     for (obs_key, pho_key), suffixes in photo_patterns.items():
         date_suffixes = [s for s in suffixes if s.split("_", 1)[0] == "date"]
         if not date_suffixes:
             continue
 
+        if obs_key not in obs_arrays:
+            obs_series = observation_dates.get(obs_key)
+            if obs_series is not None and not obs_series.index.equals(gdf.index):
+                obs_series = obs_series.reindex(gdf.index)
+            obs_arrays[obs_key] = _bound_array(obs_series, None, n)
+        od = obs_arrays[obs_key]
+
         for suf in date_suffixes:
             fullcol = f"{obs_key}_{pho_key}_{suf}"
             if fullcol not in cols_set:
                 continue
 
-            pho_series = gdf[fullcol]
-            obs_series = observation_dates.get(obs_key)
+            pd_ = _date_array(gdf[fullcol])
+            before_obs = pd_ < od
+            before = pd_ < dd
+            after = pd_ > df
 
-            for idx, pho_val in pho_series.items():
-                pd_ = _to_date(pho_val)
-                if pd_ is None:
-                    continue
-
-                if obs_series is not None and idx in obs_series.index:
-                    od = _to_date(obs_series.loc[idx])
-                    if od is not None and pd_ < od:
-                        errors.append(
-                            f"{fullcol} ({pd_}) < date observation ({od}) sur {ids[idx]}"
-                        )
-
-                if have_bounds:
-                    if dd_series is not None and idx in dd_series.index:
-                        dd = _to_date(dd_series.loc[idx])
-                    else:
-                        dd = dd_static
-
-                    if df_series is not None and idx in df_series.index:
-                        df = _to_date(df_series.loc[idx])
-                    else:
-                        df = df_static
-
-                    if dd is not None and pd_ < dd:
-                        errors.append(
-                            f"{fullcol} ({pd_}) < date_debut ({dd}) sur {ids[idx]}"
-                        )
-
-                    if df is not None and pd_ > df:
-                        errors.append(
-                            f"{fullcol} ({pd_}) > date_fin ({df}) sur {ids[idx]}"
-                        )
+            for pos in np.flatnonzero(before_obs | before | after):
+                if before_obs[pos]:
+                    errors.append(
+                        f"{fullcol} ({pd_[pos]}) < date observation ({od[pos]}) sur {ident(pos)}"
+                    )
+                if before[pos]:
+                    errors.append(
+                        f"{fullcol} ({pd_[pos]}) < date_debut ({dd[pos]}) sur {ident(pos)}"
+                    )
+                if after[pos]:
+                    errors.append(
+                        f"{fullcol} ({pd_[pos]}) > date_fin ({df[pos]}) sur {ident(pos)}"
+                    )
 
     return errors
-
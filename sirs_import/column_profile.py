@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from functools import cached_property
+
+from .helpers import empty_mask, is_valid_iso_date, _split_by_kind
+
+# ======================================================================
+#  PROFILS DE COLONNES
+# ======================================================================
+# Les validateurs (check_no_empty_columns, diag_des, diag_obs, diag_pho)
+# lisent les mêmes colonnes sous les mêmes formes : masque des nulls,
+# texte, valeurs distinctes… Chaque vue est calculée à la première
+# demande puis conservée pour les validateurs suivants. Les profils
+# décrivent la couche telle que lue : ils ne sont plus valables après
+# apply_normalization_after_validation ou toute autre modification.
+
+
+class ColumnProfile:
+    def __init__(self, series):
+        self.series = series
+
+    @cached_property
+    def na(self):
+        """Masque des valeurs nulles (None, NaN, NaT)."""
+        return self.series.isna().to_numpy(dtype=bool)
+
+    @cached_property
+    def empty(self):
+        """Masque des valeurs vides au sens de is_empty()."""
+        return empty_mask(self.series)
+
+    @cached_property
+    def nonnull(self):
+        """Valeurs non nulles (series.dropna())."""
+        return self.series[~self.na]
+
+    @cached_property
+    def text(self):
+        """series.astype(str), nulls compris ("nan", "None", "NaT")."""
+        return self.series.astype(str)
+
+    @cached_property
+    def stripped(self):
+        return self.text.str.strip()
+
+    @cached_property
+    def nonnull_text(self):
+        """series.dropna().astype(str)."""
+        return self.nonnull.astype(str)
+
+    @cached_property
+    def kinds(self):
+        """Masques (texte, nombre) des valeurs non nulles, cf. _split_by_kind."""
+        return _split_by_kind(self.series)
+
+    @cached_property
+    def integers(self):
+        """
+        Valeurs non nulles converties en entiers (2.0 → 2, "3" → 3),
+        None pour les valeurs non entières ou non numériques.
+        """
+        return [_as_integer(v) for v in self.nonnull.tolist()]
+
+    @cached_property
+    def iso_date_valid(self):
+        """Masque (aligné sur nonnull_text) des dates ISO AAAA-MM-JJ valides."""
+        return self._text_mask(self.nonnull_text, is_valid_iso_date)
+
+    @cached_property
+    def distinct(self):
+        """Valeurs non nulles distinctes, dans l'ordre d'apparition."""
+        import pandas as pd
+        try:
+            return pd.unique(self.nonnull).tolist()
+        except TypeError:
+            # valeurs non hachables (listes…)
+            out = []
+            for v in self.nonnull.tolist():
+                if v not in out:
+                    out.append(v)
+            return out
+
+    def text_where(self, predicate, nonnull=False):
+        """
+        Valeurs de text (nonnull_text si nonnull=True) qui vérifient
+        predicate, dans l'ordre de la colonne. predicate n'est évalué
+        qu'une fois par valeur distincte.
+        """
+        text = self.nonnull_text if nonnull else self.text
+        return text[self._text_mask(text, predicate)].tolist()
+
+    @staticmethod
+    def _text_mask(text, predicate):
+        import pandas as pd
+        table = {v: bool(predicate(v)) for v in pd.unique(text)}
+        return text.map(table).to_numpy(dtype=bool)
+
+
+def _as_integer(v):
+    try:
+        f = float(v)
+        n = int(f)
+    except Exception:
+        return None
+    return n if f == n else None
+
+
+class ColumnProfiles:
+    """Profils des colonnes d'une couche, créés à la première lecture."""
+
+    def __init__(self, gdf):
+        self.gdf = gdf
+        self._profiles = {}
+
+    def __getitem__(self, col):
+        profile = self._profiles.get(col)
+        if profile is None:
+            profile = self._profiles[col] = ColumnProfile(self.gdf[col])
+        return profile
+
+
+def column_profile(profiles, gdf, col):
+    # validateurs appelés sans profils partagés : profil à usage unique
+    if profiles is None:
+        return ColumnProfile(gdf[col])
+    return profiles[col]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import os
+from .config_defaults import DEFAULTS
+from . import config_loader
+
+# clés sans lesquelles aucun traitement n'est possible
+REQUIRED_KEYS = ("COUCH_URL", "COUCH_DB", "GPKG_FILE", "GPKG_LAYER", "COL_TRONCONS")
+# remplacées par les entrées de GPKG_LAYERS si elle est renseignée
+LAYER_KEYS = ("GPKG_FILE", "GPKG_LAYER")
+
+POSITIVE_INT_KEYS = (
+    "COUCH_BULK_MAX_DOCS", "COUCH_BULK_MAX_BYTES", "COUCH_BULK_WORKERS",
+    "COUCH_PAGE_SIZE", "PHOTO_SCAN_WORKERS", "PHOTO_RELOCATION_WORKERS",
+)
+NON_NEGATIVE_NUMBER_KEYS = (
+    "COUCH_BULK_RETRIES", "COUCH_BULK_BACKOFF", "COUCH_BULK_TIMEOUT", "COUCH_FIND_TIMEOUT",
+    "COUCH_CONNECT_TIMEOUT",
+)
+
+
+def check_config(config=None):
+    """
+    Vérifications statiques de la configuration, sans lecture du GPKG
+    ni accès à CouchDB. Renvoie (erreurs, avertissements).
+    """
+    from .json_builder import JSON_FORMATS
+    from .relocate import PHOTO_DUPLICATE_MODES
+    from .helpers import gpkg_sources
+    from .exceptions import ConfigError
+
+    # configuration chargée par load_config(), lue à l'appel
+    config = config_loader.CONFIG if config is None else config
+    errors = []
+    warnings = []
+
+    multi = bool(config.get("GPKG_LAYERS"))
+    for key in REQUIRED_KEYS:
+        if multi and key in LAYER_KEYS:
+            continue
+        if config.get(key) in (None, ""):
+            errors.append(f"{key} — valeur requise")
+
+    try:
+        sources = gpkg_sources(config)
+    except ConfigError as e:
+        errors.extend(e.args[0][1:])
+        sources = []
+    for source in sources:
+        if source.path and not os.path.isfile(source.path):
+            key = "GPKG_LAYERS" if multi else "GPKG_FILE"
+            errors.append(f"{key} — fichier introuvable : {source.path}")
+
+    for key in POSITIVE_INT_KEYS:
+        v = config.get(key)
+        if isinstance(v, bool) or not isinstance(v, int) or v < 1:
+            errors.append(f"{key} — valeur '{v}' : attendu entier ≥ 1")
+
+    for key in NON_NEGATIVE_NUMBER_KEYS:
+        v = config.get(key)
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0:
+            errors.append(f"{key} — valeur '{v}' : attendu nombre ≥ 0")
+
+    if config.get("JSON_FORMAT") not in JSON_FORMATS:
+        errors.append(
+            f"JSON_FORMAT — valeur '{config.get('JSON_FORMAT')}' : attendu {', '.join(JSON_FORMATS)}"
+        )
+    if config.get("PHOTO_DUPLICATE_MODE") not in PHOTO_DUPLICATE_MODES:
+        errors.append(
+            f"PHOTO_DUPLICATE_MODE — valeur '{config.get('PHOTO_DUPLICATE_MODE')}' : "
+            f"attendu {', '.join(PHOTO_DUPLICATE_MODES)}"
+        )
+
+    # clés inconnues : le plus souvent une faute de frappe
+    for key in sorted(set(config) - set(DEFAULTS)):
+        warnings.append(f"{key} — clé inconnue, ignorée")
+
+    return errors, warnings
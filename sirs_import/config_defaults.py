@@ -4,8 +4,23 @@ DEFAULTS = {
     "COUCH_USER": "",
     "COUCH_PW": "",
 
+    "COUCH_BULK_MAX_DOCS": 500,
+    "COUCH_BULK_MAX_BYTES": 4194304,
+    "COUCH_BULK_WORKERS": 4,
+    "COUCH_BULK_RETRIES": 3,
+    "COUCH_BULK_BACKOFF": 1.0,
+    "COUCH_BULK_TIMEOUT": 60,
+    "UPLOAD_IDEMPOTENT": False,
+    "COUCH_PAGE_SIZE": 2000,
+    "COUCH_FIND_TIMEOUT": 30,
+    "COUCH_CONNECT_TIMEOUT": 5,
+    "COUCH_GZIP": False,
+    "REF_CACHE": False,
+    "REF_CACHE_DIR": "",
+
     "GPKG_FILE": "",
     "GPKG_LAYER": "",
+    "GPKG_LAYERS": [],
     "COL_TRONCONS": "",
 
     "COL_LINEAR_ID": "",
@@ -35,7 +50,18 @@ DEFAULTS = {
     "PHO_FALLBACK_ORIENTATION": "",
     "PHO_FALLBACK_COTE": "",
 
+    "PHOTO_SCAN_WORKERS": 8,
+    "PHOTO_RELOCATION_WORKERS": 4,
+    "PHOTO_DUPLICATE_MODE": "copy",
+    "PHOTO_CONTENT_DUPLICATES": False,
+    "PHOTO_HASH_CACHE": "",
+
     "VERBOSE": False,
+    "LOG_JSONL": False,
+
+    "JSON_STREAM": False,
+    "JSON_FORMAT": "indent",
+    "JSON_SERIALIZER": "auto",
 
     "GPKG_PATH": None,  # IMPORTANT
 }
@@ -1,6 +1,5 @@
 import os
 import sys
-import argparse
 from wcwidth import wcswidth
 from .config_defaults import DEFAULTS
 
@@ -66,58 +65,51 @@ def print_red_block(lines):
         print(f"\033[41m\033[1m{line}{pad}\033[0m")
 
 
-def load_config():
+def _config_path(path):
     """
     Logique d’ordre :
     1) --config /chemin/vers/config_sirs.toml
     2) config_sirs.toml dans cwd
     """
 
-    parser = argparse.ArgumentParser(add_help=False)
-    parser.add_argument("--config")
-    args, remaining = parser.parse_known_args()
-
-    # IMPORTANT : restaurer sys.argv sans l'argument --config
-    sys.argv = [sys.argv[0]] + remaining
-
     # 1) Chemin explicite fourni par l’utilisateur
-    if args.config:
+    if path:
 
         # chemin inexistant
-        if not os.path.exists(args.config):
+        if not os.path.exists(path):
             print()
             print_red_block([
                 f"⛔ ERREUR: fichier config introuvable:",
-                f"{args.config}",
+                f"{path}",
             ])
             print()
             sys.exit(1)
 
         # chemin existe mais ce n'est PAS un fichier
-        if not os.path.isfile(args.config):
+        if not os.path.isfile(path):
             print()
             print_red_block([
                 f"⛔ ERREUR: le chemin fourni n'est pas un fichier:",
-                f"{args.config}",
+                f"{path}",
                 "Un chemin de fichier .toml est requis.",
             ])
             print()
             sys.exit(1)
 
         # pas un .toml
-        if not args.config.lower().endswith(".toml"):
+        if not path.lower().endswith(".toml"):
             print()
             print_red_block([
                 f"⛔ ERREUR: format incorrect:",
-                f"{args.config}",
+                f"{path}",
                 "Le fichier de configuration doit être un .toml",
             ])
             print()
             sys.exit(1)
 
         print()
-        print(f"⚙️ Chargement config via --config: {args.config}")
-        return args.config, merge_config(args.config)
+        print(f"⚙️ Chargement config via --config: {path}")
+        return path
 
 
     # 2) config_sirs.toml dans le PWD
@@ -125,7 +117,7 @@ def load_config():
     if os.path.exists(cwd_cfg):
         print()
         print(f"⚙️ Chargement config locale depuis: {cwd_cfg}")
-        return cwd_cfg, merge_config(cwd_cfg)
+        return cwd_cfg
 
     print()
     print_red_block([
@@ -137,23 +129,54 @@ def load_config():
     sys.exit(1)
 
 
-# CHARGEMENT INITIAL
-CONFIG_PATH, CONFIG = load_config()
-
-# PROJECT_DIR = répertoire contenant config_sirs.toml
-PROJECT_DIR = os.path.dirname(CONFIG_PATH)
-
-
 # Post-traitement: calcul du GPKG_PATH
-def compute_GPKG_PATH():
-    if CONFIG.get("GPKG_PATH"):
+def compute_GPKG_PATH(config, project_dir):
+    if config.get("GPKG_PATH"):
         return
 
-    if CONFIG.get("GPKG_FILE"):
-        CONFIG["GPKG_PATH"] = os.path.join(PROJECT_DIR, CONFIG["GPKG_FILE"])
+    if config.get("GPKG_FILE"):
+        config["GPKG_PATH"] = os.path.join(project_dir, config["GPKG_FILE"])
     else:
-        CONFIG["GPKG_PATH"] = None
+        config["GPKG_PATH"] = None
+
 
+def _forget_config_users(old):
+    # les modules lisent leurs constantes (COUCH_DB = CONFIG["COUCH_DB"]...)
+    # à l'import : ceux qui ont lu l'ancienne configuration sont réimportés
+    # au prochain import au lieu de la conserver (état partagé libéré)
+    for name, module in list(sys.modules.items()):
+        if name.startswith(f"{__package__}.") and name != __name__ \
+                and getattr(module, "CONFIG", None) is old:
+            if hasattr(module, "reset_state"):
+                module.reset_state()
+            del sys.modules[name]
 
-compute_GPKG_PATH()
 
+def load_config(path=None):
+    """
+    Charge la configuration `path` (--config), sinon config_sirs.toml du
+    répertoire courant, et l'expose dans CONFIG, CONFIG_PATH et PROJECT_DIR.
+    Doit précéder l'import des modules qui lisent CONFIG.
+    """
+    global CONFIG, CONFIG_PATH, PROJECT_DIR
+
+    config_path = _config_path(path)
+    config = merge_config(config_path)
+    # PROJECT_DIR = répertoire contenant config_sirs.toml
+    project_dir = os.path.dirname(config_path)
+    compute_GPKG_PATH(config, project_dir)
+
+    old = globals().get("CONFIG")
+    if old is not None:
+        _forget_config_users(old)
+    CONFIG, CONFIG_PATH, PROJECT_DIR = config, config_path, project_dir
+    return config
+
+
+def __getattr__(name):
+    # module importé sans load_config() préalable (scripts, tests
+    # manuels) : configuration du répertoire courant
+    if name in ("CONFIG", "CONFIG_PATH", "PROJECT_DIR"):
+        load_config()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
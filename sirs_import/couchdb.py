@@ -1,23 +1,100 @@
 # -*- coding: utf-8 -*-
 import os, csv
-from .helpers import yellow
+import gzip
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .helpers import yellow, bold
 from .exceptions import CouchDBError, DataNotFoundError
+from .serializer import get_serializer
 
 from .config_loader import CONFIG, PROJECT_DIR
 COUCH_DB   = CONFIG["COUCH_DB"]
 COUCH_URL  = CONFIG["COUCH_URL"]
 COUCH_USER = CONFIG["COUCH_USER"]
 COUCH_PW   = CONFIG["COUCH_PW"]
+COUCH_BULK_MAX_DOCS  = CONFIG["COUCH_BULK_MAX_DOCS"]
+COUCH_BULK_MAX_BYTES = CONFIG["COUCH_BULK_MAX_BYTES"]
+COUCH_BULK_WORKERS   = CONFIG["COUCH_BULK_WORKERS"]
+COUCH_BULK_RETRIES   = CONFIG["COUCH_BULK_RETRIES"]
+COUCH_BULK_BACKOFF   = CONFIG["COUCH_BULK_BACKOFF"]
+COUCH_BULK_TIMEOUT   = CONFIG["COUCH_BULK_TIMEOUT"]
+COUCH_PAGE_SIZE      = CONFIG["COUCH_PAGE_SIZE"]
+COUCH_FIND_TIMEOUT   = CONFIG["COUCH_FIND_TIMEOUT"]
+COUCH_CONNECT_TIMEOUT = CONFIG["COUCH_CONNECT_TIMEOUT"]
+COUCH_GZIP           = CONFIG["COUCH_GZIP"]
+REF_CACHE            = CONFIG["REF_CACHE"]
+UPLOAD_IDEMPOTENT    = CONFIG["UPLOAD_IDEMPOTENT"]
 
-TRONCONS_MISSING = set()
+# ======================================================================
+#  CONNEXION PARTAGÉE
+# ======================================================================
 
-def couchdb_database_exists():
-    import requests
+class CouchClient:
+    """
+    Connexion à COUCH_DB partagée par tout le module : une session
+    requests authentifiée à connexions persistantes (keep-alive), dont le
+    pool couvre les lectures de référentiels et les lots _bulk_docs
+    envoyés en parallèle. Les réponses gzip sont décodées par requests.
+    """
+
+    def __init__(self, pool_size=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        size = pool_size or max(REFERENCE_WORKERS, int(COUCH_BULK_WORKERS))
+        self.session = requests.Session()
+        self.session.auth = (COUCH_USER, COUCH_PW)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+
+# client partagé, créé au premier appel de get_client()
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client():
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = CouchClient()
+        return _CLIENT
+
+
+def _couch_session():
+    return get_client().session
+
+
+def _timeout(read):
+    # (connexion, lecture) : un serveur injoignable échoue vite
+    return (COUCH_CONNECT_TIMEOUT, read)
+
+
+# corps JSON plus petits : la compression coûte plus qu'elle ne rapporte
+GZIP_MIN_BYTES = 1024
+
+
+def _json_body(body):
+    """Corps JSON déjà encodé et en-têtes, compressé si COUCH_GZIP."""
+    headers = {"Content-Type": "application/json"}
+    if COUCH_GZIP and len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
 
+
+def couchdb_database_exists():
     url = f"{COUCH_URL}/{COUCH_DB}"
 
     try:
-        resp = requests.get(url, auth=(COUCH_USER, COUCH_PW), timeout=5)
+        resp = _couch_session().get(url, timeout=_timeout(COUCH_FIND_TIMEOUT))
     except Exception as e:
         raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
 
@@ -34,34 +111,166 @@ def couchdb_database_exists():
 
 
 
-def couchdb_find(selector, fields=None, limit=10000):
-    import requests
+CLASS_INDEX_NAME = "sirs-import-class"
+
+# codes HTTP indiquant que _find n'est pas disponible sur le serveur
+FIND_UNSUPPORTED = {404, 405, 501}
+
+
+class _FindUnsupported(CouchDBError):
+    pass
+
+
+# index Mango sur @class déjà vérifié pendant cette exécution
+_INDEXED = False
+_INDEX_LOCK = threading.Lock()
+
+
+def ensure_class_index(session):
+    """
+    Crée (si besoin) l'index Mango sur @class pour que les requêtes
+    _find ne parcourent pas toute la base. Vérifié une fois par exécution.
+    """
+    global _INDEXED
+    with _INDEX_LOCK:
+        if not _INDEXED:
+            _create_class_index(session)
+            _INDEXED = True
+
+
+def reset_state():
+    """
+    Oublie l'état partagé du module (tests, exécutions successives) :
+    le client est fermé et l'index @class sera de nouveau vérifié.
+    """
+    global _CLIENT, _INDEXED
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+        _CLIENT = None
+    with _INDEX_LOCK:
+        _INDEXED = False
+
+
+def _create_class_index(session):
+    url = f"{COUCH_URL}/{COUCH_DB}/_index"
+    payload = {
+        "index": {"fields": ["@class"]},
+        "name": CLASS_INDEX_NAME,
+        "ddoc": CLASS_INDEX_NAME,
+        "type": "json",
+    }
+    try:
+        r = session.post(url, json=payload, timeout=_timeout(COUCH_FIND_TIMEOUT))
+    except Exception as e:
+        raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
+
+    if r.status_code not in (200, 201):
+        print(yellow(
+            f"⚠️ Index Mango sur @class non créé (HTTP {r.status_code}) : "
+            "les requêtes _find risquent d'être lentes."
+        ))
+
 
+def _iter_find(session, selector, fields):
+    """Parcourt _find page par page à l'aide des bookmarks."""
     url = f"{COUCH_URL}/{COUCH_DB}/_find"
-    payload = {"selector": selector, "limit": limit}
+    payload = {"selector": selector, "limit": COUCH_PAGE_SIZE}
     if fields:
         payload["fields"] = fields
 
+    while True:
+        try:
+            r = session.post(url, json=payload, timeout=_timeout(COUCH_FIND_TIMEOUT))
+        except Exception as e:
+            raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
+
+        if r.status_code in FIND_UNSUPPORTED and "bookmark" not in payload:
+            raise _FindUnsupported(f"HTTP {r.status_code}")
+        if r.status_code != 200:
+            raise CouchDBError(
+                f"Erreur HTTP {r.status_code} lors de la requête _find sur '{COUCH_DB}'"
+            )
+
+        body = r.json()
+        docs = body.get("docs", [])
+        yield from docs
+
+        bookmark = body.get("bookmark")
+        if len(docs) < COUCH_PAGE_SIZE or not bookmark or bookmark == payload.get("bookmark"):
+            return
+        payload["bookmark"] = bookmark
+
+
+def _match_selector(doc, selector):
+    # seuls les sélecteurs d'égalité simple sont utilisés par ce module
+    return all(doc.get(k) == v for k, v in selector.items())
+
+
+def _iter_all_docs(session, selector, fields):
+    """
+    Repli sans _find : parcours paginé de _all_docs, filtré sur le
+    sélecteur et projeté sur `fields` au fil de l'eau.
+    """
+    url = f"{COUCH_URL}/{COUCH_DB}/_all_docs"
+    params = {"include_docs": "true", "limit": COUCH_PAGE_SIZE}
+
+    while True:
+        try:
+            r = session.get(url, params=params, timeout=_timeout(COUCH_FIND_TIMEOUT))
+        except Exception as e:
+            raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
+
+        if r.status_code != 200:
+            raise CouchDBError(
+                f"Erreur HTTP {r.status_code} lors de la lecture de _all_docs sur '{COUCH_DB}'"
+            )
+
+        rows = r.json().get("rows", [])
+        for row in rows:
+            doc = row.get("doc")
+            if not doc or not _match_selector(doc, selector):
+                continue
+            if fields:
+                doc = {k: doc[k] for k in fields if k in doc}
+            yield doc
+
+        if len(rows) < COUCH_PAGE_SIZE:
+            return
+        params = {
+            "include_docs": "true",
+            "limit": COUCH_PAGE_SIZE,
+            "startkey": json.dumps(rows[-1]["id"]),
+            "skip": 1,
+        }
+
+
+def couchdb_find(selector, fields=None):
+    session = _couch_session()
+    ensure_class_index(session)
     try:
-        r = requests.post(url, json=payload, auth=(COUCH_USER, COUCH_PW), timeout=10)
-        r.raise_for_status()
-        docs = r.json().get("docs", [])
-        return docs
-    except:
+        return list(_iter_find(session, selector, fields))
+    except _FindUnsupported:
         pass
 
-    # fallback si _find échoue ou n’est pas supporté
-    url_all = f"{COUCH_URL}/{COUCH_DB}/_all_docs?include_docs=true"
-    r2 = requests.get(url_all, auth=(COUCH_USER, COUCH_PW), timeout=20)
-    r2.raise_for_status()
-    return [row["doc"] for row in r2.json().get("rows", []) if row.get("doc")]
+    # repli si _find n'est pas supporté par le serveur
+    print(yellow(f"⚠️ _find indisponible sur '{COUCH_DB}' : lecture paginée de _all_docs."))
+    return list(_iter_all_docs(session, selector, fields))
+
+
 
+def _reference_docs(cls, fields):
+    # cache local synchronisé par _changes (voir refcache.py)
+    if REF_CACHE:
+        from .refcache import cached_reference_docs
+        return cached_reference_docs(cls)
+    return couchdb_find({"@class": cls}, fields=fields)
 
 
 def get_all_troncons(write_txt=True):
-    docs = couchdb_find(
-        {"@class": "fr.sirs.core.model.TronconDigue"},
-        fields=["_id", "designation", "libelle"]
+    docs = _reference_docs(
+        "fr.sirs.core.model.TronconDigue",
+        ["_id", "designation", "libelle"]
     )
 
     if not docs:
@@ -100,9 +309,9 @@ def get_all_troncons(write_txt=True):
     return troncons
 
 def get_all_users(write_txt=True):
-    docs = couchdb_find(
-        {"@class": "fr.sirs.core.model.Utilisateur"},
-        fields=["_id", "login", "role"],
+    docs = _reference_docs(
+        "fr.sirs.core.model.Utilisateur",
+        ["_id", "login", "role"],
     )
 
     if not docs:
@@ -141,9 +350,9 @@ def get_all_users(write_txt=True):
     return users
 
 def get_all_contacts(write_txt=True):
-    docs = couchdb_find(
-        {"@class": "fr.sirs.core.model.Contact"},
-        fields=["_id", "nom", "prenom"]
+    docs = _reference_docs(
+        "fr.sirs.core.model.Contact",
+        ["_id", "nom", "prenom"]
     )
 
     if not docs:
@@ -182,17 +391,89 @@ def get_all_contacts(write_txt=True):
     return contacts
 
 
+# tronçons, utilisateurs et contacts
+REFERENCE_WORKERS = 3
+
+
+def get_reference_data(write_txt=True):
+    """
+    (tronçons, utilisateurs, contacts) lus en parallèle sur la connexion
+    partagée ; la première erreur rencontrée est relevée.
+    """
+    fetchers = (get_all_troncons, get_all_users, get_all_contacts)
+    with ThreadPoolExecutor(max_workers=REFERENCE_WORKERS) as pool:
+        futures = [pool.submit(fn, write_txt) for fn in fetchers]
+        return tuple(f.result() for f in futures)
+
+
+class TronconIndex:
+    """
+    Index des tronçons par libelle et par designation, construit une
+    seule fois à partir de get_all_troncons().
+    Les valeurs sans correspondance sont collectées dans `missing`.
+    """
+
+    KEYS = ("libelle", "designation")
+
+    def __init__(self, troncons):
+        self.linear_ids = set()
+        self._first = {key: {} for key in self.KEYS}
+        self._counts = {key: {} for key in self.KEYS}
+        self.missing = set()
+
+        for t in troncons:
+            self.linear_ids.add(t["linearId"])
+            for key in self.KEYS:
+                v = t.get(key)
+                if v is None:
+                    continue
+                # premier tronçon rencontré = résultat du parcours linéaire
+                self._first[key].setdefault(v, t["linearId"])
+                self._counts[key][v] = self._counts[key].get(v, 0) + 1
+
+    def count(self, value, key):
+        return self._counts[key].get(value, 0)
+
+    def matches(self, value):
+        return any(value in self._first[key] for key in self.KEYS)
+
+    def resolve(self, value, key):
+        v = str(value).strip()
+        linear_id = self._first[key].get(v)
+        if linear_id is None:
+            self.missing.add(v)
+        return linear_id
+
+    def resolve_series(self, series, key):
+        """
+        Résout une colonne entière : chaque valeur distincte n'est résolue
+        qu'une fois, puis le résultat est rediffusé sur toute la colonne.
+        """
+        import numpy as np
+        import pandas as pd
+
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        resolved = np.array(
+            [self.resolve(v, key) for v in uniques], dtype=object
+        )
+        return pd.Series(resolved[codes], index=series.index, dtype=object)
+
+
+def _as_troncon_index(troncons):
+    if isinstance(troncons, TronconIndex):
+        return troncons
+    return TronconIndex(troncons)
+
+
 def choose_join_key(values, troncons):
+    index = _as_troncon_index(troncons)
     count_lib = 0
     count_des = 0
 
     # comptages des correspondances
     for v in values:
-        for t in troncons:
-            if t.get("libelle") == v:
-                count_lib += 1
-            if t.get("designation") == v:
-                count_des += 1
+        count_lib += index.count(v, "libelle")
+        count_des += index.count(v, "designation")
 
     # victoire simple
     if count_lib > count_des:
@@ -202,12 +483,8 @@ def choose_join_key(values, troncons):
 
     # égalité → détecter les valeurs sans correspondance
     for v in values:
-        matched = any(
-            t.get("libelle") == v or t.get("designation") == v
-            for t in troncons
-        )
-        if not matched:
-            TRONCONS_MISSING.add(v)
+        if not index.matches(v):
+            index.missing.add(v)
 
     # égalité → règle fixe lors d'un match ex æquo ou absence totale de match
     return "libelle"
@@ -237,37 +514,324 @@ def validate_troncons_key(col_troncons: str, gdf):
 	
 	
 def resolve_linear_id(value, troncons, key):
-    v = str(value).strip()
-
-    for t in troncons:
-        if t.get(key) == v:
-            return t["linearId"]
-
-    # si on arrive ici → pas trouvé
-    TRONCONS_MISSING.add(v)
-    return None
-
-def couchdb_upload_bulk(documents):
-    import requests
-
+    return _as_troncon_index(troncons).resolve(value, key)
+
+# ======================================================================
+#  IMPORT _bulk_docs PAR LOTS
+# ======================================================================
+
+# erreurs par document qu'un nouvel envoi ne peut pas corriger
+PERMANENT_BULK_ERRORS = {"conflict", "forbidden", "unauthorized"}
+
+# enveloppe {"docs":[...]} autour des documents encodés
+_BULK_HEAD = b'{"docs":['
+_BULK_TAIL = b"]}"
+
+
+def _encode_doc(doc):
+    return get_serializer().dumpb(doc)
+
+
+def _ensure_document_ids(documents):
+    """
+    Donne un _id aléatoire (UUID4 hexadécimal) aux documents qui n'en ont
+    pas, avant le premier envoi : un lot renvoyé après un délai dépassé
+    produit alors des conflits au lieu de doublons.
+    """
+    for doc in documents:
+        if "_id" in doc:
+            yield doc
+        else:
+            yield {"_id": uuid.uuid4().hex, **doc}
+
+
+def _iter_bulk_batches(documents, max_docs, max_bytes):
+    """
+    Découpe les documents en lots de (index global, document encodé).
+    Un lot respecte max_docs et max_bytes, sauf un document isolé
+    plus gros que max_bytes qui forme son propre lot.
+    """
+    budget = max_bytes - len(_BULK_HEAD) - len(_BULK_TAIL)
+    batch = []
+    size = 0
+    for idx, doc in enumerate(documents):
+        raw = _encode_doc(doc)
+        if batch and (len(batch) >= max_docs or size + len(raw) > budget):
+            yield batch
+            batch = []
+            size = 0
+        batch.append((idx, raw))
+        size += len(raw) + 1
+    if batch:
+        yield batch
+
+
+def _post_bulk(session, items):
     url = f"{COUCH_URL}/{COUCH_DB}/_bulk_docs"
-    payload = {"docs": documents}
-
-    try:
-        r = requests.post(url, json=payload, auth=(COUCH_USER, COUCH_PW), timeout=10)
-    except Exception as e:
-        return False, [f"Erreur de connexion : {e}"]
-
-    if r.status_code not in (200, 201, 202):
-        return False, [f"HTTP {r.status_code}: {r.text}"]
-
-    resp = r.json()
-    errors = []
+    body = _BULK_HEAD + b",".join(raw for _, raw in items) + _BULK_TAIL
+    body, headers = _json_body(body)
+    return session.post(
+        url,
+        data=body,
+        headers=headers,
+        timeout=_timeout(COUCH_BULK_TIMEOUT),
+    )
 
-    for idx, item in enumerate(resp):
-        if "error" in item:
-            reason = item.get("reason", "inconnu")
-            errors.append(f"Doc {idx} : {item['error']} – {reason}")
 
-    return len(errors) == 0, errors
+def _upload_batch(session, number, items, conflict_ok=False):
+    """
+    Envoie un lot avec nouvelles tentatives à attente exponentielle.
+    Seuls les documents en échec (transitoire) sont renvoyés ;
+    un lot refusé pour sa taille (HTTP 413) est coupé en deux.
+    Avec conflict_ok, un conflit signifie que le document (à _id
+    déterministe) est déjà en base : il compte comme importé. Sans
+    conflict_ok, seul un conflit lors d'un renvoi compte comme importé.
+    """
+    start = time.perf_counter()
+    result = {
+        "batch": number, "docs": len(items), "ok": 0, "errors": [], "attempts": 0,
+        "committed": [],
+    }
+
+    # (documents à envoyer, tentatives déjà faites)
+    pending = [(items, 0)]
+    while pending:
+        chunk, tries = pending.pop()
+        result["attempts"] += 1
+        # documents à renvoyer avec la dernière erreur rencontrée
+        retry = []
+
+        try:
+            r = _post_bulk(session, chunk)
+        except Exception as e:
+            retry = [(idx, raw, f"Doc {idx} : Erreur de connexion : {e}") for idx, raw in chunk]
+        else:
+            if r.status_code in (200, 201, 202):
+                try:
+                    response = r.json()
+                except ValueError:
+                    response = None
+                if not isinstance(response, list):
+                    response = []
+                    reason = f"réponse _bulk_docs illisible (HTTP {r.status_code})"
+                else:
+                    reason = "absent de la réponse _bulk_docs"
+
+                for (idx, raw), item in zip(chunk, response):
+                    if "error" not in item:
+                        result["ok"] += 1
+                        result["committed"].append((item.get("id"), item.get("rev")))
+                        continue
+                    # tous les documents ont un _id : un conflit lors d'un
+                    # renvoi signifie que l'envoi précédent a été enregistré
+                    if item["error"] == "conflict" and (conflict_ok or tries > 0):
+                        result["ok"] += 1
+                        result["committed"].append((item.get("id"), None))
+                        continue
+                    msg = f"Doc {idx} : {item['error']} – {item.get('reason', 'inconnu')}"
+                    if item["error"] in PERMANENT_BULK_ERRORS:
+                        result["errors"].append(msg)
+                    else:
+                        retry.append((idx, raw, msg))
+
+                # réponse tronquée : les documents sans réponse sont renvoyés
+                retry.extend(
+                    (idx, raw, f"Doc {idx} : {reason}")
+                    for idx, raw in chunk[len(response):]
+                )
+            elif r.status_code == 413 and len(chunk) > 1:
+                half = len(chunk) // 2
+                pending.append((chunk[half:], tries))
+                pending.append((chunk[:half], tries))
+                continue
+            elif r.status_code == 429 or r.status_code >= 500:
+                retry = [(idx, raw, f"Doc {idx} : HTTP {r.status_code}: {r.text}") for idx, raw in chunk]
+            else:
+                result["errors"].extend(
+                    f"Doc {idx} : HTTP {r.status_code}: {r.text}" for idx, _ in chunk
+                )
+
+        if not retry:
+            continue
+        if tries < COUCH_BULK_RETRIES:
+            time.sleep(COUCH_BULK_BACKOFF * (2 ** tries))
+            pending.append(([(idx, raw) for idx, raw, _ in retry], tries + 1))
+        else:
+            result["errors"].extend(
+                f"{msg} (après {tries + 1} tentatives)" for _, _, msg in retry
+            )
+
+    result["failed"] = result["docs"] - result["ok"]
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def couchdb_upload_bulk(documents, journal=None):
+    """
+    Importe les documents via _bulk_docs, par lots envoyés en parallèle.
+    documents peut être une liste ou un flux régénéré (JSON_STREAM).
+    Avec un journal (UploadJournal), les documents déjà importés lors d'une
+    exécution précédente sont sautés et chaque lot réussi y est consigné.
+
+    Retourne (ok, erreurs, rapport).
+    """
+    workers = max(1, int(COUCH_BULK_WORKERS))
+    # connexions déjà ouvertes par la lecture des référentiels
+    session = _couch_session()
+    start = time.perf_counter()
+    batches = []
+    skipped = [0]
+
+    if journal is not None:
+        documents = journal.pending(documents, skipped)
+    documents = _ensure_document_ids(documents)
+
+    def collect(futures):
+        for f in futures:
+            result = f.result()
+            committed = result.pop("committed")
+            if journal is not None:
+                journal.record(committed)
+            batches.append(result)
 
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = set()
+            for number, items in enumerate(
+                _iter_bulk_batches(documents, COUCH_BULK_MAX_DOCS, COUCH_BULK_MAX_BYTES),
+                start=1,
+            ):
+                # nombre de lots en mémoire borné
+                if len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(
+                    _upload_batch, session, number, items, journal is not None
+                ))
+            collect(in_flight)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    batches.sort(key=lambda b: b["batch"])
+    errors = [e for b in batches for e in b["errors"]]
+    report = {
+        "batches": batches,
+        "docs": sum(b["docs"] for b in batches),
+        "ok": sum(b["ok"] for b in batches),
+        "failed": sum(b["failed"] for b in batches),
+        "skipped": skipped[0],
+        "seconds": time.perf_counter() - start,
+    }
+    return len(errors) == 0 and report["failed"] == 0, errors, report
+
+
+def print_upload_report(report):
+    batches = report["batches"]
+    seconds = report["seconds"]
+    rate = report["ok"] / seconds if seconds > 0 else 0.0
+
+    print()
+    print(bold("📦 Rapport d'import _bulk_docs :"))
+    retried = [b for b in batches if b["attempts"] > 1 or b["failed"]]
+    for b in retried:
+        line = (
+            f"   - lot {b['batch']} : {b['ok']}/{b['docs']} documents, "
+            f"{b['attempts']} envois, {b['seconds']:.1f} s"
+        )
+        print(yellow(line) if b["failed"] else line)
+    print(
+        f"   {len(batches)} lots, {report['ok']}/{report['docs']} documents importés "
+        f"en {seconds:.1f} s ({rate:.0f} docs/s)"
+    )
+    if report.get("skipped"):
+        print(f"   {report['skipped']} documents déjà importés (journal) non renvoyés")
+
+
+# ======================================================================
+#  IMPORT IDEMPOTENT : _id DÉTERMINISTES ET JOURNAL
+# ======================================================================
+
+# espace de noms des _id générés (UUIDv5)
+DOC_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "sirs_import/desordre")
+
+# champs formant la clé stable d'un désordre
+DOC_ID_FIELDS = ("linearId", "designation", "libelle", "date_debut")
+
+
+def assign_document_ids(documents):
+    """
+    Ajoute à chaque désordre un _id déterministe (UUIDv5 hexadécimal)
+    dérivé de DOC_ID_FIELDS ; les désordres de même clé sont distingués
+    par leur rang d'apparition dans documents (toutes couches confondues).
+    """
+    seen = {}
+    for doc in documents:
+        if "_id" in doc:
+            yield doc
+            continue
+        key = "|".join(str(doc.get(f, "")) for f in DOC_ID_FIELDS)
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        doc_id = uuid.uuid5(DOC_ID_NAMESPACE, f"{key}|{n}").hex
+        yield {"_id": doc_id, **doc}
+
+
+def upload_journal_path(output):
+    return f"{os.path.splitext(output)[0]}.upload.jsonl"
+
+
+class UploadJournal:
+    """
+    Journal local (JSON lines) des documents importés dans COUCH_DB :
+    une ligne {"db", "id", "rev"} par document, écrite après chaque lot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.committed = {}
+        self._lock = threading.Lock()
+        self._file = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # ligne tronquée par un arrêt brutal
+                        continue
+                    if entry.get("db") == COUCH_DB:
+                        self.committed[entry["id"]] = entry.get("rev")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise CouchDBError(f"Journal d'import illisible ({path}) : {e}")
+
+    def pending(self, documents, skipped):
+        for doc in documents:
+            if doc.get("_id") in self.committed:
+                skipped[0] += 1
+                continue
+            yield doc
+
+    def record(self, committed):
+        committed = [(i, r) for i, r in committed if i is not None]
+        if not committed:
+            return
+        with self._lock:
+            if self._file is None:
+                try:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                except OSError as e:
+                    raise CouchDBError(f"Journal d'import non enregistrable ({self.path}) : {e}")
+            for doc_id, rev in committed:
+                self._file.write(json.dumps({"db": COUCH_DB, "id": doc_id, "rev": rev}) + "\n")
+                self.committed[doc_id] = rev
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -7,8 +7,9 @@ from .helpers import (
     normalize_source, is_nonempty_scalar, is_valid_uuid,
     is_valid_type_desordre, is_valid_categorie_desordre,
     normalize_type_desordre, normalize_categorie_desordre,
-    is_empty, bold
+    is_empty, sirs_code_invalid_mask, bold
 )
+from .column_profile import ColumnProfiles, column_profile
 from .config_loader import CONFIG
 COL_AUTHOR             = CONFIG["COL_AUTHOR"]
 COL_COMMENTAIRE        = CONFIG["COL_COMMENTAIRE"]
@@ -26,6 +27,7 @@ COL_TYPE_DESORDRE_ID   = CONFIG["COL_TYPE_DESORDRE_ID"]
 COL_CATEGORIE_DESORDRE_ID = CONFIG["COL_CATEGORIE_DESORDRE_ID"]
 
 from .exceptions import UserCancelled
+from .prompts import ask
 
 USED_COLUMNS = set()
 
@@ -70,20 +72,19 @@ def _diag_text_columns(cols, gdf, rows, errors):
     _diag_text_field("lieuDit", COL_LIEUDIT, cols, gdf, rows, errors)
 
 
-def _diag_linear_id(cols, gdf, rows, errors):
+def _diag_linear_id(cols, gdf, rows, errors, profiles=None):
     val = COL_LINEAR_ID
     if val in cols:
         _mark(val)
-        series = gdf[val]
+        profile = column_profile(profiles, gdf, val)
 
         # unified detection of empty values (None, "", " ", "nan", "NULL", "None", etc.)
-        empty_values = [v for v in series if is_empty(v)]
-        if empty_values:
+        if profile.empty.any():
             rows.append(["linearId", q(val), "colonne GPKG", "valeurs vides détectées", "non"])
             errors.append(f"linearId : colonne '{val}' — contient des valeurs vides")
             return
 
-        invalid = [s for s in series.astype(str) if not is_valid_uuid(s)]
+        invalid = profile.text_where(lambda s: not is_valid_uuid(s))
         if invalid:
             sample = ", ".join(invalid[:3]) + ("..." if len(invalid) > 3 else "")
             rows.append(["linearId", q(val), "colonne GPKG", "UUID invalides", "non"])
@@ -127,26 +128,38 @@ def _diag_generic_code(
     msg_valid_fallback,
     msg_fallback_missing,
     msg_relationship=None,
-    experimental=False
+    experimental=False,
+    prefix=None,
+    profiles=None,
 ):
     if exists(colname, cols):
         if experimental and msg_relationship and warnings is not None:
             warnings.append(msg_relationship)
         _mark(colname)
 
-        invalids = []
-        # IMPORTANT : on ne fait plus dropna().astype(str)
-        # - on ignore explicitement les valeurs "vides" (is_empty)
-        # - on corrige le cas float 2.0 -> int 2 avant validation
-        for v in gdf[colname]:
-            if is_empty(v):
-                continue
-            v2 = _norm_for_validation(v)
-            if not validator(v2):
-                invalids.append(v)
+        profile = column_profile(profiles, gdf, colname)
+        series = profile.series
+        if prefix:
+            # validation vectorisée : les valeurs vides sont ignorées,
+            # 2.0 est accepté comme 2
+            mask = sirs_code_invalid_mask(series, prefix, kinds=profile.kinds) & ~profile.empty
+            n_invalids = int(mask.sum())
+            invalids = series[mask].head(3).tolist()
+        else:
+            invalids = []
+            # IMPORTANT : on ne fait plus dropna().astype(str)
+            # - on ignore explicitement les valeurs "vides" (is_empty)
+            # - on corrige le cas float 2.0 -> int 2 avant validation
+            for v, empty in zip(series, profile.empty):
+                if empty:
+                    continue
+                v2 = _norm_for_validation(v)
+                if not validator(v2):
+                    invalids.append(v)
+            n_invalids = len(invalids)
 
         if invalids:
-            sample = ", ".join(str(x) for x in invalids[:3]) + ("..." if len(invalids) > 3 else "")
+            sample = ", ".join(str(x) for x in invalids[:3]) + ("..." if n_invalids > 3 else "")
             rows.append([label, q(colname), "colonne GPKG", msg_invalid_col.format(sample), "non"])
             errors.append(f"{label} : colonne '{colname}' — {msg_invalid_col.format(sample)}")
         else:
@@ -165,7 +178,7 @@ def _diag_generic_code(
         rows.append([label, "---", "non défini", msg_fallback_missing, "oui"])
 
 
-def _diag_author(cols, gdf, rows, errors, user_ids):
+def _diag_author(cols, gdf, rows, errors, user_ids, profiles=None):
     val = COL_AUTHOR
 
     # cas 1 — config vide => autorisé
@@ -176,13 +189,12 @@ def _diag_author(cols, gdf, rows, errors, user_ids):
     # cas 2 — valeur correspond à une colonne du GPKG
     if val in cols:
         _mark(val)
-        series = gdf[val]
+        profile = column_profile(profiles, gdf, val)
 
         # valeurs non-null mais invalides (syntaxe UUID)
-        invalid_syntax = [
-            s for s in series.astype(str)
-            if not is_empty(s) and not is_valid_uuid(s)
-        ]
+        invalid_syntax = profile.text_where(
+            lambda s: not is_empty(s) and not is_valid_uuid(s)
+        )
 
         if invalid_syntax:
             msgsample = ", ".join(invalid_syntax[:3]) + ("..." if len(invalid_syntax) > 3 else "")
@@ -193,10 +205,9 @@ def _diag_author(cols, gdf, rows, errors, user_ids):
             return
 
         # valeurs existantes mais inconnues dans CouchDB
-        invalid_contact = [
-            s for s in series.astype(str)
-            if not is_empty(s) and s not in user_ids
-        ]
+        invalid_contact = profile.text_where(
+            lambda s: not is_empty(s) and s not in user_ids
+        )
 
         if invalid_contact:
             msgsample = ", ".join(invalid_contact[:3]) + ("..." if len(invalid_contact) > 3 else "")
@@ -221,7 +232,7 @@ def _diag_author(cols, gdf, rows, errors, user_ids):
 
 
 
-def _diag_cote(cols, gdf, rows, errors):
+def _diag_cote(cols, gdf, rows, errors, profiles=None):
     _diag_generic_code(
         rows, errors, None,
         cols, gdf,
@@ -234,10 +245,12 @@ def _diag_cote(cols, gdf, rows, errors):
         msg_valid_col="",
         msg_valid_fallback="valeur unique pour tous les désordres",
         msg_fallback_missing="facultatif",
+        prefix="RefCote:",
+        profiles=profiles,
     )
 
 
-def _diag_position(cols, gdf, rows, errors):
+def _diag_position(cols, gdf, rows, errors, profiles=None):
     _diag_generic_code(
         rows, errors, None,
         cols, gdf,
@@ -250,10 +263,12 @@ def _diag_position(cols, gdf, rows, errors):
         msg_valid_col="",
         msg_valid_fallback="valeur unique pour tous les désordres",
         msg_fallback_missing="facultatif",
+        prefix="RefPosition:",
+        profiles=profiles,
     )
 
 
-def _diag_source(cols, gdf, rows, errors):
+def _diag_source(cols, gdf, rows, errors, profiles=None):
     _diag_generic_code(
         rows, errors, None,
         cols, gdf,
@@ -266,10 +281,12 @@ def _diag_source(cols, gdf, rows, errors):
         msg_valid_col="",
         msg_valid_fallback="valeur unique pour tous les désordres",
         msg_fallback_missing="facultatif",
+        prefix="RefSource:",
+        profiles=profiles,
     )
 
 
-def _diag_type_desordre(cols, gdf, rows, errors, warnings):
+def _diag_type_desordre(cols, gdf, rows, errors, warnings, profiles=None):
     _diag_generic_code(
         rows, errors, warnings,
         cols, gdf,
@@ -284,10 +301,12 @@ def _diag_type_desordre(cols, gdf, rows, errors, warnings):
         msg_fallback_missing="facultatif",
         msg_relationship="- typeDesordreId: encodage expérimental: vérifier la compatibilité avec categorieDesordreId.",
         experimental=True,
+        prefix="RefTypeDesordre:",
+        profiles=profiles,
     )
 
 
-def _diag_categorie_desordre(cols, gdf, rows, errors, warnings):
+def _diag_categorie_desordre(cols, gdf, rows, errors, warnings, profiles=None):
     _diag_generic_code(
         rows, errors, warnings,
         cols, gdf,
@@ -302,6 +321,8 @@ def _diag_categorie_desordre(cols, gdf, rows, errors, warnings):
         msg_fallback_missing="facultatif",
         msg_relationship="- categorieDesordreId: encodage expérimental: vérifier la compatibilité avec typeDesordreId.",
         experimental=True,
+        prefix="RefCategorieDesordre:",
+        profiles=profiles,
     )
 
 
@@ -322,7 +343,7 @@ def _diag_geometry(cols, gdf, rows, errors):
         print("(1) je suis d'accord")
         print("(2) je préfère redessiner mes lignes dans QGIS")
         try:
-            resp = input("Votre choix: ").strip().lower()
+            resp = ask("simplify_linestrings")
         except EOFError:
             raise UserCancelled(bold("❌ Processus interrompu"))
         if resp not in ("1","o","oui","y","yes"):
@@ -450,18 +471,22 @@ def _diag_dates(cols, gdf, rows, errors, gpkg_schema):
 # ======================================================================
 #  FONCTION PUBLIQUE
 # ======================================================================
-def diagnose_mapping(available_cols: List[str], gdf, gpkg_schema, user_ids: Sequence[str]) -> Tuple[List[List[str]], List[str], List[str]]:
+def diagnose_mapping(available_cols: List[str], gdf, gpkg_schema, user_ids: Sequence[str], profiles=None) -> Tuple[List[List[str]], List[str], List[str]]:
     cols = list(available_cols or [])
+    if profiles is None:
+        profiles = ColumnProfiles(gdf)
     rows, errors, warnings = [], [], []
+    # colonnes utilisées par la couche en cours uniquement
+    USED_COLUMNS.clear()
     _diag_base_metadata(rows, errors, warnings)
     _diag_text_columns(cols, gdf, rows, errors)
-    _diag_linear_id(cols, gdf, rows, errors)
-    _diag_author(cols, gdf, rows, errors, user_ids)
-    _diag_type_desordre(cols, gdf, rows, errors, warnings)
-    _diag_categorie_desordre(cols, gdf, rows, errors, warnings)
-    _diag_source(cols, gdf, rows, errors)
-    _diag_position(cols, gdf, rows, errors)
-    _diag_cote(cols, gdf, rows, errors)
+    _diag_linear_id(cols, gdf, rows, errors, profiles)
+    _diag_author(cols, gdf, rows, errors, user_ids, profiles)
+    _diag_type_desordre(cols, gdf, rows, errors, warnings, profiles)
+    _diag_categorie_desordre(cols, gdf, rows, errors, warnings, profiles)
+    _diag_source(cols, gdf, rows, errors, profiles)
+    _diag_position(cols, gdf, rows, errors, profiles)
+    _diag_cote(cols, gdf, rows, errors, profiles)
     _diag_geometry(cols, gdf, rows, errors)
     _diag_dates(cols, gdf, rows, errors, gpkg_schema)
 
@@ -9,6 +9,7 @@ from .helpers import (
     is_valid_uuid,
     summarize_bad_values,
 )
+from .column_profile import column_profile
 
 from .config_loader import CONFIG
 OBS_FALLBACK_OBSERVATEUR_ID = CONFIG["OBS_FALLBACK_OBSERVATEUR_ID"]
@@ -50,7 +51,7 @@ def detect_observation_patterns(columns):
     return {k: sorted(v) for k, v in observations.items()}
 
 
-def validate_observation_structure(columns, gdf, gpkg_schema, contact_ids):
+def validate_observation_structure(columns, gdf, gpkg_schema, contact_ids, profiles=None):
     errors = []
     used_columns = set()
     invalid_obs_columns = []
@@ -148,20 +149,20 @@ def validate_observation_structure(columns, gdf, gpkg_schema, contact_ids):
                 continue
 
             used_columns.add(col)
-            series = gdf[col]
-            nonnull = series.dropna()
+            profile = column_profile(profiles, gdf, col)
+            series = profile.series
 
             if root == "observateurId":
-                vals = nonnull.astype(str)
-
                 # UUID syntaxe invalide
-                bad = [v for v in vals if not is_valid_uuid(v)]
+                bad = profile.text_where(lambda v: not is_valid_uuid(v), nonnull=True)
                 if bad:
                     summary = summarize_bad_values(bad)
                     errors.append(f"[GPKG] {col} — {summary} : attendu UUID valide")
 
                 # UUID syntaxe valide mais inexistant dans CouchDB
-                unknown = [v for v in vals if is_valid_uuid(v) and v not in contact_ids]
+                unknown = profile.text_where(
+                    lambda v: is_valid_uuid(v) and v not in contact_ids, nonnull=True
+                )
                 if unknown:
                     errors.append({
                         "msg": f"[GPKG] {col} — UUIDs inconnus dans CouchDB/SIRS :", "sub": unknown
@@ -171,7 +172,7 @@ def validate_observation_structure(columns, gdf, gpkg_schema, contact_ids):
             elif root == "urgenceId":
                 ctype = gpkg_schema.get(col)
                 ok, msg = validate_mixed_sirs_column(
-                    series, ctype, is_valid_urgence, "RefUrgence:", "urgenceId"
+                    series, ctype, is_valid_urgence, "RefUrgence:", "urgenceId", profile
                 )
                 if not ok:
                     errors.append(
@@ -182,14 +183,15 @@ def validate_observation_structure(columns, gdf, gpkg_schema, contact_ids):
                 ctype = gpkg_schema.get(col)
                 if ctype not in ("int", "integer", "int32"):
                     errors.append(f"[GPKG] {col} — type {ctype}, attendu int32")
-                ok, msg = validate_int32_positive(series)
+                ok, msg = validate_int32_positive(series, profile)
                 if not ok:
                     errors.append(f"[GPKG] {col} — {msg}")
 
             elif root == "suiteApporterId":
                 ctype = gpkg_schema.get(col)
                 ok, msg = validate_mixed_sirs_column(
-                    series, ctype, is_valid_suite_apporter, "RefSuiteApporter:", "suiteApporterId"
+                    series, ctype, is_valid_suite_apporter, "RefSuiteApporter:", "suiteApporterId",
+                    profile,
                 )
                 if not ok:
                     errors.append(
@@ -8,12 +8,12 @@ PHO_FALLBACK_DES_GEOM      = CONFIG["PHO_FALLBACK_DES_GEOM"]
 
 from .helpers import (
     is_valid_uuid,
-    is_valid_iso_date,
     is_valid_cote,
     is_valid_orientation_photo,
     validate_mixed_sirs_column,
     summarize_bad_values,
 )
+from .column_profile import ColumnProfiles
 
 SKIP_COLUMNS = {"date_debut", "date_fin"}
 ALNUM = re.compile(r"^[A-Za-z0-9]+$")
@@ -52,7 +52,13 @@ def detect_photo_patterns(columns):
     return {k: sorted(v) for k, v in photos.items()}
 
 
-def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gpkg_schema, contact_ids):
+def _invalid_iso_dates(profile):
+    return profile.nonnull_text[~profile.iso_date_valid].tolist()
+
+
+def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gpkg_schema, contact_ids, profiles=None):
+    if profiles is None:
+        profiles = ColumnProfiles(gdf)
     errors = []
     used_columns = set()
     invalid_photo_columns = []
@@ -135,8 +141,9 @@ def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gp
             )
         else:
             used_columns.add(obs_date_col)
-            raw_vals = gdf[obs_date_col].dropna().astype(str)
-            bad = [v for v in raw_vals if not is_valid_iso_date(v)]
+            # profil partagé : la colonne n'est analysée qu'une fois
+            # pour toutes les photos de l'observation
+            bad = _invalid_iso_dates(profiles[obs_date_col])
             if bad:
                 sample = ", ".join(bad[:3]) + ("..." if len(bad) > 3 else "")
                 errors.append(
@@ -158,9 +165,10 @@ def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gp
 
             used_columns.add(fullcol)
 
+            profile = profiles[fullcol]
+
             if root == "date":
-                raw_vals = gdf[fullcol].dropna().astype(str)
-                bad = [v for v in raw_vals if not is_valid_iso_date(v)]
+                bad = _invalid_iso_dates(profile)
                 if bad:
                     sample = ", ".join(bad[:3]) + ("..." if len(bad) > 3 else "")
                     errors.append(
@@ -170,11 +178,12 @@ def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gp
             elif root == "orientationPhoto":
                 ctype = gpkg_schema.get(fullcol)
                 ok, msg = validate_mixed_sirs_column(
-                    gdf[fullcol],
+                    profile.series,
                     ctype,
                     is_valid_orientation_photo,
                     "RefOrientationPhoto:",
                     "orientationPhoto",
+                    profile,
                 )
                 if not ok:
                     errors.append(f"[GPKG] {obs_key}/{pho_key}.orientationPhoto — {msg}")
@@ -182,20 +191,19 @@ def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gp
             elif root == "coteId":
                 ctype = gpkg_schema.get(fullcol)
                 ok, msg = validate_mixed_sirs_column(
-                    gdf[fullcol],
+                    profile.series,
                     ctype,
                     is_valid_cote,
                     "RefCote:",
                     "coteId",
+                    profile,
                 )
                 if not ok:
                     errors.append(f"[GPKG] {obs_key}/{pho_key}.coteId — {msg}")
 
             elif root == "photographeId":
-                raw_vals = gdf[fullcol].dropna().astype(str)
-
                 # 1. UUID invalides
-                bad_syntax = [v for v in raw_vals if not is_valid_uuid(v)]
+                bad_syntax = profile.text_where(lambda v: not is_valid_uuid(v), nonnull=True)
                 if bad_syntax:
                     sample = ", ".join(bad_syntax[:3]) + ("..." if len(bad_syntax) > 3 else "")
                     errors.append(
@@ -203,7 +211,7 @@ def validate_photo_structure(photo_patterns, columns, gdf, observation_dates, gp
                     )
                 else:
                     # 2. UUID valides mais inconnus dans CouchDB/SIRS
-                    bad_missing = [v for v in raw_vals if v not in contact_ids]
+                    bad_missing = profile.text_where(lambda v: v not in contact_ids, nonnull=True)
                     if bad_missing:
                         errors.append({
                             "msg": f"[GPKG] {obs_key}/{pho_key}.photographeId — UUIDs inconnus dans CouchDB/SIRS :", "sub": bad_missing})
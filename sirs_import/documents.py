@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import datetime
+from collections.abc import Mapping
+
+# ======================================================================
+#  DOCUMENTS SIRS
+# ======================================================================
+# Désordres, observations et photos produits par json_builder. Chaque
+# document ne garde que ses valeurs (__slots__, sans dict par instance) ;
+# il se lit comme un dict en lecture seule dont les clés sont, dans
+# l'ordre de sortie JSON, "@class", "valid" puis les champs renseignés
+# (valeur différente de None).
+
+
+def _date_value(value):
+    # dates déjà normalisées en "AAAA-MM-JJ" par les builders ; les dates
+    # natives et NaT sont traités ici, une fois, à la construction
+    if value is None or str(value) == "NaT":
+        return None
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+class SirsDocument(Mapping):
+    __slots__ = ("valid",)
+
+    CLASS = None
+    FIELDS = ()
+    DATE_FIELDS = ()
+    # champs contenant une liste de documents
+    CHILDREN = ()
+    # True : chaîne vide, 0… sont omis comme None
+    OMIT_FALSY = False
+
+    def __init__(self, valid, **fields):
+        self.valid = valid
+        for name in self.FIELDS:
+            value = fields.pop(name, None)
+            if name in self.DATE_FIELDS:
+                value = _date_value(value)
+            if self.OMIT_FALSY and not value:
+                value = None
+            setattr(self, name, value)
+        if fields:
+            raise TypeError(
+                f"{type(self).__name__} : champ(s) inconnu(s) {', '.join(sorted(fields))}"
+            )
+
+    def items(self):
+        yield "@class", self.CLASS
+        yield "valid", self.valid
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, value
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self):
+        return sum(1 for _ in self.items())
+
+    def __getitem__(self, key):
+        if key == "@class":
+            return self.CLASS
+        if key == "valid":
+            return self.valid
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def to_dict(self):
+        """Copie en dicts et listes natifs (documents imbriqués compris)."""
+        doc = {}
+        for key, value in self.items():
+            if key in self.CHILDREN:
+                value = [child.to_dict() for child in value]
+            doc[key] = value
+        return doc
+
+
+class Photo(SirsDocument):
+    CLASS = "fr.sirs.core.model.Photo"
+    FIELDS = (
+        "author", "chemin", "photographeId", "date", "designation", "libelle",
+        "orientationPhoto", "coteId", "positionDebut", "positionFin",
+    )
+    DATE_FIELDS = ("date",)
+    __slots__ = FIELDS
+
+
+class Observation(SirsDocument):
+    CLASS = "fr.sirs.core.model.Observation"
+    # suffixes autorisés (diag_obs) dans l'ordre de detect_observation_patterns
+    SUFFIXES = (
+        "designation", "evolution", "nombreDesordres", "observateurId",
+        "suite", "suiteApporterId", "urgenceId",
+    )
+    FIELDS = ("date", "author") + SUFFIXES + ("photos",)
+    DATE_FIELDS = ("date",)
+    CHILDREN = ("photos",)
+    __slots__ = FIELDS
+
+
+class Desordre(SirsDocument):
+    CLASS = "fr.sirs.core.model.Desordre"
+    FIELDS = (
+        "designation", "libelle", "commentaire", "linearId", "author", "lieuDit",
+        "coteId", "positionId", "sourceId", "typeDesordreId", "categorieDesordreId",
+        "positionDebut", "positionFin", "date_debut", "date_fin", "observations",
+    )
+    DATE_FIELDS = ("date_debut", "date_fin")
+    CHILDREN = ("observations",)
+    OMIT_FALSY = True
+    __slots__ = FIELDS
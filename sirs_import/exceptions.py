@@ -47,3 +47,11 @@ class JsonExportError(SirsError):
     pass
 
 
+
+class PolicyError(SirsError):
+    """Fichier de politique (--policy) invalide"""
+    pass
+
+class ConfigError(SirsError):
+    """Configuration invalide"""
+    pass
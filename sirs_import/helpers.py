@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 import sys
+import shutil
 import datetime
 import importlib
 import subprocess
 import unicodedata
+from collections import namedtuple
 from typing import (
     Any,
     Callable,
@@ -19,9 +22,8 @@ from typing import (
     TYPE_CHECKING,
 )
 
-from .exceptions import GpkgReadError, DataValidationError
-from .config_loader import CONFIG
-GPKG_FILE                   = CONFIG["GPKG_FILE"]
+from .exceptions import GpkgReadError, GpkgWriteError, DataValidationError, ConfigError
+from .config_loader import CONFIG, PROJECT_DIR
 COL_AUTHOR                  = CONFIG["COL_AUTHOR"]
 OBS_FALLBACK_OBSERVATEUR_ID = CONFIG["OBS_FALLBACK_OBSERVATEUR_ID"]
 PHO_FALLBACK_PHOTOGRAPH_ID  = CONFIG["PHO_FALLBACK_PHOTOGRAPH_ID"]
@@ -38,8 +40,10 @@ COL_TYPE_DESORDRE_ID        = CONFIG["COL_TYPE_DESORDRE_ID"]
 COL_TRONCONS                = CONFIG["COL_TRONCONS"]
 
 if TYPE_CHECKING:
+    import numpy as np
     import pandas as pd
     import geopandas as gpd
+    from .column_profile import ColumnProfile, ColumnProfiles
 
 
 # ============================================================
@@ -76,6 +80,18 @@ VALID_SUITE_VALUES: Set[str] = {str(i) for i in range(1, 9)}
 VALID_URGENCE_VALUES: Set[str] = {"1", "2", "3", "4", "99"}
 VALID_ORIENTATION_VALUES: Set[str] = {str(i) for i in range(1, 10)} | {"99"}
 
+# préfixe SIRS → codes valides (validation vectorisée par colonne)
+SIRS_CODE_VALUES: Dict[str, Set[str]] = {
+    "RefSource:": VALID_SOURCE_VALUES,
+    "RefCote:": VALID_COTE_VALUES,
+    "RefPosition:": VALID_POSITION_VALUES,
+    "RefTypeDesordre:": VALID_TYPE_DESORDRE_VALUES,
+    "RefCategorieDesordre:": VALID_CATEGORIE_DESORDRE_VALUES,
+    "RefSuiteApporter:": VALID_SUITE_VALUES,
+    "RefUrgence:": VALID_URGENCE_VALUES,
+    "RefOrientationPhoto:": VALID_ORIENTATION_VALUES,
+}
+
 # ============================================================
 #  VALIDATION GÉNÉRIQUE
 # ============================================================
@@ -106,18 +122,15 @@ def is_nonempty_scalar(v: Any) -> bool:
 
 def validate_int32_positive(
     series: "pd.Series",
+    profile: Optional["ColumnProfile"] = None,
 ) -> Tuple[bool, Optional[str]]:
-    import pandas as pd
-    nonnull = series.dropna()
-    bad: List[Any] = []
-    for v in nonnull:
-        try:
-            f = float(v)
-            i = int(f)
-            if f != i or i < 0:
-                bad.append(v)
-        except Exception:
-            bad.append(v)
+    if profile is None:
+        from .column_profile import ColumnProfile
+        profile = ColumnProfile(series)
+    bad: List[Any] = [
+        v for v, i in zip(profile.nonnull.tolist(), profile.integers)
+        if i is None or i < 0
+    ]
 
     if bad:
         sample = ", ".join(str(x) for x in bad[:3]) + (
@@ -142,16 +155,93 @@ def summarize_bad_values(bad_values: Iterable[Any]) -> str:
     )
 
 
+def _split_by_kind(series: "pd.Series") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Masques (texte, nombre) des valeurs non nulles d'une colonne.
+    Les booléens et les scalaires numpy d'une colonne objet ne sont ni
+    l'un ni l'autre, comme dans la validation valeur par valeur.
+    """
+    import numpy as np
+    import pandas as pd
+
+    na = series.isna().to_numpy()
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return np.zeros(len(series), dtype=bool), np.zeros(len(series), dtype=bool)
+    if pd.api.types.is_numeric_dtype(dtype):
+        return np.zeros(len(series), dtype=bool), ~na
+    if pd.api.types.is_string_dtype(dtype) and dtype != object:
+        return ~na, np.zeros(len(series), dtype=bool)
+
+    kinds = series.map(type)
+    uniq = pd.unique(kinds)
+    str_kinds = [t for t in uniq if issubclass(t, str)]
+    num_kinds = [
+        t for t in uniq if t is not bool and issubclass(t, (int, float))
+    ]
+    is_str = kinds.isin(str_kinds).to_numpy() & ~na
+    is_num = kinds.isin(num_kinds).to_numpy() & ~na
+    return is_str, is_num
+
+
+def sirs_code_invalid_mask(
+    series: "pd.Series",
+    prefix: str,
+    allow_int: bool = True,
+    allow_text: bool = True,
+    strip: bool = False,
+    kinds: Optional[Tuple["np.ndarray", "np.ndarray"]] = None,
+) -> "np.ndarray":
+    """
+    Validation vectorisée d'une colonne de codes SIRS ('RefXxx:N' ou N).
+    Renvoie le masque des valeurs non nulles invalides.
+    - nombres : entiers (ou flottants entiers) présents dans le référentiel
+    - texte   : préfixe exact puis suffixe présent dans le référentiel
+    kinds : masques (texte, nombre) déjà calculés (ColumnProfile.kinds).
+    """
+    import numpy as np
+
+    valid = SIRS_CODE_VALUES[prefix]
+    is_str, is_num = kinds if kinds is not None else _split_by_kind(series)
+    ok = np.zeros(len(series), dtype=bool)
+
+    if allow_int and is_num.any():
+        codes = [int(v) for v in valid]
+        ok[is_num] = series[is_num].isin(codes).to_numpy()
+
+    if allow_text and is_str.any():
+        text = series[is_str].astype(str)
+        if strip:
+            text = text.str.strip()
+        ok[is_str] = (
+            text.str.startswith(prefix) & text.str.slice(len(prefix)).isin(valid)
+        ).to_numpy()
+
+    return ~series.isna().to_numpy() & ~ok
+
+
+def summarize_invalid_codes(series: "pd.Series", mask: "np.ndarray") -> str:
+    # 2.0 est rapporté comme 2, à l'identique de la validation unitaire
+    bad = series[mask]
+    try:
+        bad = bad.unique()
+    except TypeError:
+        # valeurs non hachables (listes…)
+        bad = bad.tolist()
+    return summarize_bad_values(
+        int(v) if isinstance(v, float) and v.is_integer() else v for v in bad
+    )
+
+
 def validate_mixed_sirs_column(
     series: "pd.Series",
     ctype: str,
     validator_fn: Callable[[Any], bool],
     prefix: str,
     label: str,
+    profile: Optional["ColumnProfile"] = None,
 ) -> Tuple[bool, Optional[str]]:
-    import pandas as pd
-    vals = series.dropna()
-
     text_types = ("string", "str", "text")
     int_types = ("int", "integer", "int32")
 
@@ -165,6 +255,16 @@ def validate_mixed_sirs_column(
             "(TEXT ou INTEGER32 requis)",
         )
 
+    if prefix in SIRS_CODE_VALUES:
+        mask = sirs_code_invalid_mask(
+            series, prefix, allow_text=is_text, strip=True,
+            kinds=profile.kinds if profile is not None else None,
+        )
+        if mask.any():
+            return False, summarize_invalid_codes(series, mask)
+        return True, None
+
+    vals = profile.nonnull if profile is not None else series.dropna()
     bad: List[Any] = []
 
     for v in vals:
@@ -205,46 +305,44 @@ def apply_normalization_after_validation(
     gdf: "gpd.GeoDataFrame",
 ) -> "gpd.GeoDataFrame":
     if COL_POSITION_ID in gdf.columns:
-        gdf[COL_POSITION_ID] = gdf[COL_POSITION_ID].apply(normalize_position)
+        gdf[COL_POSITION_ID] = normalize_column(gdf[COL_POSITION_ID], normalize_position)
 
     if COL_COTE_ID in gdf.columns:
-        gdf[COL_COTE_ID] = gdf[COL_COTE_ID].apply(normalize_cote)
+        gdf[COL_COTE_ID] = normalize_column(gdf[COL_COTE_ID], normalize_cote)
 
     if COL_SOURCE_ID in gdf.columns:
-        gdf[COL_SOURCE_ID] = gdf[COL_SOURCE_ID].apply(normalize_source)
+        gdf[COL_SOURCE_ID] = normalize_column(gdf[COL_SOURCE_ID], normalize_source)
 
     if COL_CATEGORIE_DESORDRE_ID in gdf.columns:
-        gdf[COL_CATEGORIE_DESORDRE_ID] = gdf[COL_CATEGORIE_DESORDRE_ID].apply(
-            normalize_categorie_desordre
+        gdf[COL_CATEGORIE_DESORDRE_ID] = normalize_column(
+            gdf[COL_CATEGORIE_DESORDRE_ID], normalize_categorie_desordre
         )
 
     if COL_TYPE_DESORDRE_ID in gdf.columns:
-        gdf[COL_TYPE_DESORDRE_ID] = gdf[COL_TYPE_DESORDRE_ID].apply(
-            normalize_type_desordre
+        gdf[COL_TYPE_DESORDRE_ID] = normalize_column(
+            gdf[COL_TYPE_DESORDRE_ID], normalize_type_desordre
         )
 
     return gdf
 
 
 def is_gpkg_int32(path: str, layer: str, col: str) -> bool:
-    import fiona
-    with fiona.open(path, layer=layer) as src:
-        props = src.schema.get("properties", {})
-        t = props.get(col)
-        return t in ("int", "integer", "int32")
+    t = open_gpkg_layer(path, layer).schema.get(col)
+    return t in ("int", "integer", "int32")
 
 
-def check_no_empty_columns(gdf: "pd.DataFrame") -> None:
-    import pandas as pd
+def check_no_empty_columns(
+    gdf: "pd.DataFrame",
+    profiles: Optional["ColumnProfiles"] = None,
+) -> None:
+    from .column_profile import column_profile
     errors: List[str] = []
     for col in gdf.columns:
         if col == "geometry":
             continue
-        s = gdf[col]
-        empty_mask = s.isna() | s.astype(str).str.strip().isin(
-            ["", "nan", "None"]
-        )
-        if empty_mask.all():
+        profile = column_profile(profiles, gdf, col)
+        empty = profile.na | profile.stripped.isin(["", "nan", "None"]).to_numpy(dtype=bool)
+        if empty.all():
             errors.append(col)
 
     if errors:
@@ -255,6 +353,19 @@ def check_no_empty_columns(gdf: "pd.DataFrame") -> None:
         raise DataValidationError(msg)
 
 
+EMPTY_STRINGS: Set[str] = {
+    "",
+    "NAN",
+    "NAT",
+    "NULL",
+    "NONE",
+    "UNDEFINED",
+    "NA",
+    "INF",
+    "INFINITY",
+}
+
+
 def is_empty(value: Any) -> bool:
     import pandas as pd
     if value is pd.NA:
@@ -267,22 +378,25 @@ def is_empty(value: Any) -> bool:
 
     if isinstance(value, str):
         s = value.strip().upper()
-        empty_strings = {
-            "",
-            "NAN",
-            "NAT",
-            "NULL",
-            "NONE",
-            "UNDEFINED",
-            "NA",
-            "INF",
-            "INFINITY",
-        }
-        if s in empty_strings:
+        if s in EMPTY_STRINGS:
             return True
     return False
 
 
+def empty_mask(series: "pd.Series") -> "np.ndarray":
+    """
+    Équivalent vectorisé de is_empty() sur une colonne entière.
+    Retourne un tableau booléen aligné sur la série.
+    """
+    mask = series.isna()
+    try:
+        text = series.str.strip().str.upper()
+    except AttributeError:
+        # aucune valeur texte dans la colonne
+        return mask.to_numpy(dtype=bool)
+    return (mask | text.isin(EMPTY_STRINGS)).to_numpy(dtype=bool)
+
+
 # ============================================================
 #  FORMATAGE / LOG
 # ============================================================
@@ -706,6 +820,40 @@ def normalize_categorie_desordre(v: Any) -> Optional[str]:
     return None
 
 
+# types de colonnes pour lesquels deux valeurs égales sont interchangeables
+_LOOKUP_KINDS = {"string", "integer", "floating", "empty"}
+
+
+def normalize_values(series: "pd.Series", fn: Callable[[Any], Any]) -> "np.ndarray":
+    """
+    [fn(v) for v in series] sous forme de tableau objet. fn n'est appelé
+    qu'une fois par valeur distincte (table {brut → normalisé}), puis le
+    résultat est rediffusé en un seul take. Les valeurs nulles (None, NaN)
+    sont confondues : fn doit leur donner le même résultat, ce qui est le
+    cas des normalize_*.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.infer_dtype(series, skipna=True) not in _LOOKUP_KINDS:
+        out = np.empty(len(series), dtype=object)
+        out[:] = [fn(v) for v in series.tolist()]
+        return out
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    table = np.empty(len(uniques), dtype=object)
+    table[:] = [fn(v) for v in uniques.astype(object)]
+    return table.take(codes)
+
+
+def normalize_column(series: "pd.Series", fn: Callable[[Any], Any]) -> "pd.Series":
+    """Équivalent de series.apply(fn) via normalize_values()."""
+    import pandas as pd
+    return pd.Series(
+        normalize_values(series, fn), index=series.index, name=series.name
+    )
+
+
 def normalize_for_json(obj: Any) -> Any:
     if isinstance(obj, dict):
         return {k: normalize_for_json(v) for k, v in obj.items()}
@@ -751,17 +899,309 @@ def normalize_date_strict(value: Any) -> Optional[str]:
 #  LECTURE/ECRITURE GPKG
 # ============================================================
 
+# Types OGR → noms de types fiona (utilisés dans gpkg_schema)
+_OGR_FIELD_TYPES = {
+    "OFTString": "str",
+    "OFTInteger": "int32",
+    "OFTInteger64": "int",
+    "OFTReal": "float",
+    "OFTDate": "date",
+    "OFTDateTime": "datetime",
+    "OFTTime": "time",
+    "OFTBinary": "bytes",
+}
+
+_OGR_FIELD_SUBTYPES = {
+    "OFSTBoolean": "bool",
+    "OFSTInt16": "int16",
+    "OFSTFloat32": "float32",
+}
+
+
+def _fiona_field_type(ogr_type: str, ogr_subtype: str) -> str:
+    return _OGR_FIELD_SUBTYPES.get(ogr_subtype) or _OGR_FIELD_TYPES.get(ogr_type, "str")
+
+
+def _fiona_geometry_type(geometry_type: Optional[str]) -> str:
+    if not geometry_type:
+        return "Unknown"
+    if geometry_type.endswith(" Z"):
+        return "3D " + geometry_type[:-2]
+    return geometry_type
+
+
+class GpkgLayer:
+    """
+    Couche GPKG lue en une seule ouverture du fichier : données,
+    schéma des champs (noms de types fiona), type de géométrie et CRS.
+    """
+
+    def __init__(self, path: str, layer: str) -> None:
+        import geopandas as gpd
+        import pandas as pd
+        import pyogrio.raw
+        import shapely
+
+        meta, _, geometry, field_data = pyogrio.raw.read(path, layer=layer)
+        columns = meta["fields"].tolist()
+
+        df = pd.DataFrame(
+            {col: field_data[i] for i, col in enumerate(columns)}, columns=columns
+        )
+        # même résolution que geopandas.read_file pour les dates
+        for dtype, col in zip(meta["dtypes"], columns):
+            if dtype.startswith("datetime"):
+                df[col] = df[col].astype("datetime64[ms]")
+
+        if geometry is not None:
+            df = gpd.GeoDataFrame(
+                df, geometry=shapely.from_wkb(geometry), crs=meta["crs"]
+            )
+
+        self.path = path
+        self.layer = layer
+        self.gdf = df
+        self.schema: Dict[str, str] = {
+            col: _fiona_field_type(t, st)
+            for col, t, st in zip(columns, meta["ogr_types"], meta["ogr_subtypes"])
+        }
+        self.geometry_type = _fiona_geometry_type(meta["geometry_type"])
+        self.crs = meta["crs"]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.gdf.columns)
+
+
+# couche à importer : nom de fichier (relatif au projet), couche, chemin
+GpkgSource = namedtuple("GpkgSource", "file layer path")
+
+
+def gpkg_sources(config: Optional[Dict[str, Any]] = None, project_dir: Optional[str] = None) -> List[GpkgSource]:
+    """
+    Couches à importer : les entrées de GPKG_LAYERS, sinon le couple
+    GPKG_FILE / GPKG_LAYER. Une entrée sans `file` reprend GPKG_FILE.
+    """
+    config = CONFIG if config is None else config
+    project_dir = PROJECT_DIR if project_dir is None else project_dir
+
+    entries = config.get("GPKG_LAYERS") or []
+    if not entries:
+        return [GpkgSource(config.get("GPKG_FILE"), config.get("GPKG_LAYER"), config.get("GPKG_PATH"))]
+
+    sources, errors = [], []
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            errors.append(f'GPKG_LAYERS[{i}] — attendu {{ file = "...", layer = "..." }}')
+            continue
+        unknown = sorted(set(entry) - {"file", "layer"})
+        if unknown:
+            errors.append(f"GPKG_LAYERS[{i}] — clé(s) inconnue(s) : {', '.join(unknown)}")
+        file = entry.get("file") or config.get("GPKG_FILE")
+        layer = entry.get("layer")
+        if not file or not layer:
+            errors.append(f"GPKG_LAYERS[{i}] — 'file' et 'layer' requis")
+            continue
+        sources.append(GpkgSource(file, layer, os.path.join(project_dir, file)))
+
+    # les fichiers produits (log, JSON) sont nommés d'après la couche
+    layers = [s.layer for s in sources]
+    for layer in sorted({l for l in layers if layers.count(l) > 1}):
+        errors.append(f"GPKG_LAYERS — couche '{layer}' présente plusieurs fois")
+
+    if errors:
+        raise ConfigError(["⛔ GPKG_LAYERS invalide :", *errors])
+    return sources
+
+
+_GPKG_LAYERS: Dict[Tuple[str, str], GpkgLayer] = {}
+
+
+def open_gpkg_layer(path: str, layer: str) -> GpkgLayer:
+    """
+    Renvoie la couche `layer` de `path`, lue une seule fois puis partagée
+    par tous les appelants jusqu'à la prochaine réécriture du fichier.
+    """
+    key = (os.path.abspath(path), layer)
+    if key not in _GPKG_LAYERS:
+        try:
+            _GPKG_LAYERS[key] = GpkgLayer(path, layer)
+        except Exception as e:
+            raise GpkgReadError(f"Impossible de lire {os.path.basename(path)} : {e}")
+    return _GPKG_LAYERS[key]
+
+
+def forget_gpkg_layers(path: str) -> None:
+    path = os.path.abspath(path)
+    for key in [k for k in _GPKG_LAYERS if k[0] == path]:
+        del _GPKG_LAYERS[key]
+
+
 def read_gpkg_columns(
     path: str,
     layer: str,
     return_gdf: bool = False,
 ) -> Union[List[str], Tuple[List[str], "gpd.GeoDataFrame"]]:
+    gpkg = open_gpkg_layer(path, layer)
+    cols = gpkg.columns
+    return (cols, gpkg.gdf) if return_gdf else cols
+
+
+def _gpkg_column_values(
+    gdf: "gpd.GeoDataFrame",
+    col: str,
+    ctype: str,
+    str_columns: Set[str],
+) -> "np.ndarray":
+    """
+    Valeurs d'une colonne prêtes pour l'écriture GPKG (NULL → None,
+    dates ISO, colonnes normalisées forcées en string).
+    """
+    import numpy as np
+    import pandas as pd
+
+    out = np.empty(len(gdf), dtype=object)
+    if col not in gdf.columns:
+        return out
+
+    series = gdf[col]
+    na = series.isna().to_numpy()
+
+    if ctype == "date":
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.dt.strftime("%Y-%m-%d")
+        else:
+            values = series.map(
+                lambda v: v.strftime("%Y-%m-%d") if hasattr(v, "strftime") else str(v)
+            )
+    elif col in str_columns:
+        values = series.map(str)
+    else:
+        values = series
+
+    out[:] = values.tolist()
+    out[na] = None
+    return out
+
+
+def _other_layers(path: str, layer: str) -> List[str]:
+    import fiona
+
+    if not os.path.isfile(path):
+        return []
     try:
-        import geopandas as gpd
-        gdf = gpd.read_file(path, layer=layer)
-        cols = list(gdf.columns)
-        return (cols, gdf) if return_gdf else cols
-    except Exception as e:
-        raise GpkgReadError(f"Impossible de lire {GPKG_FILE} : {e}")
+        return [l for l in fiona.listlayers(path) if l != layer]
+    except Exception:
+        return []
+
+
+# noms de types fiona (gpkg_schema) → dtype numpy écrit par pyogrio
+_GPKG_FIELD_DTYPES = {
+    "int": "int64",
+    "int32": "int32",
+    "int16": "int16",
+    "float": "float64",
+    "float32": "float32",
+    "bool": "bool",
+}
+
+
+def _gpkg_field_array(values: "np.ndarray", ctype: str) -> Tuple["np.ndarray", Optional["np.ndarray"]]:
+    """
+    Tableau typé d'une colonne pour pyogrio et masque de ses NULL
+    (None si la colonne n'en a pas ou si les NULL sont portés par NaT).
+    """
+    import numpy as np
+
+    ftype = ctype.split(":")[0]
+    if ftype == "date":
+        return np.array(values, dtype="datetime64[D]"), None
+    if ftype == "datetime":
+        return np.array(values, dtype="datetime64[ms]"), None
+
+    na = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    dtype = _GPKG_FIELD_DTYPES.get(ftype)
+    if dtype is None:
+        # texte : None est écrit NULL
+        out = values.copy()
+        out[~na] = [v if isinstance(v, str) else str(v) for v in values[~na]]
+        return out, None
+
+    filled = values.copy()
+    filled[na] = 0
+    return filled.astype(dtype), (na if na.any() else None)
+
+
+def _ogr_geometry_type(geom_type: str) -> str:
+    # inverse de _fiona_geometry_type
+    if geom_type.startswith("3D "):
+        return geom_type[3:] + " Z"
+    return geom_type
+
+
+def write_gpkg_layer(
+    gdf: "gpd.GeoDataFrame",
+    path: str,
+    layer: str,
+    schema: Dict[str, str],
+    geom_type: str,
+    crs: Any,
+    str_columns: Iterable[str] = (),
+) -> None:
+    """
+    Réécrit entièrement la couche `layer` de `path`, les autres couches
+    du fichier sont conservées.
+    Chaque colonne est convertie en un tableau numpy typé selon `schema`,
+    puis la couche est écrite en un seul appel pyogrio (sans objet Python
+    par entité) dans un fichier temporaire du même dossier, qui remplace
+    ensuite l'original de façon atomique.
+    """
+    import pyogrio.raw
+    import shapely
+
+    str_columns = set(str_columns)
+    names = [col for col in schema if col != "geometry"]
+    field_data, field_mask = [], []
+    for col in names:
+        values, mask = _gpkg_field_array(
+            _gpkg_column_values(gdf, col, schema[col], str_columns), schema[col]
+        )
+        field_data.append(values)
+        field_mask.append(mask)
+    geometry = shapely.to_wkb(gdf.geometry.to_numpy(dtype=object))
 
+    directory, filename = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}.tmp.gpkg")
 
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # le fichier temporaire part d'une copie s'il contient d'autres couches
+        if _other_layers(path, layer):
+            shutil.copy2(path, tmp_path)
+        pyogrio.raw.write(
+            tmp_path,
+            geometry=geometry,
+            field_data=field_data,
+            fields=names,
+            field_mask=field_mask,
+            layer=layer,
+            driver="GPKG",
+            geometry_type=_ogr_geometry_type(geom_type),
+            crs=crs,
+        )
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise GpkgWriteError(
+            [f"⛔ Erreur lors de l’écriture des données dans le GPKG '{path}' :", str(e)]
+        )
+
+    forget_gpkg_layers(path)
+    try:
+        os.replace(tmp_path, path)
+    except Exception as e:
+        os.remove(tmp_path)
+        raise GpkgWriteError(
+            [f"⛔ Impossible de remplacer le GPKG '{path}' :", str(e)]
+        )
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
-import json
+from collections import namedtuple
+from types import MappingProxyType
 from .config_loader import CONFIG, PROJECT_DIR
 GPKG_LAYER                 = CONFIG["GPKG_LAYER"]
 COL_AUTHOR                 = CONFIG["COL_AUTHOR"]
@@ -24,11 +25,18 @@ PHO_FALLBACK_DES_GEOM       = CONFIG["PHO_FALLBACK_DES_GEOM"]
 OBS_FALLBACK_URGENCE        = CONFIG["OBS_FALLBACK_URGENCE"]
 OBS_FALLBACK_SUITE          = CONFIG["OBS_FALLBACK_SUITE"]
 OBS_FALLBACK_NB_DESORDRES   = CONFIG["OBS_FALLBACK_NB_DESORDRES"]
+JSON_STREAM                 = CONFIG["JSON_STREAM"]
+JSON_FORMAT                 = CONFIG["JSON_FORMAT"]
+
+from .exceptions import JsonExportError
+from .documents import Desordre, Observation, Photo
+from .serializer import get_serializer
 
 from .helpers import (
-    is_empty,
+    empty_mask,
+    EMPTY_STRINGS,
     is_valid_uuid,
-    normalize_for_json,
+    normalize_values,
     normalize_date_strict,
     normalize_cote,
     normalize_position,
@@ -57,12 +65,103 @@ def _safe_str(v):
         return None
     return str(v).strip()
 
-def _extract_author_from_row(row, gdf_columns):
-    if COL_AUTHOR in gdf_columns and not is_empty(row[COL_AUTHOR]):
-        return _safe_str(row[COL_AUTHOR])
-    else:
-        sval = (COL_AUTHOR or "").strip()
-        return sval if is_valid_uuid(sval) else None
+
+# ======================================================================
+#  PLAN D'EXTRACTION
+# ======================================================================
+# Les motifs de detect_observation_patterns / detect_photo_patterns sont
+# compilés une fois par couche en un plan immuable : position de chaque
+# colonne obsN_* / obsN_phoM_* retenue, source de l'auteur et fallbacks
+# actifs déjà normalisés (None = fallback inactif). Le builder colonnaire
+# lit ce plan au lieu de reconstruire les noms de colonnes, et
+# DocumentStream le réutilise à chaque parcours.
+
+# fields : ((suffixe, position), ...) des colonnes présentes
+PhotoSlot = namedtuple("PhotoSlot", "key fields")
+ObservationSlot = namedtuple("ObservationSlot", "key date fields photos")
+AuthorSource = namedtuple("AuthorSource", "position static")
+Fallbacks = namedtuple(
+    "Fallbacks",
+    "observateurId urgenceId suiteApporterId nombreDesordres photographeId "
+    "photo_date photo_geom",
+)
+ExtractionPlan = namedtuple(
+    "ExtractionPlan", "positions author geometry observations fallbacks"
+)
+
+
+def _compile_fallbacks():
+    return Fallbacks(
+        observateurId=_safe_str(OBS_FALLBACK_OBSERVATEUR_ID) or None,
+        urgenceId=normalize_urgence(OBS_FALLBACK_URGENCE) or None,
+        suiteApporterId=normalize_suite_apporter(OBS_FALLBACK_SUITE) or None,
+        nombreDesordres=(
+            int(OBS_FALLBACK_NB_DESORDRES)
+            if OBS_FALLBACK_NB_DESORDRES not in (None, "")
+            else None
+        ),
+        photographeId=_safe_str(PHO_FALLBACK_PHOTOGRAPH_ID) or None,
+        photo_date=bool(PHO_FALLBACK_OBS_DATE),
+        photo_geom=bool(PHO_FALLBACK_DES_GEOM),
+    )
+
+
+def _slot_fields(positions, prefix, suffixes, allowed):
+    return tuple(
+        (s, positions[f"{prefix}_{s}"])
+        for s in suffixes
+        if s in allowed and f"{prefix}_{s}" in positions
+    )
+
+
+def compile_extraction_plan(columns, patterns):
+    """
+    Plan d'extraction des observations et photos pour les colonnes
+    columns (ordre de la couche) et les motifs patterns.
+    """
+    positions = {}
+    for i, col in enumerate(columns):
+        positions.setdefault(col, i)
+
+    patterns = patterns or {}
+    photos_patterns = patterns.get("photos", {})
+    observations = []
+
+    for obs_key, suffixes in patterns.get("observations", {}).items():
+        date_pos = positions.get(f"{obs_key}_date")
+        if date_pos is None:
+            continue
+
+        photos = tuple(
+            PhotoSlot(
+                photo_key,
+                _slot_fields(positions, f"{obs_key}_{photo_key}", photo_suffixes, PHOTO_SUFFIXES),
+            )
+            for (obs_ref, photo_key), photo_suffixes in photos_patterns.items()
+            if obs_ref == obs_key
+        )
+        # date déjà lue ; suffixes non autorisés refusés par diag_obs
+        observations.append(ObservationSlot(
+            obs_key,
+            date_pos,
+            _slot_fields(positions, obs_key, suffixes, Observation.SUFFIXES),
+            photos,
+        ))
+
+    sval = (COL_AUTHOR or "").strip()
+    author = AuthorSource(
+        positions.get(COL_AUTHOR),
+        sval if is_valid_uuid(sval) else None,
+    )
+
+    return ExtractionPlan(
+        positions=MappingProxyType(positions),
+        author=author,
+        geometry=positions.get("geometry"),
+        observations=tuple(observations),
+        fallbacks=_compile_fallbacks(),
+    )
+
 
 def _positions_from_geometry(geom):
     if geom is None or geom.is_empty:
@@ -96,350 +195,354 @@ def _positions_from_geometry(geom):
     return None, None
 
 
-def _extract_photos_from_row(row, obs_key, photos_patterns, obs_date_value, pos_deb_parent, pos_fin_parent):
-    photos = []
-
-    for (obs_ref, photo_key), suffixes in photos_patterns.items():
-        if obs_ref != obs_key:
-            continue
-
-        photo_data = {
-            "@class": "fr.sirs.core.model.Photo",
-            "valid": IS_VALID,
-        }
-
-        # ---- AUTHOR INSERTION ----
-        author_val = _extract_author_from_row(row, row.index)
-        if author_val:
-            photo_data["author"] = author_val
-        # ---------------------------
-
-        raw_chemin = None
-        raw_photo_date = None
-        raw_photographe = None
-        raw_designation = None
-        raw_libelle = None
-        raw_orientation = None
-        raw_cote = None
-
-        for s in suffixes:
-            if s not in PHOTO_SUFFIXES:
-                continue
-
-            field = f"{obs_key}_{photo_key}_{s}"
-            if field not in row.index:
-                continue
-
-            val = row[field]
-            if is_empty(val):
-                continue
-
-            if s == "chemin":
-                raw_chemin = val
-            elif s == "photographeId":
-                raw_photographe = val
-            elif s == "date":
-                raw_photo_date = val
-            elif s == "designation":
-                raw_designation = val
-            elif s == "libelle":
-                raw_libelle = val
-            elif s == "orientationPhoto":
-                raw_orientation = val
-            elif s == "coteId":
-                raw_cote = val
-
-        if is_empty(raw_chemin):
-            continue
-
-        photo_data["chemin"] = f"{DIGUE_NAME}/{_safe_str(raw_chemin)}"
-
-        # photographeId
-        if not is_empty(raw_photographe):
-            photo_data["photographeId"] = _safe_str(raw_photographe)
-        else:
-            fb = _safe_str(PHO_FALLBACK_PHOTOGRAPH_ID)
-            if fb:
-                photo_data["photographeId"] = fb
-
-        # date
-        if not is_empty(raw_photo_date):
-            photo_data["date"] = normalize_date_strict(raw_photo_date)
-        else:
-            if PHO_FALLBACK_OBS_DATE and not is_empty(obs_date_value):
-                photo_data["date"] = normalize_date_strict(obs_date_value)
-
-        if not is_empty(raw_designation):
-            photo_data["designation"] = _safe_str(raw_designation)
-
-        if not is_empty(raw_libelle):
-            photo_data["libelle"] = _safe_str(raw_libelle)
-
-        # orientationPhoto
-        if not is_empty(raw_orientation):
-            norm_orient = normalize_orientation_photo(raw_orientation)
-            if norm_orient:
-                photo_data["orientationPhoto"] = norm_orient
-
-        # coteId
-        if not is_empty(raw_cote):
-            norm_cote = normalize_cote(raw_cote)
-            if norm_cote:
-                photo_data["coteId"] = norm_cote
-
-        # fallback position depuis le désordre
-        if PHO_FALLBACK_DES_GEOM:
-            if pos_deb_parent:
-                photo_data["positionDebut"] = pos_deb_parent
-            if pos_fin_parent:
-                photo_data["positionFin"] = pos_fin_parent
-
-        photos.append(photo_data)
-
-    return photos
-
-
-def _extract_observations_from_row(row, patterns, pos_deb_parent, pos_fin_parent):
-    observations = []
-
-    obs_patterns = patterns.get("observations", {})
-    photos_patterns = patterns.get("photos", {})
+# ======================================================================
+#  CONSTRUCTION COLONNAIRE
+# ======================================================================
+# Chaque colonne configurée est résolue une seule fois en liste de valeurs
+# déjà normalisées (None = valeur absente), puis les documents
+# Desordre / Observation / Photo sont assemblés ligne par ligne à partir
+# de ces listes.
+
+def _resolve_values(series, fn, default=None, lookup=False):
+    """
+    fn(valeur) pour chaque cellule non vide, default pour les cellules vides.
+    lookup=True : fn n'est évalué qu'une fois par valeur distincte
+    (colonnes de codes à faible cardinalité).
+    """
+    empty = empty_mask(series)
+    if lookup:
+        values = normalize_values(series, fn).tolist()
+        return [default if e else v for v, e in zip(values, empty)]
+    return [
+        default if e else fn(v)
+        for v, e in zip(series.tolist(), empty)
+    ]
+
+
+def _resolve_column(gdf, col, fn, default=None, lookup=False):
+    return _resolve_values(gdf[col], fn, default=default, lookup=lookup)
+
+
+def _resolve_position(gdf, pos, fn, default=None, lookup=False):
+    return _resolve_values(gdf.iloc[:, pos], fn, default=default, lookup=lookup)
+
+
+def _column_or_static(gdf, cols, col, fn, static, lookup=False):
+    if col in cols:
+        return _resolve_column(gdf, col, fn, default=static, lookup=lookup)
+    return [static] * len(gdf)
+
+
+def _to_nb_desordres(val):
+    try:
+        f = float(val)
+        n = int(f)
+        if f == n:
+            return n
+    except Exception:
+        pass
+    return None
+
+
+def _truthy_or_none(fn):
+    def wrapped(v):
+        return fn(v) or None
+    return wrapped
+
+
+def _observation_value_fn(suffix):
+    if suffix == "nombreDesordres":
+        return _to_nb_desordres
+    if suffix == "urgenceId":
+        return _truthy_or_none(normalize_urgence)
+    if suffix == "suiteApporterId":
+        return _truthy_or_none(normalize_suite_apporter)
+    return _safe_str
+
+
+# suffixes dont les valeurs sont des codes SIRS (normalisation par table)
+_LOOKUP_SUFFIXES = {"urgenceId", "suiteApporterId", "orientationPhoto", "coteId"}
+
+_PHOTO_VALUE_FNS = {
+    "chemin": lambda v: f"{DIGUE_NAME}/{_safe_str(v)}",
+    "photographeId": _safe_str,
+    "date": normalize_date_strict,
+    "designation": _safe_str,
+    "libelle": _safe_str,
+    "orientationPhoto": _truthy_or_none(normalize_orientation_photo),
+    "coteId": _truthy_or_none(normalize_cote),
+}
 
-    for obs_key, suffixes in obs_patterns.items():
 
-        date_field = f"{obs_key}_date"
-        if date_field not in row.index:
-            continue
+def _slot_columns(gdf, fields, value_fn):
+    return [
+        (s, _resolve_position(gdf, pos, value_fn(s), lookup=s in _LOOKUP_SUFFIXES))
+        for s, pos in fields
+    ]
 
-        date_val = row[date_field]
-        if is_empty(date_val):
-            continue
 
-        obs_data = {
-            "@class": "fr.sirs.core.model.Observation",
-            "valid": IS_VALID,
-            "date": normalize_date_strict(date_val),
+def _observation_columns(gdf, plan):
+    return [
+        {
+            "date": _resolve_position(gdf, slot.date, normalize_date_strict),
+            "fields": _slot_columns(gdf, slot.fields, _observation_value_fn),
+            "photos": [
+                dict(_slot_columns(gdf, photo.fields, _PHOTO_VALUE_FNS.__getitem__))
+                for photo in slot.photos
+            ],
         }
+        for slot in plan.observations
+    ]
 
-        # ---- AUTHOR INSERTION ----
-        author_val = _extract_author_from_row(row, row.index)
-        if author_val:
-            obs_data["author"] = author_val
-        # ---------------------------
 
-        for s in suffixes:
-            if s == "date":
-                continue
-
-            field = f"{obs_key}_{s}"
-            if field not in row.index:
-                continue
-
-            val = row[field]
-            if is_empty(val):
-                continue
+def _build_photo(i, values, author_val, obs_date, pos_deb, pos_fin, fallbacks):
+    chemin = values["chemin"][i] if "chemin" in values else None
+    if chemin is None:
+        return None
 
-            # nombreDesordres → entier natif
-            if s == "nombreDesordres":
-                try:
-                    f = float(val)
-                    n = int(f)
-                    if f == n:
-                        obs_data[s] = n
-                        continue
-                except Exception:
-                    pass
-                continue
+    photo_data = {"chemin": chemin}
+    if author_val:
+        photo_data["author"] = author_val
+
+    photographe = values["photographeId"][i] if "photographeId" in values else None
+    if photographe is not None:
+        photo_data["photographeId"] = photographe
+    elif fallbacks.photographeId:
+        photo_data["photographeId"] = fallbacks.photographeId
+
+    date = values["date"][i] if "date" in values else None
+    if date is not None:
+        photo_data["date"] = date
+    elif fallbacks.photo_date:
+        photo_data["date"] = obs_date
+
+    for s in ("designation", "libelle", "orientationPhoto", "coteId"):
+        v = values[s][i] if s in values else None
+        if v is not None:
+            photo_data[s] = v
+
+    if fallbacks.photo_geom:
+        if pos_deb:
+            photo_data["positionDebut"] = pos_deb
+        if pos_fin:
+            photo_data["positionFin"] = pos_fin
+
+    return Photo(IS_VALID, **photo_data)
+
+
+def _iter_desordres_columnar(gdf, patterns, plan=None):
+    """
+    Génère les désordres à partir des colonnes pré-résolues.
+    plan : plan d'extraction déjà compilé pour gdf et patterns.
+    """
+    if plan is None:
+        plan = compile_extraction_plan(gdf.columns, patterns)
+    cols = set(gdf.columns)
+    n = len(gdf)
+
+    designations = _column_or_static(gdf, cols, COL_DESIGNATION, _safe_str, None)
+    libelles = _column_or_static(gdf, cols, COL_LIBELLE, _safe_str, None)
+    commentaires = _column_or_static(gdf, cols, COL_COMMENTAIRE, _safe_str, None)
+    lieux_dits = _column_or_static(gdf, cols, COL_LIEUDIT, _safe_str, None)
+
+    author_pos, author_static = plan.author
+    if author_pos is not None:
+        authors = _resolve_position(gdf, author_pos, _safe_str, default=author_static)
+    else:
+        authors = [author_static] * n
 
-            # urgenceId → RefUrgence:X
-            if s == "urgenceId":
-                norm = normalize_urgence(val)
-                if norm:
-                    obs_data[s] = norm
-                continue
+    dates_debut = _column_or_static(
+        gdf, cols, COL_DATE_DEBUT, normalize_date_strict,
+        normalize_date_strict(_safe_str(COL_DATE_DEBUT)),
+    )
+    dates_fin = _column_or_static(gdf, cols, COL_DATE_FIN, normalize_date_strict, None)
 
-            # suiteApporterId → RefSuiteApporter:X
-            if s == "suiteApporterId":
-                norm = normalize_suite_apporter(val)
-                if norm:
-                    obs_data[s] = norm
+    if COL_LINEAR_ID in cols:
+        linear_ids = [_safe_str(v) for v in gdf[COL_LINEAR_ID].tolist()]
+    else:
+        linear_ids = [_safe_str(COL_LINEAR_ID)] * n
+
+    refs = [
+        ("coteId", COL_COTE_ID, normalize_cote),
+        ("positionId", COL_POSITION_ID, normalize_position),
+        ("sourceId", COL_SOURCE_ID, normalize_source),
+        ("typeDesordreId", COL_TYPE_DESORDRE_ID, normalize_type_desordre),
+        ("categorieDesordreId", COL_CATEGORIE_DESORDRE_ID, normalize_categorie_desordre),
+    ]
+    ref_values = [
+        (key, _column_or_static(gdf, cols, col, fn, fn(col), lookup=True))
+        for key, col, fn in refs
+    ]
+
+    geoms = gdf.iloc[:, plan.geometry].tolist() if plan.geometry is not None else [None] * n
+    observations = _observation_columns(gdf, plan)
+
+    fallbacks = plan.fallbacks
+    fb_observateur = fallbacks.observateurId
+    fb_urgence = fallbacks.urgenceId
+    fb_suite = fallbacks.suiteApporterId
+    fb_nb = fallbacks.nombreDesordres
+
+    for i in range(n):
+        pos_deb, pos_fin = _positions_from_geometry(geoms[i])
+        author_val = authors[i]
+
+        obs_list = []
+        for obs in observations:
+            obs_date = obs["date"][i]
+            if obs_date is None:
                 continue
 
-            # autres champs (observateurId, designation, evolution, etc.)
-            obs_data[s] = _safe_str(val)
-
-        # fallback observateur
-        if "observateurId" not in obs_data or is_empty(obs_data.get("observateurId")):
-            fb = _safe_str(OBS_FALLBACK_OBSERVATEUR_ID)
-            if fb:
-                obs_data["observateurId"] = fb
-
-        # fallback urgence (normalisé)
-        if "urgenceId" not in obs_data or is_empty(obs_data.get("urgenceId")):
-            norm = normalize_urgence(OBS_FALLBACK_URGENCE)
-            if norm:
-                obs_data["urgenceId"] = norm
-
-        # fallback suite (normalisé)
-        if "suiteApporterId" not in obs_data or is_empty(obs_data.get("suiteApporterId")):
-            norm = normalize_suite_apporter(OBS_FALLBACK_SUITE)
-            if norm:
-                obs_data["suiteApporterId"] = norm
-
-        # fallback nombreDesordres
-        if "nombreDesordres" not in obs_data or is_empty(obs_data.get("nombreDesordres")):
-            if OBS_FALLBACK_NB_DESORDRES not in (None, ""):
-                obs_data["nombreDesordres"] = int(OBS_FALLBACK_NB_DESORDRES)
-
-        photos = _extract_photos_from_row(
-            row,
-            obs_key,
-            photos_patterns,
-            date_val,
-            pos_deb_parent,
-            pos_fin_parent,
+            obs_data = {"date": obs_date}
+            if author_val:
+                obs_data["author"] = author_val
+
+            for s, values in obs["fields"]:
+                v = values[i]
+                if v is not None:
+                    obs_data[s] = v
+
+            # _safe_str peut produire "inf", "nan"… considérés vides par is_empty
+            obs_observ = obs_data.get("observateurId")
+            if (obs_observ is None or obs_observ.upper() in EMPTY_STRINGS) and fb_observateur:
+                obs_data["observateurId"] = fb_observateur
+            if "urgenceId" not in obs_data and fb_urgence:
+                obs_data["urgenceId"] = fb_urgence
+            if "suiteApporterId" not in obs_data and fb_suite:
+                obs_data["suiteApporterId"] = fb_suite
+            if "nombreDesordres" not in obs_data and fb_nb is not None:
+                obs_data["nombreDesordres"] = fb_nb
+
+            photos = []
+            for values in obs["photos"]:
+                photo = _build_photo(
+                    i, values, author_val, obs_date, pos_deb, pos_fin, fallbacks
+                )
+                if photo is not None:
+                    photos.append(photo)
+            if photos:
+                obs_data["photos"] = photos
+
+            obs_list.append(Observation(IS_VALID, **obs_data))
+
+        yield Desordre(
+            IS_VALID,
+            designation=designations[i],
+            libelle=libelles[i],
+            commentaire=commentaires[i],
+            linearId=linear_ids[i],
+            author=author_val,
+            lieuDit=lieux_dits[i],
+            positionDebut=pos_deb,
+            positionFin=pos_fin,
+            date_debut=dates_debut[i],
+            date_fin=dates_fin[i],
+            observations=obs_list or None,
+            **{key: values[i] for key, values in ref_values},
         )
 
-        if photos:
-            obs_data["photos"] = photos
-
-        observations.append(obs_data)
-
-    return observations
-
-
 
-def _build_desordre_from_row(row, gdf_columns, patterns):
-
-    designation_val = _safe_str(row[COL_DESIGNATION]) if COL_DESIGNATION in gdf_columns and not is_empty(row[COL_DESIGNATION]) else None
-    libelle_val = _safe_str(row[COL_LIBELLE]) if COL_LIBELLE in gdf_columns and not is_empty(row[COL_LIBELLE]) else None
-    commentaire_val = _safe_str(row[COL_COMMENTAIRE]) if COL_COMMENTAIRE in gdf_columns and not is_empty(row[COL_COMMENTAIRE]) else None
-
-    # author
-    author_val = _extract_author_from_row(row, gdf_columns)
-
-    # dates
-    if COL_DATE_DEBUT in gdf_columns and not is_empty(row[COL_DATE_DEBUT]):
-        date_debut_val = normalize_date_strict(row[COL_DATE_DEBUT])
-    else:
-        date_debut_val = normalize_date_strict(_safe_str(COL_DATE_DEBUT))
-
-    if COL_DATE_FIN in gdf_columns and not is_empty(row[COL_DATE_FIN]):
-        date_fin_val = normalize_date_strict(row[COL_DATE_FIN])
-    else:
-        date_fin_val = None
-
-    # géométrie → positions
-    geom = getattr(row, "geometry", None)
-    pos_deb, pos_fin = _positions_from_geometry(geom)
-
-    # linearId (UUID brut)
-    if COL_LINEAR_ID in gdf_columns:
-        linear_id_val = _safe_str(row[COL_LINEAR_ID])
-    else:
-        linear_id_val = _safe_str(COL_LINEAR_ID)
-
-    # sourceId (normalisation, gère int / float / 'RefSource:X')
-    if COL_SOURCE_ID in gdf_columns and not is_empty(row[COL_SOURCE_ID]):
-        source_id_val = normalize_source(row[COL_SOURCE_ID])
-    else:
-        source_id_val = normalize_source(COL_SOURCE_ID)
+# ======================================================================
+#  ÉCRITURE JSON EN FLUX
+# ======================================================================
+
+JSON_FORMATS = ("indent", "compact", "ndjson")
+
+
+class DocumentStream:
+    """
+    Itérable ré-exécutable sur les documents d'une couche : les documents
+    sont régénérés à chaque parcours au lieu d'être gardés en mémoire.
+    """
+
+    def __init__(self, gdf, patterns, count, plan=None):
+        self.gdf = gdf
+        self.patterns = patterns
+        self.count = count
+        if plan is None:
+            plan = compile_extraction_plan(gdf.columns, patterns)
+        self.plan = plan
+
+    def __iter__(self):
+        return _iter_desordres_columnar(self.gdf, self.patterns, self.plan)
+
+    def __len__(self):
+        return self.count
+
+
+def _write_documents(f, documents, json_format, serializer=None):
+    """
+    Écrit les documents un à un dans f.
+    En mode "indent", la sortie est identique à json.dump(liste, indent=2).
+    Retourne le nombre de documents écrits.
+    """
+    if serializer is None:
+        serializer = get_serializer()
+    dumps = serializer.dumps
+    count = 0
+
+    if json_format == "ndjson":
+        for doc in documents:
+            f.write(dumps(doc))
+            f.write("\n")
+            count += 1
+        return count
+
+    indent = json_format == "indent"
+    for doc in documents:
+        text = dumps(doc, indent)
+        if indent:
+            # les chaînes JSON ne contiennent jamais de saut de ligne brut
+            text = "  " + text.replace("\n", "\n  ")
+        if count == 0:
+            f.write("[\n" if indent else "[")
+        else:
+            f.write(",\n" if indent else ",")
+        f.write(text)
+        count += 1
 
-    # typeDesordreId
-    if COL_TYPE_DESORDRE_ID in gdf_columns and not is_empty(row[COL_TYPE_DESORDRE_ID]):
-        type_desordre_val = normalize_type_desordre(row[COL_TYPE_DESORDRE_ID])
+    if count == 0:
+        f.write("[]")
     else:
-        type_desordre_val = normalize_type_desordre(COL_TYPE_DESORDRE_ID)
+        f.write("\n]" if indent else "]")
+    return count
 
-    # categorieDesordreId
-    if COL_CATEGORIE_DESORDRE_ID in gdf_columns and not is_empty(row[COL_CATEGORIE_DESORDRE_ID]):
-        categorie_desordre_val = normalize_categorie_desordre(row[COL_CATEGORIE_DESORDRE_ID])
-    else:
-        categorie_desordre_val = normalize_categorie_desordre(COL_CATEGORIE_DESORDRE_ID)
 
-    # coteId
-    if COL_COTE_ID in gdf_columns and not is_empty(row[COL_COTE_ID]):
-        cote_id_val = normalize_cote(row[COL_COTE_ID])
-    else:
-        cote_id_val = normalize_cote(COL_COTE_ID)
-
-    # positionId
-    if COL_POSITION_ID in gdf_columns and not is_empty(row[COL_POSITION_ID]):
-        position_id_val = normalize_position(row[COL_POSITION_ID])
-    else:
-        position_id_val = normalize_position(COL_POSITION_ID)
+def _keep_into(documents, sink):
+    for doc in documents:
+        sink.append(doc)
+        yield doc
 
-    # lieuDit
-    lieu_dit_val = _safe_str(row[COL_LIEUDIT]) if COL_LIEUDIT in gdf_columns and not is_empty(row[COL_LIEUDIT]) else None
 
-    # observations
-    observations_val = None
-    if patterns:
-        obs_list = _extract_observations_from_row(row, patterns, pos_deb, pos_fin)
-        if obs_list:
-            observations_val = obs_list
+def generate_json(gdf, patterns, output=None, stream=None, json_format=None, layer=None):
+    if stream is None:
+        stream = JSON_STREAM
+    if json_format is None:
+        json_format = JSON_FORMAT
 
-    des = {
-        "@class": "fr.sirs.core.model.Desordre",
-        "valid": IS_VALID,
-    }
+    if json_format not in JSON_FORMATS:
+        raise JsonExportError(
+            f"⛔ JSON_FORMAT '{json_format}' inconnu (attendu : {', '.join(JSON_FORMATS)})"
+        )
 
-    if designation_val:
-        des["designation"] = designation_val
-    if libelle_val:
-        des["libelle"] = libelle_val
-    if commentaire_val:
-        des["commentaire"] = commentaire_val
-    if linear_id_val:
-        des["linearId"] = linear_id_val
-    if author_val:
-        des["author"] = author_val
-    if lieu_dit_val:
-        des["lieuDit"] = lieu_dit_val
-    if cote_id_val:
-        des["coteId"] = cote_id_val
-    if position_id_val:
-        des["positionId"] = position_id_val
-    if source_id_val:
-        des["sourceId"] = source_id_val
-    if type_desordre_val:
-        des["typeDesordreId"] = type_desordre_val
-    if categorie_desordre_val:
-        des["categorieDesordreId"] = categorie_desordre_val
-    if pos_deb:
-        des["positionDebut"] = pos_deb
-    if pos_fin:
-        des["positionFin"] = pos_fin
-    if date_debut_val:
-        des["date_debut"] = date_debut_val
-    if date_fin_val:
-        des["date_fin"] = date_fin_val
-    if observations_val:
-        des["observations"] = observations_val
-
-    return des
-
-
-def generate_json(gdf, patterns, output=None):
     if output is None:
-        output = f"{GPKG_LAYER}.json"
+        ext = "ndjson" if json_format == "ndjson" else "json"
+        output = f"{layer or GPKG_LAYER}.{ext}"
 
     output_path = os.path.join(PROJECT_DIR, output)
-    results = []
-    cols = list(gdf.columns)
+    serializer = get_serializer()
 
-    for i, (idx, row) in enumerate(gdf.iterrows(), start=1):
-        des = _build_desordre_from_row(row, cols, patterns)
-        results.append(des)
-
-    data = normalize_for_json(results)
+    plan = compile_extraction_plan(gdf.columns, patterns)
+    documents = _iter_desordres_columnar(gdf, patterns, plan)
+    kept = []
+    if not stream:
+        documents = _keep_into(documents, kept)
 
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        written = _write_documents(f, documents, json_format, serializer)
 
     return {
         "output": output_path,
-        "written": len(results),
-        "documents": data,
+        "written": written,
+        "documents": DocumentStream(gdf, patterns, written, plan) if stream else kept,
     }
-
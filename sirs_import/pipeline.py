@@ -0,0 +1,611 @@
+# -*- coding: utf-8 -*-
+import os
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from .diag_des import diagnose_mapping
+from .diag_obs import validate_observation_structure
+from .diag_pho import detect_photo_patterns, validate_photo_structure
+from .json_builder import generate_json
+from .column_profile import ColumnProfiles
+from .relocate import process_photo_migration
+from .check_dates import temporal_constraints
+from .profiling import StageProfiler
+from .runlog import RunLog
+from .prompts import ask
+
+from .exceptions import (
+    CouchDBError, GpkgReadError,
+    DataNotFoundError, ExtractProcessError, GpkgWriteError,
+    DataValidationError, PhotoMigrationError, GpkgUpdateError,
+    UserCancelled, JsonExportError
+)
+
+from .couchdb import (
+    couchdb_database_exists, get_reference_data,
+    couchdb_upload_bulk, print_upload_report,
+    assign_document_ids, upload_journal_path, UploadJournal,
+    validate_troncons_key, choose_join_key,
+    resolve_linear_id, TronconIndex
+)
+
+from .helpers import (
+    open_gpkg_layer, write_gpkg_layer, gpkg_sources, red, yellow, bold,
+    print_mapping_verbose, is_valid_uuid, print_error_block,
+    print_unused_columns,
+    check_no_empty_columns, validate_fallbacks,
+    apply_normalization_after_validation
+)
+
+from .config_loader import CONFIG, PROJECT_DIR
+COUCH_DB                    = CONFIG["COUCH_DB"]
+UPLOAD_IDEMPOTENT           = CONFIG["UPLOAD_IDEMPOTENT"]
+LOG_JSONL                   = CONFIG["LOG_JSONL"]
+COL_TRONCONS                = CONFIG["COL_TRONCONS"]
+COL_LINEAR_ID               = CONFIG["COL_LINEAR_ID"]
+COL_POSITION_ID             = CONFIG["COL_POSITION_ID"]
+COL_COTE_ID                 = CONFIG["COL_COTE_ID"]
+COL_SOURCE_ID               = CONFIG["COL_SOURCE_ID"]
+COL_CATEGORIE_DESORDRE_ID   = CONFIG["COL_CATEGORIE_DESORDRE_ID"]
+COL_TYPE_DESORDRE_ID        = CONFIG["COL_TYPE_DESORDRE_ID"]
+
+def process_extract_only(gdf, troncons, gpkg_file):
+    # 1) Valider COL_TRONCONS
+    ok, mode = validate_troncons_key(COL_TRONCONS, gdf)
+    if not ok:
+        raise ExtractProcessError(mode)
+    TRONCONS_MODE = mode
+
+    # 2) Préparer les valeurs de jointure
+    col_existe_deja = COL_LINEAR_ID in gdf.columns
+
+    try:
+        if TRONCONS_MODE == "column":
+            distinct_values = (
+                gdf[COL_TRONCONS].astype(str).str.strip().unique().tolist()
+            )
+        else:
+            distinct_values = [COL_TRONCONS.strip()]
+    except Exception as e:
+        raise ExtractProcessError(f"⛔ Erreur lecture COL_TRONCONS : {e}")
+
+    index = TronconIndex(troncons)
+    join_key = choose_join_key(distinct_values, index)
+
+    # 3) Effectuer la jointure
+    try:
+        if TRONCONS_MODE == "column":
+            gdf[COL_LINEAR_ID] = index.resolve_series(gdf[COL_TRONCONS], join_key)
+        else:
+            static_value = COL_TRONCONS.strip()
+            gdf[COL_LINEAR_ID] = resolve_linear_id(
+                static_value, index, join_key
+            )
+    except Exception as e:
+        raise ExtractProcessError(f"⛔ Erreur durant la résolution des linearId : {e}")
+
+    # 4) Rapport des tronçons introuvables
+    if index.missing:
+        missing_list = sorted(index.missing)
+        msg = ["⛔ Certaines valeurs de COL_TRONCONS n'ont pas pu être rattachées :", *missing_list]
+        raise ExtractProcessError(msg)
+
+    # 5) Confirmer l’écrasement éventuel
+    if col_existe_deja:
+        print()
+        print(f"⚠️ La colonne '{COL_LINEAR_ID}' existe déjà dans le GPKG!  Souhaitez-vous l'écraser?")
+        print("(1) écraser")
+        print("(2) annuler")
+        try:
+            resp = ask("overwrite_linear_id")
+        except EOFError:
+            raise UserCancelled(bold(f"❌ Mise à jour de {gpkg_file} annulée."))
+        if resp not in ("1","o","oui","y","yes"):
+            raise UserCancelled(bold(f"❌ Mise à jour de {gpkg_file} annulée."))
+
+    # 6) Vérifier les linearId générés
+    vals = gdf[COL_LINEAR_ID].dropna().astype(str)
+
+    invalid = [v for v in vals if not is_valid_uuid(v)]
+    if invalid:
+        raise ExtractProcessError(
+            f"⛔ linearId invalides détectés (format UUID) : {invalid[:10]}"
+        )
+
+    lengths = {len(v) for v in vals}
+    if not lengths.issubset({32, 36}):
+        raise ExtractProcessError(
+            f"⛔ Longueur invalide dans linearId : {sorted(lengths)}"
+        )
+
+    uuid_valids = {t["linearId"] for t in troncons}
+    unknown = [v for v in vals if v not in uuid_valids]
+    if unknown:
+        raise ExtractProcessError(
+            f"⛔ Certains linearId ne correspondent pas à CouchDB : {unknown[:10]}"
+        )
+
+    print()
+    print(f"⚙️ Ajout des linearId à {gpkg_file}")
+    return gdf
+
+
+def rewrite_gpkg(gdf, gpkg_schema, orig_geom_type, orig_crs, source):
+    # Colonnes qui doivent être stockées en string
+    REF_COLUMNS = {
+        COL_POSITION_ID,
+        COL_COTE_ID,
+        COL_SOURCE_ID,
+        COL_CATEGORIE_DESORDRE_ID,
+        COL_TYPE_DESORDRE_ID
+    }
+
+    # Adapter le schema GPKG pour correspondre aux valeurs normalisées
+    for col in list(gpkg_schema.keys()):
+        if col in REF_COLUMNS:
+            gpkg_schema[col] = "str"
+
+    # Écriture dans un fichier temporaire puis remplacement atomique :
+    # l'ancien GPKG reste intact si l'écriture échoue
+    write_gpkg_layer(
+        gdf,
+        source.path,
+        source.layer,
+        gpkg_schema,
+        orig_geom_type,
+        orig_crs,
+        str_columns=REF_COLUMNS,
+    )
+
+    print()
+    print(bold(f"✅ Le fichier {source.file} a été mis à jour."))
+    return 0
+
+
+# ------------------------------------------------------------
+#  EXÉCUTION
+# ------------------------------------------------------------
+def run(args):
+    EXTRACT_ONLY = args.extract
+    DO_UPLOAD = args.upload
+    sources = gpkg_sources()
+    # log et rapports nommés d'après la première couche
+    RUN_NAME = sources[0].layer
+
+    # tout sera loggé dans un fichier (écrit par un thread dédié,
+    # vidé à chaque fin d'étape et en fin de programme)
+    LOGFILE = os.path.join(PROJECT_DIR, f"{RUN_NAME}.log")
+    jsonl = f"{LOGFILE}.jsonl" if LOG_JSONL else None
+    runlog = RunLog(LOGFILE, jsonl).install()
+
+    # profil des étapes, rapport JSON à côté du log
+    profile_prefix = os.path.join(PROJECT_DIR, RUN_NAME)
+    profiler = StageProfiler(
+        enabled=args.profile,
+        cprofile_prefix=profile_prefix if args.cprofile else None,
+        log=runlog,
+    )
+    try:
+        return run_pipeline(EXTRACT_ONLY, DO_UPLOAD, profiler, sources)
+    finally:
+        if profiler.enabled:
+            profiler.print_summary()
+            report = profiler.write_json(f"{profile_prefix}.profile.json")
+            print(f"   rapport : {report}")
+            print()
+
+
+def read_gpkg_sources(sources):
+    # plusieurs couches : lectures en parallèle
+    if len(sources) == 1:
+        return [open_gpkg_layer(sources[0].path, sources[0].layer)]
+    workers = min(len(sources), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda s: open_gpkg_layer(s.path, s.layer), sources))
+
+
+def _layer_stage(profiler, source, multi):
+    # étapes suffixées par la couche quand il y en a plusieurs
+    def stage(name, rows=None):
+        return profiler.stage(f"{name}:{source.layer}" if multi else name, rows=rows)
+    return stage
+
+
+def extract_layer(source, gpkg, troncons, stage):
+    # ajout des linearId à une couche (--extract)
+    gdf = gpkg.gdf
+    gpkg_schema = dict(gpkg.schema)
+    orig_geom_type = gpkg.geometry_type
+    orig_crs = gpkg.crs
+
+    try:
+        with stage("extraction", rows=len(gdf)):
+            gdf = process_extract_only(gdf, troncons, source.file)
+    except ExtractProcessError:
+        raise
+
+    # mise à jour explicite du schéma pour COL_LINEAR_ID si nécessaire
+    if COL_LINEAR_ID not in gpkg_schema:
+        gpkg_schema[COL_LINEAR_ID] = "str"
+
+    try:
+        with stage("ecriture_gpkg", rows=len(gdf)):
+            rewrite_gpkg(gdf, gpkg_schema, orig_geom_type, orig_crs, source)
+        print()
+    except GpkgWriteError:
+        raise
+
+
+def process_layer(source, gpkg, contact_ids, user_ids, stage):
+    """
+    Validation, normalisation, migration photos et export JSON d'une
+    couche. Renvoie les statistiques de generate_json, ou 3 si des
+    erreurs bloquantes ont été affichées.
+    """
+    cols, gdf = gpkg.columns, gpkg.gdf
+    gpkg_schema = dict(gpkg.schema)
+    orig_geom_type = gpkg.geometry_type
+    orig_crs = gpkg.crs
+    # vues des colonnes partagées par les validateurs (couche non modifiée
+    # jusqu'à apply_normalization_after_validation)
+    profiles = ColumnProfiles(gdf)
+
+    print()
+    print(f"⚙️ Vérifications préliminaires de {source.file}...")	
+	
+    with stage("verifications", rows=len(gdf)):
+        # les colonnes vides ne sont pas autorisées
+        try:
+            check_no_empty_columns(gdf, profiles)
+        except DataValidationError:
+            raise
+
+        # validation fallbacks avec contacts ET utilisateurs
+        validate_fallbacks(contact_ids, user_ids)
+
+    # démarrage du processus principal
+    total_rows = len(gdf)
+    total_cols = len(cols)
+
+    print()
+    print(f"📁 Le fichier comporte {total_cols} colonnes et {total_rows} lignes")
+
+    print()
+    print("📁 Colonnes disponibles :")
+    print([c for c in cols if c != "geometry"])
+
+    # diagnostic désordres
+    with stage("diagnose_mapping", rows=total_rows):
+        rows, errors, warnings = diagnose_mapping(cols, gdf, gpkg_schema, user_ids, profiles)
+    used_des_cols = diagnose_mapping.USED_COLUMNS
+    print()
+    print(bold("🔎 Analyse des champs désordres éditables:"))
+    print()
+    print_mapping_verbose(rows, errors, warnings)
+    if errors:
+        msg = ["⛔ Blocages détectés au niveau désordres → import impossible :", *errors]
+        raise DataValidationError(msg)
+
+    print()
+    print(bold("ℹ️ Rappels:"))
+    print('   "@class": "fr.sirs.core.model.Desordre" est ajouté automatiquement.')
+    print("   Les champs _id, _rev, dateMaj, lastUpdateAuthor sont calculés à l'import.")
+    print("   Idem pour les bornes géographiques et geometry.")
+    print("   Les champs prDebut et prFin sont également recalculés à l'import.")
+
+
+    if warnings:
+        print()
+        print(bold(yellow("⚠️ Warnings:")))
+        for w in warnings:
+            print(yellow(f"   {w}"))
+
+    print()
+    print("✅ La structure des données de désordres est correcte!")
+
+    print()
+    print(bold("🔎 Analyse des observations :"))
+
+    # diagnostic observations
+    with stage("observations", rows=total_rows):
+        obs_data = validate_observation_structure(
+            cols, gdf, gpkg_schema, contact_ids, profiles
+        )
+
+    obs_errors = obs_data["errors"]
+    used_obs_columns = obs_data["used_columns"]
+    invalid_obs_columns = obs_data["invalid_obs_columns"]
+    fallback_observateur = obs_data["fallback_observateur"]
+    fallback_urgence = obs_data["fallback_urgence"]
+    fallback_suite = obs_data["fallback_suite"]
+    fallback_nb_desordres = obs_data["fallback_nb_desordres"]
+    observations = obs_data["patterns"]["observations"]
+
+    # diagnostic photos
+    photo_patterns = detect_photo_patterns(cols)
+    observation_dates = {
+        obs: gdf[f"{obs}_date"]
+        for obs in observations
+        if f"{obs}_date" in gdf.columns
+    }
+
+    with stage("photos", rows=total_rows):
+        photo_data = validate_photo_structure(
+            photo_patterns, cols, gdf, observation_dates, gpkg_schema, contact_ids, profiles
+        )
+
+    used_photo_columns = photo_data["used_columns"]
+    invalid_photo_columns = photo_data["invalid_photo_columns"]
+    photo_errors = photo_data["errors"]
+
+    fallback_photograph = photo_data["fallback_photograph"]
+    fallback_photo_date = photo_data["fallback_photo_date"]
+    fallback_photo_geom = photo_data["fallback_photo_geom"]
+
+    # affichage obs + photos
+    print()
+    if not observations:
+        print(yellow("⚠️ Aucune observation détectée !"))
+    else:
+        print(f"Nombre d’observations correctes : {len(observations)}")
+        for obs, suffixes in observations.items():
+            print(bold(f"• {obs}"))
+            print("    - champs :", ", ".join(suffixes))
+
+            if fallback_observateur.get(obs, False):
+                print("            + observateurId par défaut utilisé")
+            if fallback_urgence.get(obs, False):
+                print("            + urgenceId par défaut utilisé")
+            if fallback_suite.get(obs, False):
+                print("            + suiteApporterId par défaut utilisé")
+            if fallback_nb_desordres.get(obs, False):
+                print("            + nombreDesordres par défaut utilisé")
+
+            linked_photos = {
+                pho: suf
+                for (o, pho), suf in photo_patterns.items()
+                if o == obs
+            }
+            if linked_photos:
+                print("    - photos :")
+                for pho, suf in linked_photos.items():
+                    print(f"        • {pho} :", ", ".join(suf))
+
+                    if fallback_photograph.get((obs, pho), False):
+                        print("            + photographeId par défaut utilisé")
+
+                    if fallback_photo_date.get((obs, pho), False):
+                        print("            + date de l’observation réutilisée")
+
+                    if fallback_photo_geom.get((obs, pho), False):
+                        print("            + coordonnées du désordre parent appliquées")
+            else:
+                print("    - photos : (aucune)")
+
+
+    # erreurs obs + photos
+    printed = False
+    if obs_errors:
+        print()
+        print_error_block(
+            "⛔ erreurs au niveau observation → import impossible :",
+            obs_errors,
+            red
+        )
+        printed = True
+    if photo_errors:
+        print()		
+        print_error_block(
+            "⛔ erreurs au niveau photo → import impossible :",
+            photo_errors,
+            red
+        )
+        printed = True
+    if printed:
+        print()
+        return 3
+
+    # colonnes non reconnues
+    invalid_all = invalid_obs_columns + invalid_photo_columns
+    if invalid_all:
+        print()
+        print(
+            bold(
+                yellow(
+                    "⚠️ colonnes suspectes (suffixe non reconnu) :"
+                )
+            )
+        )
+        print(yellow("   " + ", ".join(invalid_all)))
+
+    # colonnes non utilisées
+    used_obs_pho = used_obs_columns | used_photo_columns
+    print()
+    print_unused_columns(
+        cols, used_des_cols, used_obs_pho, invalid_all
+    )
+
+    # mise à jour des références
+    print()
+    print("⚙️ Normalisation des valeurs référentielles (type RefXXX:n)")
+    with stage("normalisation", rows=total_rows):
+        gdf = apply_normalization_after_validation(gdf)
+
+    REF_COLUMNS = {
+        COL_POSITION_ID,
+        COL_COTE_ID,
+        COL_SOURCE_ID,
+        COL_CATEGORIE_DESORDRE_ID,
+        COL_TYPE_DESORDRE_ID
+    }
+
+    for col in list(gpkg_schema.keys()):
+        if col in REF_COLUMNS:
+            gpkg_schema[col] = "str"
+
+
+    # validation photos et migration
+    print()
+    print("⚙️ Vérification des chemins et de l'arborescence photos")
+    try:
+        # le temps réel inclut les réponses de l'utilisateur
+        with stage("migration_photos", rows=total_rows):
+            gdf = process_photo_migration(gdf)
+    except (PhotoMigrationError, GpkgUpdateError) as e:
+        raise
+
+    # mise à jour du GPKG
+    try:
+        with stage("ecriture_gpkg", rows=total_rows):
+            rewrite_gpkg(gdf, gpkg_schema, orig_geom_type, orig_crs, source)
+    except GpkgWriteError:
+        raise
+
+    # temporalité photos
+    with stage("dates", rows=total_rows):
+        date_errors = temporal_constraints(
+            gdf,
+            observations,
+            observation_dates,
+            photo_patterns,
+            gpkg_schema,
+        )
+    if date_errors:
+        print_error_block(
+            "⛔ erreurs temporelles → import impossible :",
+            date_errors,
+            red,
+        )
+        print()
+        return 3
+
+    # export json
+    patterns = {"observations": observations, "photos": photo_patterns}
+    try:
+        with stage("json", rows=total_rows) as st:
+            json_stats = generate_json(gdf, patterns, layer=source.layer)
+            st["docs"] = json_stats["written"]
+    except JsonExportError:
+        raise
+    except Exception as e:
+        msg = ["⛔ Erreur durant la génération du JSON :", str(e)]
+        raise JsonExportError(msg)
+    print()
+    json_name = os.path.basename(json_stats["output"])
+    print(bold(f"✅ Un fichier {json_name} contenant {json_stats['written']} désordres a été généré."))
+    print()
+    return json_stats
+
+
+def upload_documents(results):
+    """
+    Flux des documents de toutes les couches validées, dans l'ordre des
+    couches. En import idempotent, les _id sont attribués sur ce flux
+    unique : deux couches contenant des désordres de même clé
+    n'obtiennent pas le même _id.
+    """
+    documents = chain.from_iterable(stats["documents"] for stats in results)
+    if UPLOAD_IDEMPOTENT:
+        documents = assign_document_ids(documents)
+    return documents
+
+
+def run_pipeline(EXTRACT_ONLY, DO_UPLOAD, profiler, sources):
+
+    # connexion couchdb
+    print()
+    print(f"⚙️ Tentative de connection à la base '{COUCH_DB}'")
+    try:
+        with profiler.stage("couchdb"):
+            couchdb_database_exists()
+        print()
+        print(f"✅ '{COUCH_DB}' est connectée.")
+    except CouchDBError:
+        raise
+
+    # extraction tronçons + utilisateurs + contacts, en parallèle
+    with profiler.stage("referentiels") as st:
+        try:
+            troncons, users, contacts = get_reference_data(write_txt=EXTRACT_ONLY)
+        except DataNotFoundError:
+            raise
+        st["docs"] = len(troncons) + len(users) + len(contacts)
+    if EXTRACT_ONLY:
+        print()
+        print(f"✅ Les tronçons et leur linearId sont disponibles dans {COUCH_DB}_linearId.txt")
+        print()
+        print(f"✅ Les utilisateurs de la base (auteurs) et leur _id sont disponibles dans {COUCH_DB}_userId.txt")		
+        print()
+        print(f"✅ Les contacts (observateurs, photographes) et leur _id sont disponibles dans {COUCH_DB}_contactId.txt")
+		
+    contact_ids = {str(c["contactId"]) for c in contacts}
+    user_ids    = {str(u["userId"])   for u in users}
+
+    # lecture des couches GPKG
+    multi = len(sources) > 1
+    print()
+    for source in sources:
+        suffix = f" (couche {source.layer})" if multi else ""
+        print(f"⚙️ Lecture du fichier {source.file}{suffix}")
+    try:
+        with profiler.stage("lecture_gpkg") as st:
+            layers = read_gpkg_sources(sources)
+            st["rows"] = sum(len(gpkg.gdf) for gpkg in layers)
+    except GpkgReadError:
+        raise
+
+    # extraction des linearId et observateurId
+    if EXTRACT_ONLY:
+        for source, gpkg in zip(sources, layers):
+            extract_layer(source, gpkg, troncons, _layer_stage(profiler, source, multi))
+        return
+
+    # validation des couches l'une après l'autre : les diagnostics
+    # s'affichent et peuvent poser des questions
+    results = []
+    blocked = False
+    for source, gpkg in zip(sources, layers):
+        if multi:
+            print()
+            print(bold(f"📁 Couche {source.layer} ({source.file})"))
+        stats = process_layer(
+            source, gpkg, contact_ids, user_ids, _layer_stage(profiler, source, multi)
+        )
+        if stats == 3:
+            blocked = True
+        else:
+            results.append(stats)
+    if blocked:
+        return 3
+
+    # upload couchdb
+    if not DO_UPLOAD:
+        return 0
+
+    # un seul import pour toutes les couches : lots _bulk_docs communs
+    written = sum(stats["written"] for stats in results)
+    print()
+    print(f"⚙️ Import de {written} documents dans la base '{COUCH_DB}'")
+    documents = upload_documents(results)
+    journal = None
+    if UPLOAD_IDEMPOTENT:
+        journal = UploadJournal(upload_journal_path(results[0]["output"]))
+        if journal.committed:
+            print(f"   reprise : {len(journal.committed)} documents déjà importés d'après {os.path.basename(journal.path)}")
+    try:
+        with profiler.stage("import_couchdb") as st:
+            ok, import_errors, upload_report = couchdb_upload_bulk(documents, journal=journal)
+            st["docs"] = upload_report["ok"]
+    except CouchDBError as e:
+        raise
+    print_upload_report(upload_report)
+    print()
+
+    if ok:
+        print(bold(f"✅ {written} documents importés dans la base {COUCH_DB}."))
+        print()
+        return 0
+
+    # ici : échec partiel ou total du _bulk_docs
+    raise CouchDBError(
+        ["⛔ Erreurs lors de l'import couchdb (_bulk_docs) :", *import_errors[:10]]
+    )
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+from .helpers import bold
+
+
+# pic de mémoire résidente depuis le démarrage du processus (Mo), None si
+# indisponible : ne redescend jamais, ne mesure donc pas une étape seule
+def process_peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # octets sous macOS, kilo-octets ailleurs
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+# mémoire résidente actuelle du processus (Mo), None hors Linux
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class _RssSampler:
+    """
+    Relève la mémoire résidente actuelle toutes les `interval` secondes
+    dans un thread, pour le pic atteint pendant une étape.
+    """
+
+    def __init__(self, interval=0.01):
+        import threading
+        self.interval = interval
+        self.start = current_rss_mb()
+        self.peak = self.start
+        self._stop = threading.Event()
+        self._thread = None
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class StageProfiler:
+    """
+    Mesure chaque étape du pipeline : temps réel, temps CPU, pic de
+    mémoire résidente pendant l'étape et hausse par rapport à son début,
+    débit (lignes ou documents par seconde).
+    Désactivé, stage() ne mesure rien.
+    Avec cprofile_prefix, chaque étape est aussi profilée par cProfile
+    dans <cprofile_prefix>.<nn>_<étape>.prof.
+    """
+
+    def __init__(self, enabled=False, cprofile_prefix=None, log=None):
+        self.enabled = enabled or bool(cprofile_prefix)
+        self.cprofile_prefix = cprofile_prefix
+        # journal d'exécution (RunLog) vidé à chaque fin d'étape
+        self.log = log
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        # info["rows"] / info["docs"] peuvent être renseignés dans le bloc
+        info = {"rows": rows}
+        if self.log is not None:
+            self.log.begin_stage(name)
+        try:
+            if not self.enabled:
+                yield info
+            else:
+                with self._measure(name, info):
+                    yield info
+        finally:
+            if self.log is not None:
+                self.log.end_stage()
+
+    @contextmanager
+    def _measure(self, name, info):
+        profile = None
+        if self.cprofile_prefix:
+            import cProfile
+            profile = cProfile.Profile()
+
+        rss = _RssSampler()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        status = "ok"
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        except BaseException:
+            status = "erreur"
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            rss.stop()
+
+            count = info.get("docs") if info.get("docs") is not None else info.get("rows")
+            record = {
+                "stage": name,
+                "status": status,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                # pic pendant l'étape et hausse depuis son début (None hors Linux)
+                "stage_peak_rss_mb": None if rss.peak is None else round(rss.peak, 1),
+                "stage_rss_increase_mb": None if rss.peak is None else round(rss.peak - rss.start, 1),
+                "process_peak_rss_mb": process_peak_rss_mb(),
+                "rows": info.get("rows"),
+                "docs": info.get("docs"),
+                "per_s": round(count / wall, 1) if count and wall > 0 else None,
+            }
+            if profile is not None:
+                path = f"{self.cprofile_prefix}.{len(self.stages) + 1:02d}_{name}.prof"
+                profile.dump_stats(path)
+                record["cprofile"] = path
+            self.stages.append(record)
+
+    def print_summary(self):
+        if not self.stages:
+            return
+        print()
+        print(bold("⏱️ Profil d'exécution :"))
+        width = max([20] + [len(s["stage"]) for s in self.stages])
+        print(f"   {'étape':<{width}} {'réel (s)':>9} {'CPU (s)':>9} {'RSS max (Mo)':>13} {'hausse (Mo)':>12} {'volume':>9} {'débit (/s)':>11}")
+        for s in self.stages:
+            rss = "-" if s["stage_peak_rss_mb"] is None else f"{s['stage_peak_rss_mb']:.0f}"
+            grew = "-" if s["stage_rss_increase_mb"] is None else f"+{s['stage_rss_increase_mb']:.0f}"
+            count = s["docs"] if s["docs"] is not None else s["rows"]
+            count = "-" if count is None else str(count)
+            rate = "-" if s["per_s"] is None else f"{s['per_s']:.0f}"
+            flag = "" if s["status"] == "ok" else f"  ({s['status']})"
+            print(
+                f"   {s['stage']:<{width}} {s['wall_s']:>9.2f} {s['cpu_s']:>9.2f} "
+                f"{rss:>13} {grew:>12} {count:>9} {rate:>11}{flag}"
+            )
+        total = sum(s["wall_s"] for s in self.stages)
+        print(f"   {'total':<{width}} {total:>9.2f}")
+
+    def write_json(self, path):
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "pid": os.getpid(),
+            "stages": self.stages,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import os
+from .exceptions import PolicyError
+
+# Questions posées en cours de traitement, identifiées par une clé de
+# politique (--policy) : une réponse présente dans la politique est
+# utilisée telle quelle, sinon la question est posée à l'utilisateur.
+PROMPTS = {
+    "overwrite_linear_id": "écraser la colonne linearId existante (--extract)",
+    "simplify_linestrings": "simplifier les LineString complexes (début/fin)",
+    "photo_duplicates_continue": "continuer malgré les photos utilisées plusieurs fois",
+    "photo_migrate": "classer les photos par tronçon",
+    "photo_migration_confirm": "confirmer la migration sans renommage",
+    "photo_collision_strategy": "renommage en cas de collision : 1 à 4",
+    "photo_uuid_strategy": "renommage UUID : 1 (collisions) ou 2 (tous)",
+}
+
+# choix numérotés acceptés pour les questions à plus de deux réponses
+CHOICES = {
+    "photo_collision_strategy": ("1", "2", "3", "4"),
+    "photo_uuid_strategy": ("1", "2"),
+}
+
+
+def _answer(key, value):
+    # true → (1) oui / continuer, false → (2) non / annuler
+    if isinstance(value, bool):
+        return "1" if value else "2"
+    answer = str(value).strip().lower()
+    choices = CHOICES.get(key)
+    if choices and answer not in choices:
+        raise PolicyError(
+            f"⛔ Politique : '{key}' doit valoir {', '.join(choices)} (reçu : {value!r})"
+        )
+    return answer
+
+
+def load_policy(path):
+    """
+    Lit un fichier TOML de réponses (clé = réponse) :
+
+        overwrite_linear_id = true
+        photo_collision_strategy = 3
+
+    Les clés inconnues sont refusées pour éviter qu'une faute de frappe
+    ne se traduise par une question sans réponse en mode non interactif.
+    """
+    try:
+        import tomllib
+    except ImportError:
+        import tomli as tomllib
+
+    if not os.path.isfile(path):
+        raise PolicyError(f"⛔ Fichier de politique introuvable : {path}")
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise PolicyError([f"⛔ Fichier de politique invalide : {path}", str(e)])
+
+    unknown = sorted(set(data) - set(PROMPTS))
+    if unknown:
+        raise PolicyError([
+            f"⛔ Clés inconnues dans {path} :",
+            *unknown,
+            "Clés acceptées :",
+            *(f"{k} — {label}" for k, label in PROMPTS.items()),
+        ])
+    return {key: _answer(key, value) for key, value in data.items()}
+
+
+# politique de réponses active (None = questions posées à l'utilisateur)
+_POLICY = None
+
+
+def set_policy(answers):
+    """Active la politique `answers` ; None revient au mode interactif."""
+    global _POLICY
+    _POLICY = answers
+
+
+def non_interactive():
+    return _POLICY is not None
+
+
+def ask(key, prompt="Votre choix: "):
+    """
+    Réponse (minuscules, sans espaces) à la question `key`. Avec une
+    politique active, une question sans réponse lève EOFError comme une
+    entrée standard fermée : l'appelant annule alors le traitement.
+    """
+    policy = _POLICY
+    if policy is not None:
+        if key not in policy:
+            print(f"{prompt}(aucune réponse pour '{key}' dans la politique)")
+            raise EOFError(key)
+        print(f"{prompt}{policy[key]}")
+        return policy[key]
+    return input(prompt).strip().lower()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import hashlib
+import threading
+from .helpers import yellow
+from .exceptions import CouchDBError
+from .couchdb import couchdb_find, _couch_session, _timeout
+from .config_loader import CONFIG
+COUCH_DB           = CONFIG["COUCH_DB"]
+COUCH_URL          = CONFIG["COUCH_URL"]
+COUCH_PAGE_SIZE    = CONFIG["COUCH_PAGE_SIZE"]
+COUCH_FIND_TIMEOUT = CONFIG["COUCH_FIND_TIMEOUT"]
+REF_CACHE_DIR      = CONFIG["REF_CACHE_DIR"]
+
+CACHE_VERSION = 1
+
+# classes de référence mises en cache et champs conservés
+REF_CLASSES = {
+    "fr.sirs.core.model.TronconDigue": ["_id", "designation", "libelle"],
+    "fr.sirs.core.model.Utilisateur": ["_id", "login", "role"],
+    "fr.sirs.core.model.Contact": ["_id", "nom", "prenom"],
+}
+
+# ======================================================================
+# FICHIER DE CACHE
+# ======================================================================
+
+def cache_path():
+    directory = REF_CACHE_DIR or os.path.join(
+        os.path.expanduser("~"), ".cache", "sirs_import"
+    )
+    key = hashlib.sha1(f"{COUCH_URL}|{COUCH_DB}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"{key}.json")
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        cache.get("version") != CACHE_VERSION
+        or cache.get("url") != COUCH_URL
+        or cache.get("db") != COUCH_DB
+        or set(cache.get("classes", {})) != set(REF_CLASSES)
+    ):
+        return None
+    return cache
+
+
+def _save_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(yellow(f"⚠️ Cache des référentiels non enregistré : {e}"))
+
+
+# ======================================================================
+# SYNCHRONISATION COUCHDB
+# ======================================================================
+
+def _project(doc, cls):
+    return {k: doc[k] for k in REF_CLASSES[cls] if k in doc}
+
+
+def _update_seq(session):
+    url = f"{COUCH_URL}/{COUCH_DB}"
+    try:
+        r = session.get(url, timeout=_timeout(COUCH_FIND_TIMEOUT))
+    except Exception as e:
+        raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
+    if r.status_code != 200:
+        raise CouchDBError(f"Erreur HTTP {r.status_code} lors de l'accès à '{COUCH_DB}'")
+    return r.json().get("update_seq")
+
+
+def _full_fetch(session):
+    # seq lue AVANT la lecture : les modifications concurrentes seront
+    # rejouées (sans effet de bord) à la prochaine synchronisation
+    seq = _update_seq(session)
+    classes = {}
+    for cls, fields in REF_CLASSES.items():
+        docs = couchdb_find({"@class": cls}, fields=fields)
+        classes[cls] = {d["_id"]: _project(d, cls) for d in docs}
+    return {
+        "version": CACHE_VERSION,
+        "url": COUCH_URL,
+        "db": COUCH_DB,
+        "update_seq": seq,
+        "classes": classes,
+    }
+
+
+def _apply_changes(session, cache):
+    """
+    Applique le flux _changes depuis cache["update_seq"], filtré sur les
+    classes de référence et les suppressions.
+    Renvoie le nombre de modifications, ou None si le flux est inutilisable.
+    """
+    url = f"{COUCH_URL}/{COUCH_DB}/_changes"
+    selector = {
+        "$or": [
+            {"@class": {"$in": list(REF_CLASSES)}},
+            {"_deleted": True},
+        ]
+    }
+    classes = cache["classes"]
+    applied = 0
+
+    while True:
+        params = {
+            "filter": "_selector",
+            "include_docs": "true",
+            "since": cache["update_seq"],
+            "limit": COUCH_PAGE_SIZE,
+        }
+        try:
+            r = session.post(
+                url, params=params, json={"selector": selector},
+                timeout=_timeout(COUCH_FIND_TIMEOUT),
+            )
+        except Exception as e:
+            raise CouchDBError(f"Impossible de joindre CouchDB ({COUCH_URL}) : {e}")
+
+        # seq inconnue ou filtre _selector non supporté → relecture complète
+        if r.status_code in (400, 404, 405, 501):
+            return None
+        if r.status_code != 200:
+            raise CouchDBError(
+                f"Erreur HTTP {r.status_code} lors de la lecture de _changes sur '{COUCH_DB}'"
+            )
+
+        body = r.json()
+        results = body.get("results", [])
+        for change in results:
+            doc_id = change.get("id")
+            doc = change.get("doc") or {}
+            for docs in classes.values():
+                docs.pop(doc_id, None)
+            cls = doc.get("@class")
+            if not change.get("deleted") and cls in classes:
+                classes[cls][doc_id] = _project(doc, cls)
+            applied += 1
+
+        cache["update_seq"] = body.get("last_seq", cache["update_seq"])
+        if len(results) < COUCH_PAGE_SIZE:
+            return applied
+
+
+# contenu du cache une fois synchronisé pendant cette exécution
+_DATA = None
+_SYNC_LOCK = threading.Lock()
+
+
+def sync_reference_cache():
+    """
+    Met à jour le cache local des référentiels (une fois par exécution)
+    et renvoie son contenu. Les référentiels étant lus en parallèle, le
+    premier appel synchronise pendant que les autres attendent.
+    """
+    global _DATA
+    with _SYNC_LOCK:
+        if _DATA is not None:
+            return _DATA
+
+        path = cache_path()
+        cache = _load_cache(path)
+        session = _couch_session()
+        if cache is None or _apply_changes(session, cache) is None:
+            cache = _full_fetch(session)
+
+        _save_cache(path, cache)
+        _DATA = cache
+        return cache
+
+
+def reset_state():
+    """Oublie le cache synchronisé (tests, exécutions successives)."""
+    global _DATA
+    with _SYNC_LOCK:
+        _DATA = None
+
+
+def cached_reference_docs(cls):
+    docs = sync_reference_cache()["classes"][cls]
+    # même ordre que _find (index @class, puis _id)
+    return [docs[k] for k in sorted(docs)]
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import json
 import uuid
+import hashlib
 import shutil
 from datetime import datetime
 from .helpers import bold, yellow, is_empty
 from .exceptions import UserCancelled, PhotoMigrationError, GpkgUpdateError
+from .prompts import ask
 from .config_loader import CONFIG, PROJECT_DIR
 COL_TRONCONS  = CONFIG["COL_TRONCONS"]
 COL_DESIGNATION = CONFIG["COL_DESIGNATION"]
 COL_LIBELLE     = CONFIG["COL_LIBELLE"]
 PHO_FALLBACK_OBS_DATE = CONFIG.get("PHO_FALLBACK_OBS_DATE", False)
+PHOTO_SCAN_WORKERS    = CONFIG.get("PHOTO_SCAN_WORKERS", 8)
+PHOTO_RELOCATION_WORKERS = CONFIG.get("PHOTO_RELOCATION_WORKERS", 4)
+PHOTO_DUPLICATE_MODE  = CONFIG.get("PHOTO_DUPLICATE_MODE", "copy")
+PHOTO_CONTENT_DUPLICATES = CONFIG.get("PHOTO_CONTENT_DUPLICATES", False)
+PHOTO_HASH_CACHE      = CONFIG.get("PHOTO_HASH_CACHE", "")
 
 DIGUE_NAME = os.path.basename(PROJECT_DIR)
 
@@ -53,6 +61,71 @@ def _file_exists(path: str) -> bool:
     except Exception:
         return False
 
+
+# applique fn à chaque élément, dans un pool de threads si workers > 1
+def _pmap(fn, items, workers):
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [fn(x) for x in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+# ======================================================================
+# INDEX DES DOSSIERS PHOTO
+# ======================================================================
+
+# liste les noms présents dans un dossier (None si illisible)
+def _scan_dir(directory):
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name for entry in it}
+    except FileNotFoundError:
+        return set()
+    except OSError:
+        return None
+
+
+class PhotoIndex:
+    """
+    Contenu des dossiers photo, lu par un os.scandir par dossier
+    (en parallèle) au lieu d'un stat par photo.
+    Un fichier absent de l'index est confirmé par os.path.exists
+    (casse, dossier illisible), les fichiers présents ne coûtent rien.
+    """
+
+    def __init__(self, paths=(), workers=None):
+        self.workers = PHOTO_SCAN_WORKERS if workers is None else workers
+        self._dirs = {}
+        self.scan(os.path.dirname(os.path.normpath(p)) for p in paths)
+
+    def scan(self, directories):
+        todo = sorted({d for d in directories if d not in self._dirs})
+        self._dirs.update(zip(todo, _pmap(_scan_dir, todo, self.workers)))
+
+    # True/False d'après l'index, None si le dossier n'est pas indexé
+    def lookup(self, path):
+        directory, name = os.path.split(os.path.normpath(path))
+        names = self._dirs.get(directory)
+        if names is None:
+            return None
+        return name in names
+
+    def exists(self, path):
+        return bool(self.lookup(path)) or _file_exists(path)
+
+    def add(self, path):
+        directory, name = os.path.split(os.path.normpath(path))
+        if self._dirs.get(directory) is not None:
+            self._dirs[directory].add(name)
+
+    def discard(self, path):
+        directory, name = os.path.split(os.path.normpath(path))
+        if self._dirs.get(directory) is not None:
+            self._dirs[directory].discard(name)
+
+
 def _get_effective_photo_date(row, col, pd):
 
     # 1) Date photo : <prefixe1>_<prefixe2>_date
@@ -111,25 +184,26 @@ def _iter_photo_entries(gdf):
 
 # analyse la conformité des chemins photos dans le GDF
 def _diagnose_paths(gdf):
-    missing = []
+    entries = []
     all_conform = True
 
     for _, row, troncon, col, raw in _iter_photo_entries(gdf):
         # Conformité folder
         if not raw.startswith(f"{troncon}/"):
             all_conform = False
+        entries.append(_resolve_absolute_path(raw))
 
-        abs_path = _resolve_absolute_path(raw)
-        if not _file_exists(abs_path):
-            missing.append(abs_path)
+    # index réutilisé par la relocalisation
+    index = PhotoIndex(entries)
+    missing = [p for p in entries if not index.exists(p)]
 
     if missing:
-        return {"status": "missing", "missing": missing}
+        return {"status": "missing", "missing": missing, "index": index}
 
     if all_conform:
-        return {"status": "conform", "missing": []}
+        return {"status": "conform", "missing": [], "index": index}
 
-    return {"status": "needs_migration", "missing": []}
+    return {"status": "needs_migration", "missing": [], "index": index}
 
 
 
@@ -188,6 +262,111 @@ def _classify_duplications(refmap):
     return cat1, cat2, cat3, cat4
 
 
+# ======================================================================
+# DUPLICATIONS — CONTENU IDENTIQUE
+# ======================================================================
+
+HASH_CACHE_VERSION = 1
+
+
+def hash_cache_path():
+    return PHOTO_HASH_CACHE or os.path.join(PROJECT_DIR, ".sirs_import_photo_hashes.json")
+
+
+def _load_hash_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != HASH_CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def _save_hash_cache(path, files):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": HASH_CACHE_VERSION, "files": files}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(yellow(f"⚠️ Cache des empreintes photo non enregistré : {e}"))
+
+
+# (taille, mtime_ns) d'un fichier, None s'il est illisible
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _hash_file(path):
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def collect_content_duplicates(refmap, workers=None):
+    """
+    Regroupe les fichiers distincts au contenu identique.
+    Seuls les fichiers de même taille sont hachés (BLAKE2b) ; les empreintes
+    sont conservées dans un cache (chemin, taille, mtime) entre deux exécutions.
+    Renvoie {"a.jpg = b.jpg": occurrences} pour _classify_duplications.
+    """
+    workers = PHOTO_SCAN_WORKERS if workers is None else workers
+    paths = sorted(refmap)
+    signatures = dict(zip(paths, _pmap(_file_signature, paths, workers)))
+
+    by_size = {}
+    for path, sig in signatures.items():
+        if sig is not None:
+            by_size.setdefault(sig[0], []).append(path)
+    candidates = [p for group in by_size.values() if len(group) > 1 for p in group]
+    if not candidates:
+        return {}
+
+    cache_file = hash_cache_path()
+    cache = _load_hash_cache(cache_file)
+    hashes = {}
+    todo = []
+    for path in candidates:
+        entry = cache.get(path)
+        if entry and tuple(entry[:2]) == signatures[path]:
+            hashes[path] = entry[2]
+        else:
+            todo.append(path)
+
+    if todo:
+        for path, digest in zip(todo, _pmap(_hash_file, todo, workers)):
+            if digest is None:
+                cache.pop(path, None)
+                continue
+            hashes[path] = digest
+            cache[path] = [*signatures[path], digest]
+        _save_hash_cache(cache_file, cache)
+
+    by_hash = {}
+    for path in candidates:
+        if path in hashes:
+            by_hash.setdefault(hashes[path], []).append(path)
+
+    groups = {}
+    for group in by_hash.values():
+        if len(group) > 1:
+            groups[" = ".join(group)] = [o for p in group for o in refmap[p]]
+    return groups
+
+
 # formatte une occurrence de duplication en string lisible
 def _fmt_occ(o):
     d = o["desordre"] if o["desordre"] else "None"
@@ -195,10 +374,13 @@ def _fmt_occ(o):
 
 
 # affiche un rapport complet de duplications
-def _print_duplication_report(cat1, cat2, cat3, cat4):
+def _print_duplication_report(cat1, cat2, cat3, cat4, content=False):
     total = len(cat1) + len(cat2) + len(cat3) + len(cat4)
     print()
-    print(bold(yellow(f"⚠️ {total} fichiers référencés plusieurs fois.")))
+    if content:
+        print(bold(yellow(f"⚠️ {total} photos identiques présentes sous plusieurs noms.")))
+    else:
+        print(bold(yellow(f"⚠️ {total} fichiers référencés plusieurs fois.")))
 
     if cat1:
         print()
@@ -273,8 +455,106 @@ def _simulate_relocation(gdf, filename_strategy="keep"):
 
 
 
+# même fichier source et cible ?
+def _same_file(old_abs_norm, new_abs_norm, index):
+    # cible absente de l'index → pas de stat, seule la casse peut différer
+    if index is None or index.lookup(new_abs_norm) is not False:
+        try:
+            return os.path.samefile(old_abs_norm, new_abs_norm)
+        except:
+            pass
+    return old_abs_norm.lower() == new_abs_norm.lower()
+
+
+# ======================================================================
+# RELOCALISATION — OPÉRATIONS FICHIERS
+# ======================================================================
+
+PHOTO_DUPLICATE_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl Linux de clonage copy-on-write (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def _same_device(src, dst):
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+    except OSError:
+        return False
+
+
+# déplace un fichier : simple renommage sur un même volume
+def _move_file(src, dst):
+    if _same_device(src, dst):
+        os.replace(src, dst)
+    else:
+        shutil.move(src, dst)
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+# duplique un fichier selon le mode demandé, copie classique en repli
+def _duplicate_file(src, dst, mode):
+    if mode == "hardlink":
+        try:
+            try:
+                os.link(src, dst)
+            except FileExistsError:
+                os.remove(dst)
+                os.link(src, dst)
+            return
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            _reflink(src, dst)
+            return
+        except (ImportError, OSError):
+            pass
+    shutil.copy2(src, dst)
+
+
+# relocalise une source vers ses cibles, renvoie (ajoutés, supprimés)
+def _relocate_one(old_abs_norm, targets, index, mode):
+    keep_src = False
+    todo = []
+    for new_abs_norm in targets:
+        if _same_file(old_abs_norm, new_abs_norm, index):
+            keep_src = True
+        else:
+            todo.append(new_abs_norm)
+    if not todo:
+        return [], []
+
+    # la source quitte son emplacement → dernière cible par déplacement
+    last = None if keep_src else todo.pop()
+    for new_abs_norm in todo:
+        os.makedirs(os.path.dirname(new_abs_norm), exist_ok=True)
+        _duplicate_file(old_abs_norm, new_abs_norm, mode)
+    if last is None:
+        return todo, []
+
+    os.makedirs(os.path.dirname(last), exist_ok=True)
+    _move_file(old_abs_norm, last)
+    return todo + [last], [old_abs_norm]
+
+
 # applique la relocalisation des fichiers
-def _apply_relocation(mapping):
+def _apply_relocation(mapping, index=None, workers=None, mode=None):
+    workers = PHOTO_RELOCATION_WORKERS if workers is None else workers
+    mode = PHOTO_DUPLICATE_MODE if mode is None else mode
+    if mode not in PHOTO_DUPLICATE_MODES:
+        raise PhotoMigrationError(
+            f"⛔ PHOTO_DUPLICATE_MODE '{mode}' inconnu "
+            f"(attendu : {', '.join(PHOTO_DUPLICATE_MODES)})"
+        )
+
+    jobs = []
     for old_abs, new_list in mapping.items():
         old_abs_norm = os.path.normpath(os.path.abspath(old_abs))
         new_list_unique = []
@@ -282,35 +562,26 @@ def _apply_relocation(mapping):
             x = os.path.normpath(os.path.abspath(x))
             if x not in new_list_unique:
                 new_list_unique.append(x)
-        if len(new_list_unique) == 1:
-            new_abs_norm = new_list_unique[0]
-            try:
-                if os.path.samefile(old_abs_norm, new_abs_norm):
-                    continue
-            except:
-                if old_abs_norm.lower() == new_abs_norm.lower():
-                    continue
-            os.makedirs(os.path.dirname(new_abs_norm), exist_ok=True)
-            shutil.move(old_abs_norm, new_abs_norm)
+        jobs.append((old_abs_norm, new_list_unique))
+
+    if index is not None:
+        index.scan(os.path.dirname(x) for _, targets in jobs for x in targets)
+
+    # une cible qui est aussi une source impose l'ordre du mapping
+    sources = {old for old, _ in jobs}
+    if any(x in sources and x != old for old, targets in jobs for x in targets):
+        workers = 1
+
+    def run(job):
+        return _relocate_one(job[0], job[1], index, mode)
+
+    for added, removed in _pmap(run, jobs, workers):
+        if index is None:
             continue
-        keep_src = False
-        for new_abs in new_list_unique:
-            new_abs_norm = os.path.normpath(os.path.abspath(new_abs))
-            try:
-                if os.path.samefile(old_abs_norm, new_abs_norm):
-                    keep_src = True
-                    continue
-            except:
-                if old_abs_norm.lower() == new_abs_norm.lower():
-                    keep_src = True
-                    continue
-            os.makedirs(os.path.dirname(new_abs_norm), exist_ok=True)
-            shutil.copy2(old_abs_norm, new_abs_norm)
-        if not keep_src:
-            try:
-                os.remove(old_abs_norm)
-            except:
-                pass
+        for path in removed:
+            index.discard(path)
+        for path in added:
+            index.add(path)
 
 
 # ======================================================================
@@ -392,6 +663,7 @@ def _generate_target_mapping(gdf, collisions, strategy_for_collisions, strategy_
 def process_photo_migration(gdf):
     # 1) Vérification existence physique
     diag = _diagnose_paths(gdf)
+    index = diag.get("index")
 
     if diag["status"] == "missing":
         raise PhotoMigrationError(
@@ -401,15 +673,21 @@ def process_photo_migration(gdf):
     # 2) Détection des doublons
     refmap = collect_photo_references(gdf)
     cat1, cat2, cat3, cat4 = _classify_duplications(refmap)
-    if any([cat1, cat2, cat3, cat4]):
-        _print_duplication_report(cat1, cat2, cat3, cat4)
+    same_content = ()
+    if PHOTO_CONTENT_DUPLICATES:
+        same_content = _classify_duplications(collect_content_duplicates(refmap))
+    if any([cat1, cat2, cat3, cat4]) or any(same_content):
+        if any([cat1, cat2, cat3, cat4]):
+            _print_duplication_report(cat1, cat2, cat3, cat4)
+        if any(same_content):
+            _print_duplication_report(*same_content, content=True)
         print()
         print("Si cet usage multiple des photos est intentionnel, vous pouvez continuer.")
         print("Sinon, corrigez votre fichier avant de continuer.")
         print("(1) continuer")
         print("(2) annuler")
         try:
-            resp = input("Votre choix: ").strip().lower()
+            resp = ask("photo_duplicates_continue")
         except EOFError:
             raise UserCancelled(bold("❌ Processus interrompu"))
         if resp not in ("1","o","oui","y","yes"):
@@ -430,7 +708,10 @@ def process_photo_migration(gdf):
     print("(1) Oui on peut continuer")
     print("(2) Non je garde la structure de mon dossier")
 
-    resp = input("Votre choix: ").strip().lower()
+    try:
+        resp = ask("photo_migrate")
+    except EOFError:
+        raise UserCancelled(bold("❌ Processus interrompu"))
     print()
     if resp not in ("1","o","oui","y","yes"):
         print("👍 Ok on garde les données en l'état.")
@@ -446,14 +727,14 @@ def process_photo_migration(gdf):
         print("(1) continuer")
         print("(2) annuler")
         try:
-            resp = input("Votre choix: ").strip().lower()
+            resp = ask("photo_migration_confirm")
         except EOFError:
             raise UserCancelled(bold("❌ Migration annulée"))
         if resp not in ("1","o","oui","y","yes"):
             raise UserCancelled(bold("❌ Migration annulée"))
 
         try:
-            _apply_relocation(mapping)
+            _apply_relocation(mapping, index)
             gdf = _update_gdf(gdf, mapping)
             print()
             print("✅ Migration photo terminée.")
@@ -475,7 +756,7 @@ def process_photo_migration(gdf):
         print("(3) Renommer les fichiers problématiques avec un UUID")
         print("(4) Renommer tous les fichiers avec un UUID")
         try:
-            resp = input("Votre choix: ").strip().lower()
+            resp = ask("photo_collision_strategy")
         except EOFError:
             raise UserCancelled("❌ Migration annulée")
         if resp == "1":
@@ -490,7 +771,7 @@ def process_photo_migration(gdf):
             raise UserCancelled(bold("❌ Migration annulée"))
 
         try:
-            _apply_relocation(mapping2)
+            _apply_relocation(mapping2, index)
             gdf = _update_gdf(gdf, mapping2)
             print()
             print("📁 Migration photo terminée.")
@@ -510,7 +791,7 @@ def process_photo_migration(gdf):
         print("(1) Renommer uniquement les fichiers problématiques avec un UUID")
         print("(2) Renommer tous les fichiers avec un UUID")
         try:
-            resp = input("Votre choix: ").strip().lower()
+            resp = ask("photo_uuid_strategy")
         except EOFError:
             raise UserCancelled("❌ Migration annulée")
         if resp == "1":
@@ -521,7 +802,7 @@ def process_photo_migration(gdf):
             raise UserCancelled(bold("❌ Migration annulée"))
 
         try:
-            _apply_relocation(mapping2)
+            _apply_relocation(mapping2, index)
             gdf = _update_gdf(gdf, mapping2)
             print()
             print("📁 Migration photo terminée.")
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+ANSI_ESCAPE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+
+# tampon du fichier log : écrit sur disque en fin d'étape ou de programme
+LOG_BUFFER_SIZE = 1 << 20
+
+
+class _LogStream:
+    """
+    Remplaçant de sys.stdout / sys.stderr : la console est écrite
+    directement, le texte est transmis au thread d'écriture du log.
+    """
+
+    def __init__(self, runlog, name, console):
+        self._runlog = runlog
+        self._name = name
+        self.console = console
+
+    def write(self, data):
+        self.console.write(data)
+        self._runlog.record(data, self._name)
+        return len(data)
+
+    def flush(self):
+        # le log n'est vidé qu'aux fins d'étape (RunLog.flush)
+        self.console.flush()
+
+    def __getattr__(self, attr):
+        return getattr(self.console, attr)
+
+
+class RunLog:
+    """
+    Journal d'exécution alimenté par une file et écrit par un thread
+    dédié : log lisible sans codes ANSI et, si jsonl_path est donné,
+    journal JSON lines (une ligne par ligne affichée, avec horodatage,
+    flux et étape en cours). Les fichiers sont vidés à chaque fin
+    d'étape, sur flush() et à la fermeture.
+    """
+
+    def __init__(self, path, jsonl_path=None):
+        self.path = path
+        self.jsonl_path = jsonl_path
+        self._queue = queue.SimpleQueue()
+        self._log = open(path, "w", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
+        self._jsonl = (
+            open(jsonl_path, "w", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
+            if jsonl_path else None
+        )
+        self._installed = None
+        self._closed = False
+        # démon : la fermeture passe par atexit, après l'attente des
+        # threads non démons par l'interpréteur
+        self._thread = threading.Thread(target=self._run, name="sirs_import-log", daemon=True)
+        self._thread.start()
+
+    # --------------------------------------------------------
+    #  Côté programme
+    # --------------------------------------------------------
+    def stream(self, name, console):
+        return _LogStream(self, name, console)
+
+    def install(self):
+        """Redirige sys.stdout et sys.stderr jusqu'à la fin du programme."""
+        self._installed = (sys.stdout, sys.stderr)
+        sys.stdout = self.stream("stdout", sys.stdout)
+        sys.stderr = self.stream("stderr", sys.stderr)
+        atexit.register(self.close)
+        return self
+
+    def record(self, text, name="stdout"):
+        """Ajoute du texte au log seulement (pas d'affichage)."""
+        if text and not self._closed:
+            self._queue.put(("write", name, text, time.time()))
+
+    def begin_stage(self, name):
+        self._queue.put(("stage", name))
+
+    def end_stage(self):
+        self._queue.put(("stage", None))
+        self.flush()
+
+    def flush(self):
+        if self._closed or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._installed is not None:
+            if isinstance(sys.stdout, _LogStream) and sys.stdout._runlog is self:
+                sys.stdout = self._installed[0]
+            if isinstance(sys.stderr, _LogStream) and sys.stderr._runlog is self:
+                sys.stderr = self._installed[1]
+        self._queue.put(None)
+        self._thread.join()
+
+    # --------------------------------------------------------
+    #  Thread d'écriture
+    # --------------------------------------------------------
+    def _run(self):
+        partial = {}
+        stage = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                kind = item[0]
+                if kind == "write":
+                    _, name, text, when = item
+                    text = ANSI_ESCAPE.sub("", text)
+                    self._log.write(text)
+                    if self._jsonl is not None:
+                        lines = (partial.pop(name, "") + text).split("\n")
+                        if lines[-1]:
+                            partial[name] = lines[-1]
+                        for line in lines[:-1]:
+                            self._write_record(when, name, stage, line)
+                elif kind == "stage":
+                    stage = item[1]
+                elif kind == "flush":
+                    self._flush_files()
+                    item[1].set()
+        finally:
+            if self._jsonl is not None:
+                now = time.time()
+                for name, line in partial.items():
+                    self._write_record(now, name, stage, line)
+            self._flush_files()
+            self._log.close()
+            if self._jsonl is not None:
+                self._jsonl.close()
+
+    def _write_record(self, when, name, stage, line):
+        if not line.strip():
+            return
+        record = {
+            "time": datetime.fromtimestamp(when).isoformat(timespec="milliseconds"),
+            "stream": name,
+            "stage": stage,
+            "text": line,
+        }
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _flush_files(self):
+        self._log.flush()
+        if self._jsonl is not None:
+            self._jsonl.flush()
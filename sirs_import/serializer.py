@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import json
+from collections.abc import Mapping
+from .exceptions import JsonExportError
+
+from .config_loader import CONFIG
+JSON_SERIALIZER = CONFIG["JSON_SERIALIZER"]
+
+# "auto" : orjson, sinon msgspec, sinon le module json standard
+JSON_SERIALIZERS = ("auto", "orjson", "msgspec", "json")
+
+
+def _encode_default(obj):
+    # documents SIRS (documents.py) : dict superficiel, les documents
+    # imbriqués repassent par cette fonction
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    raise TypeError(f"Type non sérialisable en JSON : {type(obj).__name__}")
+
+
+class _StdlibSerializer:
+    name = "json"
+
+    def dumps(self, obj, indent=False):
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2, default=_encode_default)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_encode_default)
+
+    def dumpb(self, obj, indent=False):
+        return self.dumps(obj, indent).encode("utf-8")
+
+
+class _OrjsonSerializer:
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj, indent=False):
+        return self.dumpb(obj, indent).decode("utf-8")
+
+    def dumpb(self, obj, indent=False):
+        option = self._orjson.OPT_INDENT_2 if indent else 0
+        return self._orjson.dumps(obj, default=_encode_default, option=option)
+
+
+class _MsgspecSerializer:
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._json = msgspec.json
+        self._encoder = msgspec.json.Encoder(enc_hook=_encode_default)
+
+    def dumps(self, obj, indent=False):
+        return self.dumpb(obj, indent).decode("utf-8")
+
+    def dumpb(self, obj, indent=False):
+        data = self._encoder.encode(obj)
+        if indent:
+            data = self._json.format(data, indent=2)
+        return data
+
+
+_SERIALIZER_CLASSES = {
+    "orjson": _OrjsonSerializer,
+    "msgspec": _MsgspecSerializer,
+    "json": _StdlibSerializer,
+}
+
+# sérialiseurs déjà créés, par valeur de JSON_SERIALIZER
+_SERIALIZERS = {}
+
+
+def get_serializer(name=None):
+    """
+    Sérialiseur JSON choisi par JSON_SERIALIZER : dumps(obj, indent) → str,
+    dumpb(obj, indent) → octets UTF-8. Sortie identique au module json
+    (ensure_ascii=False, indent=2), à l'écriture des nombres flottants près.
+    """
+    if name is None:
+        name = JSON_SERIALIZER
+    if name in _SERIALIZERS:
+        return _SERIALIZERS[name]
+
+    if name not in JSON_SERIALIZERS:
+        raise JsonExportError(
+            f"⛔ JSON_SERIALIZER '{name}' inconnu (attendu : {', '.join(JSON_SERIALIZERS)})"
+        )
+
+    if name == "auto":
+        serializer = None
+        for candidate in ("orjson", "msgspec"):
+            try:
+                serializer = _SERIALIZER_CLASSES[candidate]()
+                break
+            except ImportError:
+                continue
+        if serializer is None:
+            serializer = _StdlibSerializer()
+    else:
+        try:
+            serializer = _SERIALIZER_CLASSES[name]()
+        except ImportError:
+            raise JsonExportError(
+                f"⛔ JSON_SERIALIZER '{name}' : module non installé (pip install {name})"
+            )
+
+    _SERIALIZERS[name] = serializer
+    return serializer
+
+
+def reset_state():
+    """Oublie les sérialiseurs créés (tests, modules installés entre-temps)."""
+    _SERIALIZERS.clear()
@@ -19,8 +19,23 @@ def fake_config_loader(monkeypatch):
         "COUCH_USER": "",
         "COUCH_PW": "",
 
+        "COUCH_BULK_MAX_DOCS": 500,
+        "COUCH_BULK_MAX_BYTES": 4194304,
+        "COUCH_BULK_WORKERS": 4,
+        "COUCH_BULK_RETRIES": 3,
+        "COUCH_BULK_BACKOFF": 1.0,
+        "COUCH_BULK_TIMEOUT": 60,
+        "UPLOAD_IDEMPOTENT": False,
+        "COUCH_PAGE_SIZE": 2000,
+        "COUCH_FIND_TIMEOUT": 30,
+        "COUCH_CONNECT_TIMEOUT": 5,
+        "COUCH_GZIP": False,
+        "REF_CACHE": False,
+        "REF_CACHE_DIR": "",
+
         "GPKG_FILE": "",
         "GPKG_LAYER": "",
+        "GPKG_LAYERS": [],
         "COL_TRONCONS": "troncon",        # requis par tests migration
         "COL_LINEAR_ID": "",
         "COL_AUTHOR": "",
@@ -49,7 +64,18 @@ def fake_config_loader(monkeypatch):
         "PHO_FALLBACK_ORIENTATION": "",
         "PHO_FALLBACK_COTE": "",
 
+        "PHOTO_SCAN_WORKERS": 2,
+        "PHOTO_RELOCATION_WORKERS": 2,
+        "PHOTO_DUPLICATE_MODE": "copy",
+        "PHOTO_CONTENT_DUPLICATES": False,
+        "PHOTO_HASH_CACHE": "",
+
         "VERBOSE": False,
+        "LOG_JSONL": False,
+
+        "JSON_STREAM": False,
+        "JSON_FORMAT": "indent",
+        "JSON_SERIALIZER": "auto",
 
         "GPKG_PATH": None,
     }
@@ -61,7 +87,7 @@ def fake_config_loader(monkeypatch):
     fake.DIGUE_NAME = "FAKE"
 
     # Simuler load_config
-    fake.load_config = lambda: ("/tmp/config.toml", CONFIG)
+    fake.load_config = lambda path=None: CONFIG
 
     # Évite les sys.exit
     fake.sys = types.SimpleNamespace(exit=lambda code: None)
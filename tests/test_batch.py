@@ -0,0 +1,210 @@
+import json
+import os
+import sys
+
+import pytest
+
+
+def import_batch():
+    import sirs_import.batch as batch
+    return batch
+
+
+def import_prompts():
+    import sirs_import.prompts as prompts
+    return prompts
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    prompts = import_prompts()
+    prompts.set_policy(None)
+    yield prompts
+    prompts.set_policy(None)
+
+
+def write_project(directory):
+    directory.mkdir()
+    (directory / "config_sirs.toml").write_text('COUCH_DB = "base"\n', encoding="utf-8")
+    return directory
+
+
+# =========================================================
+# Politique de réponses
+# =========================================================
+
+def test_load_policy_normalizes_answers(tmp_path, policy):
+    path = tmp_path / "politique.toml"
+    path.write_text(
+        "overwrite_linear_id = true\n"
+        "photo_migrate = false\n"
+        "photo_collision_strategy = 3\n",
+        encoding="utf-8",
+    )
+
+    assert policy.load_policy(str(path)) == {
+        "overwrite_linear_id": "1",
+        "photo_migrate": "2",
+        "photo_collision_strategy": "3",
+    }
+
+
+@pytest.mark.parametrize("content", [
+    "overwrite_linearid = true\n",
+    "photo_uuid_strategy = 3\n",
+    "photo_migrate = \n",
+])
+def test_load_policy_rejects_invalid_files(tmp_path, policy, content):
+    path = tmp_path / "politique.toml"
+    path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(policy.PolicyError):
+        policy.load_policy(str(path))
+
+
+def test_ask_uses_policy_then_input(monkeypatch, policy, capsys):
+    monkeypatch.setattr("builtins.input", lambda prompt="": " OUI ")
+    assert policy.ask("photo_migrate") == "oui"
+
+    policy.set_policy({"photo_migrate": "1"})
+    assert policy.non_interactive()
+    assert policy.ask("photo_migrate") == "1"
+    assert "Votre choix: 1" in capsys.readouterr().out
+
+    # question sans réponse : traitée comme une entrée standard fermée
+    with pytest.raises(EOFError):
+        policy.ask("simplify_linestrings")
+
+
+# =========================================================
+# Projets
+# =========================================================
+
+def test_find_projects_expands_globs(tmp_path):
+    batch = import_batch()
+    a = write_project(tmp_path / "digue_a")
+    b = write_project(tmp_path / "digue_b")
+    (tmp_path / "vide").mkdir()
+
+    configs, missing = batch.find_projects([
+        str(tmp_path / "digue_*"),
+        str(a / "config_sirs.toml"),
+        str(tmp_path / "vide"),
+        str(tmp_path / "absent"),
+    ])
+
+    assert configs == [str(a / "config_sirs.toml"), str(b / "config_sirs.toml")]
+    assert missing == [str(tmp_path / "vide" / "config_sirs.toml"), str(tmp_path / "absent")]
+
+
+def test_build_command():
+    batch = import_batch()
+
+    cmd = batch.build_command("/p/config_sirs.toml", "/pol.toml", ["--upload"])
+
+    assert cmd[1:] == [
+        "-m", "sirs_import", "--config", "/p/config_sirs.toml",
+        "--policy", "/pol.toml", "--upload",
+    ]
+
+
+def test_run_project_writes_log_and_status(tmp_path):
+    batch = import_batch()
+    project = write_project(tmp_path / "digue")
+    config = str(project / "config_sirs.toml")
+    script = (
+        "import os, sys\n"
+        "print(os.path.basename(os.getcwd()))\n"
+        "print(repr(sys.stdin.read()))\n"
+        "print('\\x1b[91m⛔ erreurs temporelles → import impossible :\\x1b[0m')\n"
+        "print('   - détail')\n"
+        "sys.exit(3)\n"
+    )
+
+    result = batch.run_project(config, [sys.executable, "-c", script])
+
+    assert result["status"] == "données invalides"
+    assert result["exit_code"] == 3
+    assert result["message"] == "⛔ erreurs temporelles → import impossible :"
+    log = (project / batch.LOG_NAME).read_text(encoding="utf-8")
+    assert log.startswith("digue\n''\n")
+
+
+def test_run_project_timeout(tmp_path):
+    batch = import_batch()
+    project = write_project(tmp_path / "digue")
+
+    result = batch.run_project(
+        str(project / "config_sirs.toml"),
+        [sys.executable, "-c", "import time; time.sleep(5)"],
+        timeout=0.2,
+    )
+
+    assert result["exit_code"] is None
+    assert result["status"] == "délai dépassé"
+
+
+def test_main_runs_projects_and_writes_summary(tmp_path, monkeypatch, capsys):
+    batch = import_batch()
+    for name in ("digue_a", "digue_b", "digue_c"):
+        write_project(tmp_path / name)
+    codes = {"digue_a": 0, "digue_b": 4, "digue_c": 0}
+    seen = []
+
+    def fake_build(config, policy, flags):
+        seen.append((policy, flags))
+        code = codes[config.split("/")[-2]]
+        return [sys.executable, "-c", f"print('❌ Processus interrompu'); raise SystemExit({code})"]
+
+    monkeypatch.setattr(batch, "build_command", fake_build)
+    summary = tmp_path / "resume.json"
+
+    code = batch.main([
+        str(tmp_path / "digue_*"), "--workers", "2", "--upload",
+        "--policy", "politique.toml", "--summary", str(summary),
+    ])
+
+    assert code == 1
+    assert {tuple(flags) for _, flags in seen} == {("--upload",)}
+    assert all(p.endswith("politique.toml") and p.startswith("/") for p, _ in seen)
+    report = json.loads(summary.read_text(encoding="utf-8"))
+    assert [r["status"] for r in report] == ["ok", "annulé", "ok"]
+    assert report[1]["message"] == "❌ Processus interrompu"
+    assert "2/3 projet(s)" in capsys.readouterr().out
+
+
+def test_main_requires_a_policy(tmp_path):
+    batch = import_batch()
+    write_project(tmp_path / "digue")
+
+    with pytest.raises(SystemExit) as e:
+        batch.main([str(tmp_path / "digue")])
+
+    assert e.value.code == 2
+
+
+def test_prompt_without_policy_is_reported_cancelled(tmp_path, monkeypatch):
+    batch = import_batch()
+    project = write_project(tmp_path / "digue")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    monkeypatch.setenv("PYTHONPATH", root)
+    # projet qui atteint une question : sans politique ni terminal,
+    # l'entrée standard fermée annule le traitement
+    script = (
+        "import sirs_import.__main__ as m\n"
+        "from sirs_import.prompts import ask\n"
+        "from sirs_import.exceptions import UserCancelled\n"
+        "def real_main(argv=None):\n"
+        "    try:\n"
+        "        ask('photo_migrate')\n"
+        "    except EOFError:\n"
+        "        raise UserCancelled('❌ Processus interrompu')\n"
+        "m.real_main = real_main\n"
+        "m.main([])\n"
+    )
+
+    result = batch.run_project(str(project / "config_sirs.toml"), [sys.executable, "-c", script])
+
+    assert result["status"] == "annulé"
+    assert result["exit_code"] == 4
+    assert result["message"] == "❌ Processus interrompu"
@@ -0,0 +1,90 @@
+import datetime
+
+import pandas as pd
+
+
+def import_cd():
+    import sirs_import.check_dates as cd
+    return cd
+
+
+def configure(monkeypatch, cd, date_fin="date_fin"):
+    monkeypatch.setattr(cd, "COL_DATE_DEBUT", "date_debut")
+    monkeypatch.setattr(cd, "COL_DATE_FIN", date_fin)
+    monkeypatch.setattr(cd, "COL_TRONCONS", "troncon")
+    monkeypatch.setattr(cd, "COL_DESIGNATION", "designation")
+    monkeypatch.setattr(cd, "COL_LIBELLE", "libelle")
+
+
+def make_gdf():
+    return pd.DataFrame({
+        "troncon": ["T1", "T1", "T2", "T2"],
+        "designation": ["D1", "", "D3", None],
+        "libelle": ["L1", "L2", "L3", "L4"],
+        "date_debut": pd.to_datetime(["2023-01-10", "2023-01-10", None, "2023-01-10"]),
+        "date_fin": ["2023-01-31", "2023-01-31", "2023-01-31", "pas une date"],
+        "obs1_date": pd.to_datetime(["2023-01-05 14:00", "2023-02-02 00:00", "2023-01-15 00:00", None]),
+        "obs1_pho1_date": ["2023-01-04", datetime.date(2023, 2, 3), "2023-01-14", "2023-01-01"],
+    })
+
+
+def run(cd, gdf):
+    observations = {"obs1": ["date"]}
+    observation_dates = {"obs1": gdf["obs1_date"]}
+    photo_patterns = {("obs1", "pho1"): ["date"]}
+    return cd.temporal_constraints(gdf, observations, observation_dates, photo_patterns, {})
+
+
+def test_temporal_constraints_messages(monkeypatch):
+    cd = import_cd()
+    configure(monkeypatch, cd)
+
+    assert run(cd, make_gdf()) == [
+        "obs1_date (2023-01-05) < date_debut (2023-01-10) sur T1:D1",
+        "obs1_date (2023-02-02) > date_fin (2023-01-31) sur T1:L2",
+        "obs1_pho1_date (2023-01-04) < date observation (2023-01-05) sur T1:D1",
+        "obs1_pho1_date (2023-01-04) < date_debut (2023-01-10) sur T1:D1",
+        "obs1_pho1_date (2023-02-03) > date_fin (2023-01-31) sur T1:L2",
+        "obs1_pho1_date (2023-01-14) < date observation (2023-01-15) sur T2:D3",
+        "obs1_pho1_date (2023-01-01) < date_debut (2023-01-10) sur T2:nan",
+    ]
+
+
+def test_temporal_constraints_static_bound(monkeypatch):
+    cd = import_cd()
+    configure(monkeypatch, cd, date_fin="2023-01-20")
+    gdf = make_gdf().drop(columns=["date_fin"])
+
+    errors = run(cd, gdf)
+
+    assert "obs1_date (2023-02-02) > date_fin (2023-01-20) sur T1:L2" in errors
+    assert "obs1_pho1_date (2023-02-03) > date_fin (2023-01-20) sur T1:L2" in errors
+
+
+def test_date_array_converts_once_per_value():
+    cd = import_cd()
+    series = pd.Series(["2023-01-01", None, "x", datetime.date(2023, 1, 2)] * 3, dtype=object)
+
+    out = cd._date_array(series)
+
+    assert [str(v) for v in out[:4]] == ["2023-01-01", "NaT", "NaT", "2023-01-02"]
+    assert str(out.dtype) == "datetime64[D]"
+
+
+def test_date_array_parses_strings_like_to_date(monkeypatch):
+    cd = import_cd()
+    values = [
+        "2023-01-01", " 2023-01-05 ", "2023-1-5", "2021-02-30", "1500-03-01",
+        "9999-12-31", "0000-01-01", "2023/01/01", "2023-01-01T10:00", "", None,
+    ]
+    # chaînes converties en bloc : _to_date n'est appelée que pour les
+    # dates ISO que pandas n'a pas pu convertir
+    seen = []
+    to_date = cd._to_date
+    monkeypatch.setattr(cd, "_to_date", lambda v: seen.append(v) or to_date(v))
+
+    out = cd._date_array(pd.Series(values * 2, dtype=object))
+
+    expected = [to_date(v) for v in values] * 2
+    assert [None if pd.isna(v) else v.astype(object) for v in out] == expected
+    assert "2023-01-01" not in seen and "2023/01/01" not in seen
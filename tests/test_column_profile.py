@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def import_cp():
+    import sirs_import.column_profile as cp
+    return cp
+
+
+def import_helpers():
+    import sirs_import.helpers as h
+    return h
+
+
+UUID_A = "1ec0d5d2de7d9f59346a6305fd000f71"
+
+COLUMNS = {
+    "text": pd.Series([UUID_A, " x ", None, "nan", "", "NULL", UUID_A]),
+    "float": pd.Series([1.0, np.nan, 2.5, -3.0, 4.0]),
+    "object": pd.Series([2, "3", 4.0, "a", True, None, [1], float("inf")], dtype=object),
+    "dates": pd.to_datetime(pd.Series(["2023-01-10", None, "2023-01-12"])),
+    "empty": pd.Series([], dtype=object),
+}
+
+
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_profile_views_match_series_expressions(name):
+    cp = import_cp()
+    h = import_helpers()
+    series = COLUMNS[name]
+    profile = cp.ColumnProfile(series)
+
+    assert profile.na.tolist() == series.isna().tolist()
+    assert profile.empty.tolist() == [h.is_empty(v) for v in series]
+    assert profile.stripped.tolist() == series.astype(str).str.strip().tolist()
+    assert profile.nonnull_text.tolist() == series.dropna().astype(str).tolist()
+    assert profile.iso_date_valid.tolist() == [
+        h.is_valid_iso_date(v) for v in series.dropna().astype(str)
+    ]
+    assert len(profile.integers) == len(series.dropna())
+
+
+def test_profile_integers_and_distinct():
+    cp = import_cp()
+    profile = cp.ColumnProfile(COLUMNS["object"])
+
+    assert profile.integers == [2, 3, 4, None, 1, None, None]
+    assert profile.distinct == [2, "3", 4.0, "a", True, [1], float("inf")]
+
+
+def test_text_where_evaluates_each_distinct_value_once():
+    cp = import_cp()
+    seen = []
+    profile = cp.ColumnProfile(pd.Series(["a", "b", "a", None, "a"]))
+
+    def predicate(v):
+        seen.append(v)
+        return v != "b"
+
+    assert profile.text_where(predicate, nonnull=True) == ["a", "a", "a"]
+    assert sorted(seen) == ["a", "b"]
+
+
+def test_profiles_are_shared_per_column():
+    cp = import_cp()
+    gdf = pd.DataFrame({"a": [1, 2], "b": ["x", None]})
+    profiles = cp.ColumnProfiles(gdf)
+
+    assert profiles["a"] is profiles["a"]
+    assert profiles["b"].na.tolist() == [False, True]
+    assert cp.column_profile(profiles, gdf, "a") is profiles["a"]
+    assert cp.column_profile(None, gdf, "a") is not profiles["a"]
+
+
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_validate_int32_positive_matches_loop(name):
+    h = import_helpers()
+    series = COLUMNS[name]
+
+    bad = []
+    for v in series.dropna():
+        try:
+            f = float(v)
+            i = int(f)
+            if f != i or i < 0:
+                bad.append(v)
+        except Exception:
+            bad.append(v)
+
+    ok, msg = h.validate_int32_positive(series)
+
+    assert ok == (not bad)
+    if bad:
+        assert msg.startswith("valeurs invalides : " + str(bad[0]))
+
+
+def test_check_no_empty_columns_uses_profiles():
+    cp = import_cp()
+    h = import_helpers()
+    gdf = pd.DataFrame({"a": [None, " nan", "None "], "b": ["x", None, ""]})
+    profiles = cp.ColumnProfiles(gdf)
+
+    with pytest.raises(h.DataValidationError) as exc:
+        h.check_no_empty_columns(gdf, profiles)
+
+    assert "a" in str(exc.value.args[0]) and "b" not in exc.value.args[0][1:]
+    # vue conservée pour les validateurs suivants
+    assert "stripped" in vars(profiles["a"])
+
+
+def test_photo_validation_checks_observation_date_once(monkeypatch):
+    cp = import_cp()
+    import sirs_import.diag_pho as dp
+    calls = []
+    real = cp.is_valid_iso_date
+
+    def counting(v):
+        calls.append(v)
+        return real(v)
+
+    monkeypatch.setattr(cp, "is_valid_iso_date", counting)
+    gdf = pd.DataFrame({
+        "obs1_date": ["2023-01-10", "2023-13-01", "2023-01-10"],
+        "obs1_pho1_chemin": ["a.jpg", "b.jpg", "c.jpg"],
+        "obs1_pho2_chemin": ["d.jpg", None, "f.jpg"],
+        "obs1_pho3_chemin": ["g.jpg", None, None],
+    })
+    patterns = dp.detect_photo_patterns(gdf.columns)
+
+    result = dp.validate_photo_structure(
+        patterns, list(gdf.columns), gdf, {}, {}, set()
+    )
+
+    assert sorted(calls) == ["2023-01-10", "2023-13-01"]
+    date_errors = [e for e in result["errors"] if "non ISO" in e]
+    assert len(date_errors) == 3
+    assert all("2023-13-01" in e for e in date_errors)
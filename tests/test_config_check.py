@@ -0,0 +1,65 @@
+def import_cc():
+    import sirs_import.config_check as cc
+    return cc
+
+
+def valid_config(cc, tmp_path):
+    gpkg = tmp_path / "couche.gpkg"
+    gpkg.write_bytes(b"")
+    config = dict(cc.DEFAULTS)
+    config.update({
+        "COUCH_URL": "http://localhost:5984",
+        "COUCH_DB": "base",
+        "GPKG_FILE": "couche.gpkg",
+        "GPKG_PATH": str(gpkg),
+        "GPKG_LAYER": "couche",
+        "COL_TRONCONS": "troncons",
+    })
+    return config
+
+
+def test_valid_config(tmp_path):
+    cc = import_cc()
+
+    assert cc.check_config(valid_config(cc, tmp_path)) == ([], [])
+
+
+def test_invalid_config(tmp_path):
+    cc = import_cc()
+    config = valid_config(cc, tmp_path)
+    config.update({
+        "COUCH_DB": "",
+        "GPKG_PATH": str(tmp_path / "absent.gpkg"),
+        "COUCH_BULK_WORKERS": 0,
+        "COUCH_BULK_BACKOFF": "1",
+        "JSON_FORMAT": "xml",
+        "PHOTO_DUPLICATE_MODE": "symlink",
+        "COUCH_BULK_MAXDOCS": 10,
+    })
+
+    errors, warnings = cc.check_config(config)
+
+    assert [e.split(" ")[0] for e in errors] == [
+        "COUCH_DB", "GPKG_FILE", "COUCH_BULK_WORKERS", "COUCH_BULK_BACKOFF",
+        "JSON_FORMAT", "PHOTO_DUPLICATE_MODE",
+    ]
+    assert warnings == ["COUCH_BULK_MAXDOCS — clé inconnue, ignorée"]
+
+
+def test_config_with_layer_list(tmp_path):
+    cc = import_cc()
+    config = valid_config(cc, tmp_path)
+    config.update({
+        "GPKG_FILE": "",
+        "GPKG_LAYER": "",
+        "GPKG_PATH": None,
+        "GPKG_LAYERS": [
+            {"file": str(tmp_path / "couche.gpkg"), "layer": "points"},
+            {"file": str(tmp_path / "absent.gpkg"), "layer": "lignes"},
+        ],
+    })
+
+    errors, warnings = cc.check_config(config)
+
+    assert errors == [f"GPKG_LAYERS — fichier introuvable : {tmp_path / 'absent.gpkg'}"]
+    assert warnings == []
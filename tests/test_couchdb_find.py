@@ -0,0 +1,183 @@
+import json
+import threading
+
+import pytest
+
+
+def import_cd():
+    import sirs_import.couchdb as cd
+    return cd
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+DOCS = [
+    {"_id": f"{i:03d}", "@class": "fr.sirs.core.model.Contact" if i % 3 else "Autre",
+     "nom": f"n{i}", "prenom": "p"}
+    for i in range(20)
+]
+
+
+class FakeCouch:
+    """
+    Simule _index, _find (pagination par bookmark) et _all_docs.
+    `find_status` permet de rendre _find indisponible.
+    """
+
+    def __init__(self, find_status=200, index_status=200):
+        self.find_status = find_status
+        self.index_status = index_status
+        self.calls = []
+
+    def post(self, url, json=None, timeout=None):
+        if url.endswith("/_index"):
+            self.calls.append(("index", json["index"]["fields"]))
+            return FakeResponse(self.index_status, {"result": "created"})
+
+        self.calls.append(("find", json.get("bookmark")))
+        if self.find_status != 200:
+            return FakeResponse(self.find_status, {})
+        matching = [d for d in DOCS if d["@class"] == json["selector"]["@class"]]
+        start = int(json.get("bookmark") or 0)
+        page = matching[start:start + json["limit"]]
+        docs = [{k: d[k] for k in json["fields"]} for d in page]
+        return FakeResponse(200, {"docs": docs, "bookmark": str(start + len(page))})
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(("all_docs", params.get("startkey")))
+        rows = sorted(DOCS, key=lambda d: d["_id"])
+        if "startkey" in params:
+            key = json.loads(params["startkey"])
+            rows = [d for d in rows if d["_id"] >= key][params.get("skip", 0):]
+        rows = rows[:params["limit"]]
+        return FakeResponse(200, {"rows": [{"id": d["_id"], "doc": d} for d in rows]})
+
+    def close(self):
+        pass
+
+
+def setup(monkeypatch, cd, couch, page_size=4):
+    monkeypatch.setattr(cd, "_couch_session", lambda: couch)
+    monkeypatch.setattr(cd, "COUCH_PAGE_SIZE", page_size)
+    cd.reset_state()
+
+
+def expected(fields):
+    return [
+        {k: d[k] for k in fields}
+        for d in DOCS if d["@class"] == "fr.sirs.core.model.Contact"
+    ]
+
+
+def test_find_paginates_with_bookmarks(monkeypatch):
+    cd = import_cd()
+    couch = FakeCouch()
+    setup(monkeypatch, cd, couch)
+
+    docs = cd.couchdb_find({"@class": "fr.sirs.core.model.Contact"}, fields=["_id", "nom"])
+
+    assert docs == expected(["_id", "nom"])
+    assert couch.calls[0] == ("index", ["@class"])
+    assert [c for c in couch.calls if c[0] == "find"] == [
+        ("find", None), ("find", "4"), ("find", "8"), ("find", "12")
+    ]
+
+    # index vérifié une seule fois par exécution
+    cd.couchdb_find({"@class": "fr.sirs.core.model.Contact"}, fields=["_id"])
+    assert sum(1 for c in couch.calls if c[0] == "index") == 1
+
+
+def test_find_index_refused_only_warns(monkeypatch, capsys):
+    cd = import_cd()
+    couch = FakeCouch(index_status=403)
+    setup(monkeypatch, cd, couch)
+
+    docs = cd.couchdb_find({"@class": "fr.sirs.core.model.Contact"}, fields=["_id"])
+
+    assert docs == expected(["_id"])
+    assert "Index Mango" in capsys.readouterr().out
+
+
+def test_find_unsupported_falls_back_to_paged_all_docs(monkeypatch):
+    cd = import_cd()
+    couch = FakeCouch(find_status=404)
+    setup(monkeypatch, cd, couch, page_size=6)
+
+    docs = cd.couchdb_find({"@class": "fr.sirs.core.model.Contact"}, fields=["_id", "prenom"])
+
+    assert docs == expected(["_id", "prenom"])
+    assert [c for c in couch.calls if c[0] == "all_docs"] == [
+        ("all_docs", None), ("all_docs", '"005"'), ("all_docs", '"011"'), ("all_docs", '"017"')
+    ]
+
+
+def test_find_http_error_is_raised(monkeypatch):
+    cd = import_cd()
+    from sirs_import.exceptions import CouchDBError
+    setup(monkeypatch, cd, FakeCouch(find_status=500))
+
+    with pytest.raises(CouchDBError):
+        cd.couchdb_find({"@class": "fr.sirs.core.model.Contact"}, fields=["_id"])
+
+
+# =========================================================
+# Connexion partagée
+# =========================================================
+
+def test_client_is_shared(monkeypatch):
+    cd = import_cd()
+    cd.reset_state()
+    monkeypatch.setattr(cd, "COUCH_BULK_WORKERS", 8)
+
+    client = cd.get_client()
+    try:
+        assert cd.get_client() is client
+        assert cd._couch_session() is client.session
+        adapter = client.session.get_adapter(cd.COUCH_URL or "http://localhost")
+        assert adapter._pool_maxsize == 8 and adapter._pool_block
+        assert cd._timeout(30) == (cd.COUCH_CONNECT_TIMEOUT, 30)
+    finally:
+        cd.reset_state()
+    assert cd.get_client() is not client
+    cd.reset_state()
+
+
+def test_reference_data_is_fetched_concurrently(monkeypatch):
+    cd = import_cd()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fetcher(name):
+        def fetch(write_txt=True):
+            # chaque lecture attend les deux autres : échoue si séquentiel
+            barrier.wait()
+            return [name, write_txt]
+        return fetch
+
+    for name in ("troncons", "users", "contacts"):
+        monkeypatch.setattr(cd, f"get_all_{name}", fetcher(name))
+
+    assert cd.get_reference_data(write_txt=False) == (
+        ["troncons", False], ["users", False], ["contacts", False],
+    )
+
+
+def test_reference_data_raises_first_error(monkeypatch):
+    cd = import_cd()
+    from sirs_import.exceptions import DataNotFoundError
+
+    def missing(write_txt=True):
+        raise DataNotFoundError("aucun utilisateur")
+
+    monkeypatch.setattr(cd, "get_all_troncons", lambda write_txt=True: [])
+    monkeypatch.setattr(cd, "get_all_users", missing)
+    monkeypatch.setattr(cd, "get_all_contacts", lambda write_txt=True: [])
+
+    with pytest.raises(DataNotFoundError):
+        cd.get_reference_data()
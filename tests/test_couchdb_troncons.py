@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+
+def import_cd():
+    import sirs_import.couchdb as cd
+    return cd
+
+
+TRONCONS = [
+    {"linearId": "id-a", "libelle": "T1", "designation": "1"},
+    {"linearId": "id-b", "libelle": "T2", "designation": "2"},
+    {"linearId": "id-c", "libelle": "T2", "designation": "T1"},
+    {"linearId": "id-d", "designation": "4"},
+]
+
+
+# =========================================================
+# Choix de la clé de jointure
+# =========================================================
+
+def test_choose_join_key_counts_all_matches():
+    cd = import_cd()
+    assert cd.choose_join_key(["T1", "T2"], TRONCONS) == "libelle"
+    assert cd.choose_join_key(["1", "2", "4"], TRONCONS) == "designation"
+
+
+def test_choose_join_key_tie_collects_missing():
+    cd = import_cd()
+    index = cd.TronconIndex(TRONCONS)
+
+    assert cd.choose_join_key(["T1", "zz"], index) == "libelle"
+    assert index.missing == {"zz"}
+
+
+# =========================================================
+# Résolution des linearId
+# =========================================================
+
+def test_resolve_linear_id_first_match_wins():
+    cd = import_cd()
+    index = cd.TronconIndex(TRONCONS)
+
+    assert cd.resolve_linear_id(" T2 ", index, "libelle") == "id-b"
+    assert cd.resolve_linear_id("T1", TRONCONS, "designation") == "id-c"
+    assert cd.resolve_linear_id("zz", index, "libelle") is None
+    assert index.missing == {"zz"}
+
+
+def test_resolve_series_matches_rowwise():
+    cd = import_cd()
+    index = cd.TronconIndex(TRONCONS)
+    col = pd.Series(["T1", " T2", "T1", None, "x", np.nan, "T2 "], index=range(10, 17))
+
+    got = index.resolve_series(col, "libelle")
+    expected = col.apply(lambda v: cd.resolve_linear_id(str(v).strip(), TRONCONS, "libelle"))
+
+    assert got.tolist() == [v if isinstance(v, str) else None for v in expected]
+    assert list(got.index) == list(col.index)
+    assert "x" in index.missing
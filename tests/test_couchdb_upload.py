@@ -0,0 +1,371 @@
+import gzip
+import json
+import threading
+
+
+def import_cd():
+    import sirs_import.couchdb as cd
+    return cd
+
+
+# ---------------------------------------------------------
+# Faux serveur CouchDB
+# ---------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, text=""):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """
+    Simule _bulk_docs : `fail` associe à un nom de document la liste des
+    erreurs renvoyées aux envois successifs (None = succès).
+    """
+
+    def __init__(self, fail=None, status=None):
+        self.fail = {k: list(v) for k, v in (fail or {}).items()}
+        self.status = list(status or [])
+        self.posts = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        if (headers or {}).get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        docs = json.loads(data.decode("utf-8"))["docs"]
+        with self.lock:
+            self.headers = headers
+            self.posts.append([d["name"] for d in docs])
+            if self.status:
+                code = self.status.pop(0)
+                if code != 200:
+                    return FakeResponse(code, text="boom")
+            out = []
+            for d in docs:
+                errs = self.fail.get(d["name"])
+                err = errs.pop(0) if errs else None
+                if err:
+                    out.append({"id": d["name"], "error": err, "reason": "test"})
+                else:
+                    out.append({"ok": True, "id": d["name"], "rev": "1-x"})
+        return FakeResponse(201, out)
+
+    def close(self):
+        pass
+
+
+def setup(monkeypatch, cd, session, **cfg):
+    monkeypatch.setattr(cd, "_couch_session", lambda: session)
+    monkeypatch.setattr(cd, "COUCH_BULK_BACKOFF", 0)
+    monkeypatch.setattr(cd, "COUCH_BULK_WORKERS", cfg.get("workers", 2))
+    monkeypatch.setattr(cd, "COUCH_BULK_MAX_DOCS", cfg.get("max_docs", 500))
+    monkeypatch.setattr(cd, "COUCH_BULK_MAX_BYTES", cfg.get("max_bytes", 4194304))
+    monkeypatch.setattr(cd, "COUCH_BULK_RETRIES", cfg.get("retries", 3))
+    monkeypatch.setattr(cd, "COUCH_GZIP", cfg.get("gzip", False))
+
+
+def docs(n):
+    return [{"name": f"d{i}", "payload": "x" * 20} for i in range(n)]
+
+
+# =========================================================
+# Découpage en lots
+# =========================================================
+
+def test_batches_by_count():
+    cd = import_cd()
+    batches = list(cd._iter_bulk_batches(docs(7), max_docs=3, max_bytes=10**6))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert [idx for b in batches for idx, _ in b] == list(range(7))
+
+
+def test_batches_by_bytes():
+    cd = import_cd()
+    size = len(cd._encode_doc(docs(1)[0]))
+    batches = list(cd._iter_bulk_batches(docs(6), max_docs=100, max_bytes=3 * size + 12))
+    assert all(len(b) <= 2 for b in batches)
+    assert sum(len(b) for b in batches) == 6
+
+
+def test_oversized_document_is_its_own_batch():
+    cd = import_cd()
+    big = {"name": "big", "payload": "x" * 1000}
+    batches = list(cd._iter_bulk_batches(docs(2) + [big] + docs(1), max_docs=100, max_bytes=200))
+    assert [len(b) for b in batches] == [2, 1, 1]
+
+
+# =========================================================
+# Import
+# =========================================================
+
+def test_upload_bulk_all_ok(monkeypatch):
+    cd = import_cd()
+    session = FakeSession()
+    setup(monkeypatch, cd, session, max_docs=4)
+
+    ok, errors, report = cd.couchdb_upload_bulk(iter(docs(10)))
+
+    assert ok and errors == []
+    assert report["docs"] == report["ok"] == 10
+    assert [b["docs"] for b in report["batches"]] == [4, 4, 2]
+    assert sorted(n for p in session.posts for n in p) == sorted(f"d{i}" for i in range(10))
+
+
+def test_upload_bulk_retries_only_failed_documents(monkeypatch):
+    cd = import_cd()
+    session = FakeSession(fail={"d1": ["unknown_error"], "d3": ["unknown_error", "unknown_error"]})
+    setup(monkeypatch, cd, session, max_docs=10, workers=1)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(5))
+
+    assert ok
+    assert session.posts == [["d0", "d1", "d2", "d3", "d4"], ["d1", "d3"], ["d3"]]
+    assert report["batches"][0]["attempts"] == 3
+
+
+def test_upload_bulk_permanent_errors_are_not_retried(monkeypatch):
+    cd = import_cd()
+    session = FakeSession(fail={"d2": ["conflict"]})
+    setup(monkeypatch, cd, session, workers=1)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(3))
+
+    assert not ok
+    assert len(session.posts) == 1
+    assert errors == ["Doc 2 : conflict – test"]
+    assert report["failed"] == 1
+
+
+def test_upload_bulk_gives_up_after_retries(monkeypatch):
+    cd = import_cd()
+    session = FakeSession(status=[503, 503, 503])
+    setup(monkeypatch, cd, session, workers=1, retries=2)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(2))
+
+    assert not ok
+    assert len(session.posts) == 3
+    assert errors[0].startswith("Doc 0 : HTTP 503")
+    assert "après 3 tentatives" in errors[0]
+
+
+def test_upload_bulk_splits_too_large_batches(monkeypatch):
+    cd = import_cd()
+    session = FakeSession(status=[413])
+    setup(monkeypatch, cd, session, workers=1)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(4))
+
+    assert ok
+    assert session.posts == [["d0", "d1", "d2", "d3"], ["d0", "d1"], ["d2", "d3"]]
+
+
+class RawSession(FakeSession):
+    """Renvoie au premier envoi la réponse brute `first`."""
+
+    def __init__(self, first):
+        super().__init__()
+        self.first = first
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        if self.first is not None:
+            response, self.first = self.first, None
+            docs = json.loads(data.decode("utf-8"))["docs"]
+            self.posts.append([d["name"] for d in docs])
+            return response
+        return super().post(url, data, headers, timeout)
+
+
+def test_upload_bulk_resends_documents_missing_from_response(monkeypatch):
+    cd = import_cd()
+    session = RawSession(FakeResponse(201, [{"ok": True, "id": "a", "rev": "1-x"}]))
+    setup(monkeypatch, cd, session, workers=1)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(3))
+
+    assert ok and report["ok"] == 3
+    assert session.posts == [["d0", "d1", "d2"], ["d1", "d2"]]
+
+
+def test_upload_bulk_reports_unreadable_response(monkeypatch):
+    cd = import_cd()
+
+    class NotJson(FakeResponse):
+        def json(self):
+            raise ValueError("pas du JSON")
+
+    session = RawSession(NotJson(201, text="<html>"))
+    setup(monkeypatch, cd, session, workers=1, retries=0)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(2))
+
+    assert not ok and report["failed"] == 2
+    assert errors[0].startswith("Doc 0 : réponse _bulk_docs illisible")
+
+
+def test_upload_bulk_timeout_resend_does_not_duplicate(monkeypatch):
+    cd = import_cd()
+
+    class CommitThenTimeout(FakeSession):
+        """Enregistre le premier envoi puis perd la réponse."""
+
+        def __init__(self):
+            super().__init__()
+            self.ids = set()
+
+        def post(self, url, data=None, headers=None, timeout=None):
+            docs = json.loads(data.decode("utf-8"))["docs"]
+            self.posts.append([d["name"] for d in docs])
+            out = []
+            for d in docs:
+                if d["_id"] in self.ids:
+                    out.append({"id": d["_id"], "error": "conflict", "reason": "test"})
+                else:
+                    self.ids.add(d["_id"])
+                    out.append({"ok": True, "id": d["_id"], "rev": "1-x"})
+            if len(self.posts) == 1:
+                raise TimeoutError("read timeout")
+            return FakeResponse(201, out)
+
+    session = CommitThenTimeout()
+    setup(monkeypatch, cd, session, workers=1)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(3))
+
+    assert ok and report["ok"] == 3
+    assert len(session.ids) == 3
+    assert session.posts == [["d0", "d1", "d2"], ["d0", "d1", "d2"]]
+
+
+def test_upload_bulk_gzip_body(monkeypatch):
+    cd = import_cd()
+    session = FakeSession()
+    setup(monkeypatch, cd, session, gzip=True)
+
+    ok, errors, report = cd.couchdb_upload_bulk(docs(60))
+
+    assert ok and report["ok"] == 60
+    assert session.headers["Content-Encoding"] == "gzip"
+
+
+def test_small_body_is_not_compressed(monkeypatch):
+    cd = import_cd()
+    monkeypatch.setattr(cd, "COUCH_GZIP", True)
+
+    body, headers = cd._json_body(b'{"docs":[]}')
+
+    assert body == b'{"docs":[]}'
+    assert "Content-Encoding" not in headers
+
+
+# =========================================================
+# Import idempotent
+# =========================================================
+
+def test_assign_document_ids_is_deterministic():
+    cd = import_cd()
+    desordres = [
+        {"linearId": "L1", "designation": "D1", "date_debut": "2023-01-01"},
+        {"linearId": "L1", "designation": "D1", "date_debut": "2023-01-01"},
+        {"linearId": "L2", "designation": "D1", "date_debut": "2023-01-01"},
+        {"_id": "fixe", "linearId": "L3"},
+    ]
+
+    ids = [d["_id"] for d in cd.assign_document_ids(desordres)]
+
+    assert ids == [d["_id"] for d in cd.assign_document_ids(desordres)]
+    assert len(set(ids)) == 4
+    assert ids[3] == "fixe"
+    assert all(len(i) == 32 for i in ids[:3])
+    assert "_id" not in desordres[0]
+
+
+def test_upload_documents_ids_are_unique_across_layers(monkeypatch):
+    cd = import_cd()
+    import sirs_import.pipeline as pl
+    monkeypatch.setattr(pl, "UPLOAD_IDEMPOTENT", True)
+    desordre = {"linearId": "L1", "designation": "D1", "date_debut": "2023-01-01"}
+    layer = {"documents": [dict(desordre)]}
+
+    single = [d["_id"] for d in pl.upload_documents([layer])]
+    both = [d["_id"] for d in pl.upload_documents([layer, {"documents": [dict(desordre)]}])]
+
+    assert len(set(both)) == 2
+    # la première couche garde les _id d'un import mono-couche
+    assert both[0] == single[0]
+    assert both == [d["_id"] for d in cd.assign_document_ids([desordre, desordre])]
+
+    monkeypatch.setattr(pl, "UPLOAD_IDEMPOTENT", False)
+    assert ["_id" in d for d in pl.upload_documents([layer, layer])] == [False, False]
+
+
+def test_assign_document_ids_on_documents():
+    cd = import_cd()
+    from sirs_import.documents import Desordre, Observation
+    desordres = [
+        Desordre(True, linearId="L1", designation="D1", date_debut="2023-01-01",
+                 observations=[Observation(True, date="2023-01-02")])
+        for _ in range(2)
+    ]
+
+    docs = list(cd.assign_document_ids(desordres))
+    encoded = [json.loads(cd._encode_doc(d)) for d in docs]
+
+    assert [d["_id"] for d in encoded] == [d["_id"] for d in docs]
+    assert docs[0]["_id"] != docs[1]["_id"]
+    assert list(encoded[0])[:2] == ["_id", "@class"]
+    assert encoded[0]["observations"] == [
+        {"@class": "fr.sirs.core.model.Observation", "valid": True, "date": "2023-01-02"}
+    ]
+
+
+def named_docs(n):
+    return [{"_id": f"d{i}", "name": f"d{i}"} for i in range(n)]
+
+
+def test_upload_resumes_from_journal(monkeypatch, tmp_path):
+    cd = import_cd()
+    path = str(tmp_path / "couche.upload.jsonl")
+
+    session = FakeSession(fail={"d3": ["forbidden"]})
+    setup(monkeypatch, cd, session, max_docs=2)
+    ok, errors, report = cd.couchdb_upload_bulk(named_docs(6), journal=cd.UploadJournal(path))
+    assert not ok
+    assert report["ok"] == 5
+
+    session = FakeSession()
+    setup(monkeypatch, cd, session, max_docs=2)
+    ok, errors, report = cd.couchdb_upload_bulk(named_docs(6), journal=cd.UploadJournal(path))
+
+    assert ok
+    assert session.posts == [["d3"]]
+    assert report["skipped"] == 5
+    assert set(cd.UploadJournal(path).committed) == {f"d{i}" for i in range(6)}
+
+
+def test_upload_conflict_counts_as_committed_with_journal(monkeypatch, tmp_path):
+    cd = import_cd()
+    path = str(tmp_path / "couche.upload.jsonl")
+    setup(monkeypatch, cd, FakeSession(fail={"d1": ["conflict"]}))
+
+    ok, errors, report = cd.couchdb_upload_bulk(named_docs(3), journal=cd.UploadJournal(path))
+
+    assert ok and errors == []
+    assert cd.UploadJournal(path).committed == {"d0": "1-x", "d1": None, "d2": "1-x"}
+
+
+def test_upload_journal_ignores_other_database(monkeypatch, tmp_path):
+    cd = import_cd()
+    path = tmp_path / "couche.upload.jsonl"
+    path.write_text(
+        '{"db": "autre", "id": "d0", "rev": "1-x"}\n'
+        f'{{"db": "{cd.COUCH_DB}", "id": "d1", "rev": "1-x"}}\n'
+        '{"db": "tronq'
+    )
+
+    assert cd.UploadJournal(str(path)).committed == {"d1": "1-x"}
@@ -0,0 +1,166 @@
+import datetime
+
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+
+def import_helpers():
+    import sirs_import.helpers as h
+    return h
+
+
+SCHEMA = {
+    "designation": "str",
+    "cote": "str",
+    "nb": "int",
+    "date_debut": "date",
+    "obs1_date": "date",
+    "linearId": "str",
+}
+
+
+def make_layer(path):
+    import fiona
+
+    schema = {
+        "geometry": "Point",
+        "properties": {"designation": "str", "cote": "int", "nb": "int",
+                       "date_debut": "date", "obs1_date": "date"},
+    }
+    with fiona.open(path, "w", driver="GPKG", layer="des", schema=schema, crs="EPSG:2154") as dst:
+        dst.writerecords([
+            {"geometry": {"type": "Point", "coordinates": (1.0, 2.0)},
+             "properties": {"designation": "a", "cote": 1, "nb": 3,
+                            "date_debut": "2023-01-01", "obs1_date": None}},
+        ])
+
+
+def test_write_gpkg_layer_converts_columns(tmp_path):
+    import fiona
+    h = import_helpers()
+    path = str(tmp_path / "data.gpkg")
+    make_layer(path)
+
+    gdf = pd.DataFrame({
+        "designation": ["a", None, "c"],
+        "cote": ["RefCote:1", None, 2.0],
+        "nb": [1, 2, 3],
+        "date_debut": pd.to_datetime(["2023-01-01", None, "2023-03-05"]),
+        "obs1_date": [datetime.date(2024, 5, 1), None, "2024-05-03"],
+        "geometry": [Point(0, 0), Point(1, 1), None],
+    })
+    gdf["linearId"] = "id-a"
+
+    h.write_gpkg_layer(gdf, path, "des", dict(SCHEMA), "Point", "EPSG:2154", str_columns={"cote"})
+
+    with fiona.open(path, layer="des") as src:
+        assert src.schema["properties"]["date_debut"] == "date"
+        feats = [dict(f["properties"]) for f in src]
+        geoms = [f.geometry for f in src]
+
+    assert [f["designation"] for f in feats] == ["a", None, "c"]
+    assert [f["cote"] for f in feats] == ["RefCote:1", None, "2.0"]
+    assert [f["nb"] for f in feats] == [1, 2, 3]
+    assert [f["date_debut"] for f in feats] == ["2023-01-01", None, "2023-03-05"]
+    assert [f["obs1_date"] for f in feats] == ["2024-05-01", None, "2024-05-03"]
+    assert [f["linearId"] for f in feats] == ["id-a"] * 3
+    assert geoms[2] is None
+    assert not [p for p in tmp_path.iterdir() if p.name != "data.gpkg"]
+
+
+def test_write_gpkg_layer_keeps_original_on_failure(tmp_path):
+    h = import_helpers()
+    from sirs_import.exceptions import GpkgWriteError
+    path = str(tmp_path / "data.gpkg")
+    make_layer(path)
+    before = (tmp_path / "data.gpkg").read_bytes()
+
+    gdf = pd.DataFrame({"nb": [1], "geometry": [Point(0, 0)]})
+
+    with pytest.raises(GpkgWriteError):
+        h.write_gpkg_layer(gdf, path, "des", {"nb": "int"}, "Pas une géométrie", "EPSG:2154")
+
+    assert (tmp_path / "data.gpkg").read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == ["data.gpkg"]
+
+
+# =========================================================
+# Lecture en une seule ouverture
+# =========================================================
+
+def test_gpkg_layer_matches_geopandas_and_fiona(tmp_path):
+    import fiona
+    import geopandas as gpd
+    h = import_helpers()
+    path = str(tmp_path / "data.gpkg")
+    schema = {
+        "geometry": "3D Point",
+        "properties": {"s": "str", "i": "int32", "l": "int", "f": "float",
+                       "d": "date", "dt": "datetime"},
+    }
+    with fiona.open(path, "w", driver="GPKG", layer="des", schema=schema, crs="EPSG:2154") as dst:
+        dst.writerecords([
+            {"geometry": {"type": "Point", "coordinates": (1.0, 2.0, 3.0)},
+             "properties": {"s": "a", "i": 1, "l": 2, "f": 1.5,
+                            "d": "2023-01-01", "dt": "2023-01-01T10:00:00"}},
+            {"geometry": None,
+             "properties": {"s": None, "i": None, "l": None, "f": None, "d": None, "dt": None}},
+        ])
+
+    layer = h.open_gpkg_layer(path, "des")
+
+    pd.testing.assert_frame_equal(layer.gdf, gpd.read_file(path, layer="des"))
+    with fiona.open(path, layer="des") as src:
+        assert layer.schema == dict(src.schema["properties"])
+        assert layer.geometry_type == src.schema["geometry"]
+        assert layer.crs == src.crs.to_string()
+
+    # lecture partagée, invalidée par la réécriture
+    assert h.open_gpkg_layer(path, "des") is layer
+    assert h.is_gpkg_int32(path, "des", "i")
+    h.write_gpkg_layer(layer.gdf, path, "des", dict(layer.schema), layer.geometry_type, layer.crs)
+    again = h.open_gpkg_layer(path, "des")
+    assert again is not layer
+
+    # types, NULL et géométrie 3D conservés par la réécriture
+    assert again.schema == layer.schema
+    assert again.geometry_type == layer.geometry_type
+    pd.testing.assert_frame_equal(again.gdf, layer.gdf)
+
+
+def test_write_gpkg_layer_keeps_other_layers(tmp_path):
+    import fiona
+    h = import_helpers()
+    path = str(tmp_path / "data.gpkg")
+    make_layer(path)
+    layer = h.open_gpkg_layer(path, "des")
+    h.write_gpkg_layer(layer.gdf, path, "lignes", dict(layer.schema), "Point", layer.crs)
+
+    gdf = layer.gdf.copy()
+    gdf["designation"] = "b"
+    h.write_gpkg_layer(gdf, path, "des", dict(layer.schema), "Point", layer.crs)
+
+    assert sorted(fiona.listlayers(path)) == ["des", "lignes"]
+    assert h.open_gpkg_layer(path, "des").gdf["designation"].tolist() == ["b"]
+    assert h.open_gpkg_layer(path, "lignes").gdf["designation"].tolist() == ["a"]
+
+
+def test_gpkg_sources(tmp_path):
+    h = import_helpers()
+    config = {"GPKG_FILE": "a.gpkg", "GPKG_LAYER": "pts", "GPKG_PATH": "/p/a.gpkg", "GPKG_LAYERS": []}
+
+    assert h.gpkg_sources(config, "/p") == [h.GpkgSource("a.gpkg", "pts", "/p/a.gpkg")]
+
+    config["GPKG_LAYERS"] = [{"layer": "pts"}, {"file": "b.gpkg", "layer": "lignes"}]
+    assert h.gpkg_sources(config, "/p") == [
+        h.GpkgSource("a.gpkg", "pts", "/p/a.gpkg"),
+        h.GpkgSource("b.gpkg", "lignes", "/p/b.gpkg"),
+    ]
+
+    config["GPKG_LAYERS"] = [{"layer": "pts"}, {"file": "b.gpkg", "layer": "pts"}, "x", {"file": "c.gpkg"}]
+    with pytest.raises(h.ConfigError) as e:
+        h.gpkg_sources(config, "/p")
+    assert [line.split(" ")[0] for line in e.value.args[0][1:]] == [
+        "GPKG_LAYERS[3]", "GPKG_LAYERS[4]", "GPKG_LAYERS",
+    ]
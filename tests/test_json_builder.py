@@ -0,0 +1,463 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point, LineString
+
+
+def import_jb():
+    import sirs_import.json_builder as jb
+    return jb
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+PATTERNS = {
+    "observations": {
+        "obs1": ["date", "designation", "nombreDesordres", "observateurId", "urgenceId"],
+        "obs2": ["date", "suiteApporterId"],
+    },
+    "photos": {
+        ("obs1", "pho1"): ["chemin", "coteId", "date", "orientationPhoto"],
+        ("obs1", "pho2"): ["chemin", "designation", "photographeId"],
+        ("obs2", "pho1"): ["chemin"],
+    },
+}
+
+UUID_A = "1ec0d5d2de7d9f59346a6305fd000f71"
+UUID_B = "2ec0d5d2de7d9f59346a6305fd000f72"
+
+
+def configure(monkeypatch, jb):
+    monkeypatch.setattr(jb, "COL_DESIGNATION", "designation")
+    monkeypatch.setattr(jb, "COL_LIBELLE", "libelle")
+    monkeypatch.setattr(jb, "COL_COMMENTAIRE", "commentaire")
+    monkeypatch.setattr(jb, "COL_LIEUDIT", "")
+    monkeypatch.setattr(jb, "COL_AUTHOR", "author")
+    monkeypatch.setattr(jb, "COL_DATE_DEBUT", "date_debut")
+    monkeypatch.setattr(jb, "COL_DATE_FIN", "date_fin")
+    monkeypatch.setattr(jb, "COL_LINEAR_ID", "linearId")
+    monkeypatch.setattr(jb, "COL_COTE_ID", "cote")
+    monkeypatch.setattr(jb, "COL_POSITION_ID", "position")
+    monkeypatch.setattr(jb, "COL_SOURCE_ID", 2)
+    monkeypatch.setattr(jb, "COL_TYPE_DESORDRE_ID", "RefTypeDesordre:3")
+    monkeypatch.setattr(jb, "COL_CATEGORIE_DESORDRE_ID", "")
+    monkeypatch.setattr(jb, "OBS_FALLBACK_OBSERVATEUR_ID", UUID_B)
+    monkeypatch.setattr(jb, "OBS_FALLBACK_URGENCE", 99)
+    monkeypatch.setattr(jb, "OBS_FALLBACK_SUITE", 2)
+    monkeypatch.setattr(jb, "OBS_FALLBACK_NB_DESORDRES", 1)
+    monkeypatch.setattr(jb, "PHO_FALLBACK_PHOTOGRAPH_ID", UUID_B)
+    monkeypatch.setattr(jb, "PHO_FALLBACK_OBS_DATE", True)
+    monkeypatch.setattr(jb, "PHO_FALLBACK_DES_GEOM", True)
+
+
+def make_gdf():
+    return pd.DataFrame({
+        "designation": ["D1", " ", None, "NULL"],
+        "libelle": ["L1", "L2", "nan", "L4"],
+        "commentaire": [None, "c2", "c3", ""],
+        "author": [UUID_A, None, UUID_A, "  "],
+        "date_debut": pd.to_datetime(["2023-01-01", "2023-01-02", None, "2023-01-04"]),
+        "date_fin": pd.to_datetime([None, "2023-02-02", None, "2023-02-04"]),
+        "linearId": [UUID_A, UUID_A, UUID_A, None],
+        "cote": [1, 2, 99, 3],
+        "position": ["RefPosition:3", " 4", None, "RefPosition:99"],
+        "obs1_date": pd.to_datetime(["2023-01-10", None, "2023-01-12", "2023-01-13"]),
+        "obs1_designation": ["o1", None, "o3", "o4"],
+        "obs1_nombreDesordres": [2.0, np.nan, 2.5, 0.0],
+        "obs1_observateurId": [UUID_A, None, "  ", UUID_A],
+        "obs1_urgenceId": [1, 99, 7, np.nan],
+        "obs2_date": ["2023-03-01", None, "2023-03-03 10:00:00", ""],
+        "obs2_suiteApporterId": ["RefSuiteApporter:1", None, "bad", "RefSuiteApporter:8"],
+        "obs1_pho1_chemin": ["T1/a.jpg", None, "T1/c.jpg", "T1/d.jpg"],
+        "obs1_pho1_coteId": [1, 2, None, 42],
+        "obs1_pho1_date": pd.to_datetime(["2023-01-11", None, None, "2023-01-14"]),
+        "obs1_pho1_orientationPhoto": ["RefOrientationPhoto:1", None, "x", "RefOrientationPhoto:99"],
+        "obs1_pho2_chemin": [None, "T1/b.jpg", "T1/e.jpg", ""],
+        "obs1_pho2_designation": ["p", "q", None, "s"],
+        "obs1_pho2_photographeId": [UUID_A, None, UUID_A, None],
+        "obs2_pho1_chemin": ["T2/x.jpg", "T2/y.jpg", None, "T2/z.jpg"],
+        "geometry": [
+            Point(0, 0),
+            LineString([(0, 0), (1, 1), (2, 2)]),
+            None,
+            Point(5, 6),
+        ],
+    })
+
+
+def as_dicts(documents):
+    return [d.to_dict() for d in documents]
+
+
+# ---------------------------------------------------------
+# Oracle : règles de construction appliquées cellule par cellule
+# ---------------------------------------------------------
+# Lecture des colonnes par leur nom (sans plan d'extraction) ; le builder
+# colonnaire doit produire exactement les mêmes documents.
+
+def is_empty(value):
+    from sirs_import.helpers import is_empty
+    return is_empty(value)
+
+
+def _cell(jb, row, col):
+    # valeur de la colonne col, None si la colonne est absente ou vide
+    if col not in row.index or is_empty(row[col]):
+        return None
+    return row[col]
+
+
+def _row_author(jb, row):
+    value = _cell(jb, row, jb.COL_AUTHOR)
+    if value is not None:
+        return jb._safe_str(value)
+    sval = (jb.COL_AUTHOR or "").strip()
+    return sval if jb.is_valid_uuid(sval) else None
+
+
+def _row_photos(jb, row, obs_key, patterns, author, obs_date, pos_deb, pos_fin):
+    photos = []
+    for (obs_ref, photo_key), suffixes in patterns.get("photos", {}).items():
+        if obs_ref != obs_key:
+            continue
+        raw = {
+            s: _cell(jb, row, f"{obs_key}_{photo_key}_{s}")
+            for s in suffixes if s in jb.PHOTO_SUFFIXES
+        }
+        raw = {s: v for s, v in raw.items() if v is not None}
+        if "chemin" not in raw:
+            continue
+
+        data = {"author": author or None, "chemin": f"{jb.DIGUE_NAME}/{jb._safe_str(raw['chemin'])}"}
+        if "photographeId" in raw:
+            data["photographeId"] = jb._safe_str(raw["photographeId"])
+        else:
+            data["photographeId"] = jb._safe_str(jb.PHO_FALLBACK_PHOTOGRAPH_ID) or None
+        if "date" in raw:
+            data["date"] = jb.normalize_date_strict(raw["date"])
+        elif jb.PHO_FALLBACK_OBS_DATE:
+            data["date"] = jb.normalize_date_strict(obs_date)
+        for s in ("designation", "libelle"):
+            if s in raw:
+                data[s] = jb._safe_str(raw[s])
+        if "orientationPhoto" in raw:
+            data["orientationPhoto"] = jb.normalize_orientation_photo(raw["orientationPhoto"]) or None
+        if "coteId" in raw:
+            data["coteId"] = jb.normalize_cote(raw["coteId"]) or None
+        if jb.PHO_FALLBACK_DES_GEOM:
+            data["positionDebut"], data["positionFin"] = pos_deb, pos_fin
+        photos.append(jb.Photo(jb.IS_VALID, **data))
+    return photos
+
+
+def _row_observations(jb, row, patterns, author, pos_deb, pos_fin):
+    observations = []
+    for obs_key, suffixes in patterns.get("observations", {}).items():
+        date = _cell(jb, row, f"{obs_key}_date")
+        if date is None:
+            continue
+
+        data = {"date": jb.normalize_date_strict(date), "author": author or None}
+        for s in suffixes:
+            value = _cell(jb, row, f"{obs_key}_{s}")
+            if s not in jb.Observation.SUFFIXES or value is None:
+                continue
+            if s == "nombreDesordres":
+                data[s] = jb._to_nb_desordres(value)
+            elif s == "urgenceId":
+                data[s] = jb.normalize_urgence(value) or None
+            elif s == "suiteApporterId":
+                data[s] = jb.normalize_suite_apporter(value) or None
+            else:
+                data[s] = jb._safe_str(value)
+
+        fallbacks = {
+            "observateurId": jb._safe_str(jb.OBS_FALLBACK_OBSERVATEUR_ID),
+            "urgenceId": jb.normalize_urgence(jb.OBS_FALLBACK_URGENCE),
+            "suiteApporterId": jb.normalize_suite_apporter(jb.OBS_FALLBACK_SUITE),
+            "nombreDesordres": (
+                int(jb.OBS_FALLBACK_NB_DESORDRES)
+                if jb.OBS_FALLBACK_NB_DESORDRES not in (None, "") else None
+            ),
+        }
+        for s, fb in fallbacks.items():
+            if fb not in (None, "") and is_empty(data.get(s)):
+                data[s] = fb
+
+        data["photos"] = _row_photos(
+            jb, row, obs_key, patterns, author, date, pos_deb, pos_fin
+        ) or None
+        observations.append(jb.Observation(jb.IS_VALID, **data))
+    return observations
+
+
+def _row_desordre(jb, row, patterns):
+    author = _row_author(jb, row)
+    geom = row["geometry"] if "geometry" in row.index else None
+    pos_deb, pos_fin = jb._positions_from_geometry(geom)
+
+    date_debut = _cell(jb, row, jb.COL_DATE_DEBUT)
+    date_fin = _cell(jb, row, jb.COL_DATE_FIN)
+    if jb.COL_LINEAR_ID in row.index:
+        linear_id = jb._safe_str(row[jb.COL_LINEAR_ID])
+    else:
+        linear_id = jb._safe_str(jb.COL_LINEAR_ID)
+
+    refs = {}
+    for key, col, fn in (
+        ("sourceId", jb.COL_SOURCE_ID, jb.normalize_source),
+        ("typeDesordreId", jb.COL_TYPE_DESORDRE_ID, jb.normalize_type_desordre),
+        ("categorieDesordreId", jb.COL_CATEGORIE_DESORDRE_ID, jb.normalize_categorie_desordre),
+        ("coteId", jb.COL_COTE_ID, jb.normalize_cote),
+        ("positionId", jb.COL_POSITION_ID, jb.normalize_position),
+    ):
+        value = _cell(jb, row, col)
+        refs[key] = fn(value if value is not None else col)
+
+    return jb.Desordre(
+        jb.IS_VALID,
+        designation=jb._safe_str(_cell(jb, row, jb.COL_DESIGNATION)),
+        libelle=jb._safe_str(_cell(jb, row, jb.COL_LIBELLE)),
+        commentaire=jb._safe_str(_cell(jb, row, jb.COL_COMMENTAIRE)),
+        linearId=linear_id,
+        author=author,
+        lieuDit=jb._safe_str(_cell(jb, row, jb.COL_LIEUDIT)),
+        positionDebut=pos_deb,
+        positionFin=pos_fin,
+        date_debut=jb.normalize_date_strict(
+            date_debut if date_debut is not None else jb._safe_str(jb.COL_DATE_DEBUT)
+        ),
+        date_fin=jb.normalize_date_strict(date_fin) if date_fin is not None else None,
+        observations=_row_observations(jb, row, patterns, author, pos_deb, pos_fin) or None,
+        **refs,
+    )
+
+
+def build_rowwise(jb, gdf, patterns):
+    return [_row_desordre(jb, row, patterns) for _, row in gdf.iterrows()]
+
+
+# =========================================================
+# Construction colonnaire
+# =========================================================
+
+def test_columnar_builder_matches_rowwise(monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    gdf = make_gdf()
+
+    expected = build_rowwise(jb, gdf, PATTERNS)
+    got = list(jb._iter_desordres_columnar(gdf, PATTERNS))
+
+    assert got == expected
+    # l’ordre des clés compte pour une sortie identique octet par octet
+    assert json.dumps(as_dicts(got), ensure_ascii=False, indent=2) == json.dumps(
+        as_dicts(expected), ensure_ascii=False, indent=2
+    )
+
+
+def test_columnar_builder_static_fallbacks(monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    monkeypatch.setattr(jb, "COL_AUTHOR", UUID_A)
+    monkeypatch.setattr(jb, "COL_LINEAR_ID", UUID_B)
+    monkeypatch.setattr(jb, "COL_DATE_DEBUT", "2022-12-31")
+    monkeypatch.setattr(jb, "OBS_FALLBACK_NB_DESORDRES", "")
+    monkeypatch.setattr(jb, "PHO_FALLBACK_OBS_DATE", False)
+    monkeypatch.setattr(jb, "PHO_FALLBACK_DES_GEOM", False)
+    gdf = make_gdf().drop(columns=["author", "linearId", "date_debut"])
+
+    expected = build_rowwise(jb, gdf, PATTERNS)
+    got = list(jb._iter_desordres_columnar(gdf, PATTERNS))
+
+    assert got == expected
+    assert got[0]["author"] == UUID_A
+    assert got[0]["linearId"] == UUID_B
+    assert got[0]["date_debut"] == "2022-12-31"
+
+
+def test_columnar_builder_without_patterns(monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    gdf = make_gdf()
+
+    got = list(jb._iter_desordres_columnar(gdf, {}))
+
+    assert got == build_rowwise(jb, gdf, {})
+    assert all("observations" not in d for d in got)
+
+
+def test_extraction_plan_resolves_slots_once(monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    gdf = make_gdf().drop(columns=["obs1_pho2_designation", "obs2_date"])
+    cols = list(gdf.columns)
+
+    plan = jb.compile_extraction_plan(cols, PATTERNS)
+
+    # obs2 sans colonne date : ignorée
+    assert [slot.key for slot in plan.observations] == ["obs1"]
+    obs1 = plan.observations[0]
+    assert obs1.date == cols.index("obs1_date")
+    assert dict(obs1.fields)["urgenceId"] == cols.index("obs1_urgenceId")
+    assert "date" not in dict(obs1.fields)
+    assert [photo.key for photo in obs1.photos] == ["pho1", "pho2"]
+    assert dict(obs1.photos[1].fields) == {
+        "chemin": cols.index("obs1_pho2_chemin"),
+        "photographeId": cols.index("obs1_pho2_photographeId"),
+    }
+    assert plan.author == (cols.index("author"), None)
+    assert plan.fallbacks.urgenceId == jb.normalize_urgence(99)
+    assert plan.fallbacks.nombreDesordres == 1
+    with pytest.raises(TypeError):
+        plan.positions["x"] = 0
+
+
+def test_columnar_builder_reuses_plan(monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    gdf = make_gdf()
+    plan = jb.compile_extraction_plan(gdf.columns, PATTERNS)
+    expected = build_rowwise(jb, gdf, PATTERNS)
+
+    def fail(*args):
+        raise AssertionError("plan recompilé")
+
+    monkeypatch.setattr(jb, "compile_extraction_plan", fail)
+
+    assert list(jb._iter_desordres_columnar(gdf, PATTERNS, plan)) == expected
+    assert list(jb.DocumentStream(gdf, PATTERNS, 4, plan)) == expected
+
+def test_generate_json_indent_matches_json_dump(tmp_path, monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    monkeypatch.setattr(jb, "PROJECT_DIR", str(tmp_path))
+    gdf = make_gdf()
+
+    stats = jb.generate_json(gdf, PATTERNS, output="out.json", stream=False, json_format="indent")
+
+    expected = as_dicts(build_rowwise(jb, gdf, PATTERNS))
+    text = (tmp_path / "out.json").read_text(encoding="utf-8")
+    assert text == json.dumps(expected, ensure_ascii=False, indent=2)
+    assert stats["written"] == len(gdf)
+    assert stats["documents"] == expected
+
+
+@pytest.mark.parametrize("json_format", ["indent", "compact"])
+def test_generate_json_empty_layer(tmp_path, monkeypatch, json_format):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    monkeypatch.setattr(jb, "PROJECT_DIR", str(tmp_path))
+
+    stats = jb.generate_json(make_gdf().iloc[0:0], PATTERNS, output="out.json", json_format=json_format)
+
+    assert (tmp_path / "out.json").read_text(encoding="utf-8") == "[]"
+    assert stats["written"] == 0
+
+
+def test_generate_json_stream_compact_and_ndjson(tmp_path, monkeypatch):
+    jb = import_jb()
+    configure(monkeypatch, jb)
+    monkeypatch.setattr(jb, "PROJECT_DIR", str(tmp_path))
+    monkeypatch.setattr(jb, "GPKG_LAYER", "couche")
+    gdf = make_gdf()
+    expected = as_dicts(build_rowwise(jb, gdf, PATTERNS))
+
+    stats = jb.generate_json(gdf, PATTERNS, stream=True, json_format="compact")
+    text = (tmp_path / "couche.json").read_text(encoding="utf-8")
+    assert "\n" not in text
+    assert json.loads(text) == expected
+    # flux ré-exécutable : les documents sont régénérés à chaque parcours
+    assert len(stats["documents"]) == len(gdf)
+    assert list(stats["documents"]) == expected
+    assert list(stats["documents"]) == expected
+
+    stats = jb.generate_json(gdf, PATTERNS, stream=True, json_format="ndjson")
+    assert stats["output"].endswith("couche.ndjson")
+    lines = (tmp_path / "couche.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == expected
+
+
+def test_generate_json_unknown_serializer(tmp_path, monkeypatch):
+    jb = import_jb()
+    import sirs_import.serializer as ser
+    from sirs_import.exceptions import JsonExportError
+    monkeypatch.setattr(jb, "PROJECT_DIR", str(tmp_path))
+    monkeypatch.setattr(ser, "JSON_SERIALIZER", "yaml")
+
+    with pytest.raises(JsonExportError):
+        jb.generate_json(make_gdf(), PATTERNS, output="out.json")
+    assert not (tmp_path / "out.json").exists()
+
+
+def test_generate_json_unknown_format(tmp_path, monkeypatch):
+    jb = import_jb()
+    from sirs_import.exceptions import JsonExportError
+    monkeypatch.setattr(jb, "PROJECT_DIR", str(tmp_path))
+
+    with pytest.raises(JsonExportError):
+        jb.generate_json(make_gdf(), PATTERNS, json_format="yaml")
+
+
+# =========================================================
+# Documents et sérialisation
+# =========================================================
+
+def test_documents_are_compact_read_only_mappings():
+    from sirs_import.documents import Desordre, Observation, Photo
+
+    photo = Photo(True, chemin="T1/a.jpg", date=pd.Timestamp("2023-01-11 10:00"))
+    obs = Observation(True, date=pd.NaT, nombreDesordres=0, photos=[photo])
+    des = Desordre(True, designation="", libelle="L1", date_debut=pd.NaT, observations=[obs])
+
+    assert not hasattr(des, "__dict__")
+    assert list(des) == ["@class", "valid", "libelle", "observations"]
+    assert des.get("designation") is None and "date_debut" not in des
+    assert obs["nombreDesordres"] == 0 and "date" not in obs
+    assert {**des}["@class"] == "fr.sirs.core.model.Desordre"
+    assert des.to_dict()["observations"][0]["photos"] == [{
+        "@class": "fr.sirs.core.model.Photo", "valid": True,
+        "chemin": "T1/a.jpg", "date": "2023-01-11",
+    }]
+    with pytest.raises(TypeError):
+        Photo(True, cheminn="T1/a.jpg")
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_serializers_match_stdlib_json(monkeypatch, name):
+    jb = import_jb()
+    pytest.importorskip(name)
+    from sirs_import.serializer import get_serializer
+    configure(monkeypatch, jb)
+    documents = list(jb._iter_desordres_columnar(make_gdf(), PATTERNS))
+    plain = as_dicts(documents)
+    serializer = get_serializer(name)
+
+    assert serializer.dumps(documents, indent=True) == json.dumps(plain, ensure_ascii=False, indent=2)
+    assert serializer.dumpb(documents) == json.dumps(
+        plain, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def test_auto_serializer_falls_back_to_stdlib(monkeypatch):
+    import builtins
+    import sirs_import.serializer as ser
+    real_import = builtins.__import__
+
+    def no_fast_json(name, *args, **kwargs):
+        if name in ("orjson", "msgspec"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_fast_json)
+    ser.reset_state()
+    try:
+        assert ser.get_serializer("auto").name == "json"
+        with pytest.raises(ser.JsonExportError):
+            ser.get_serializer("orjson")
+    finally:
+        ser.reset_state()
@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 
 
@@ -143,3 +144,58 @@ def test_duplication_cat4():
     assert len(cat3) == 0
     assert len(cat4) == 1
 
+
+
+# =========================================================
+# contenu identique sous des noms différents
+# =========================================================
+
+def _mk_content(pm, tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"JPEG" * 100)
+    (tmp_path / "b.jpg").write_bytes(b"JPEG" * 100)
+    (tmp_path / "c.jpg").write_bytes(b"JPEX" * 100)   # même taille, contenu différent
+    (tmp_path / "d.jpg").write_bytes(b"autre")
+    return pd.DataFrame([
+        {pm.COL_TRONCONS: "T001", pm.COL_DESIGNATION: "D1",
+         "obs1_pho1_chemin": str(tmp_path / "a.jpg"), "obs1_pho2_chemin": str(tmp_path / "d.jpg")},
+        {pm.COL_TRONCONS: "T002", pm.COL_DESIGNATION: "D2",
+         "obs1_pho1_chemin": str(tmp_path / "b.jpg"), "obs1_pho2_chemin": str(tmp_path / "c.jpg")},
+    ])
+
+
+def test_content_duplicates_cross_troncon(monkeypatch, tmp_path):
+    pm = import_pm()
+    monkeypatch.setattr(pm, "PHOTO_HASH_CACHE", str(tmp_path / "hashes.json"))
+    refmap = pm.collect_photo_references(_mk_content(pm, tmp_path))
+
+    groups = pm.collect_content_duplicates(refmap, workers=2)
+    cat1, cat2, cat3, cat4 = pm._classify_duplications(groups)
+
+    key = f"{tmp_path / 'a.jpg'} = {tmp_path / 'b.jpg'}"
+    assert list(groups) == [key]
+    assert (len(cat1), len(cat2), len(cat3), len(cat4)) == (0, 0, 0, 1)
+    assert {o["troncon"] for o in cat4[key]} == {"T001", "T002"}
+
+
+def test_content_duplicates_hash_cache(monkeypatch, tmp_path):
+    pm = import_pm()
+    monkeypatch.setattr(pm, "PHOTO_HASH_CACHE", str(tmp_path / "hashes.json"))
+    refmap = pm.collect_photo_references(_mk_content(pm, tmp_path))
+    pm.collect_content_duplicates(refmap)
+
+    hashed = []
+    real_hash = pm._hash_file
+    monkeypatch.setattr(pm, "_hash_file", lambda p: hashed.append(p) or real_hash(p))
+
+    # relance : rien à hacher
+    assert len(pm.collect_content_duplicates(refmap)) == 1
+    assert hashed == []
+
+    # fichier modifié : seul lui est recalculé
+    (tmp_path / "c.jpg").write_bytes(b"JPEG" * 100)
+    st = (tmp_path / "c.jpg").stat()
+    os.utime(tmp_path / "c.jpg", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    groups = pm.collect_content_duplicates(refmap)
+
+    assert hashed == [str(tmp_path / "c.jpg")]
+    assert len(next(iter(groups.values()))) == 3
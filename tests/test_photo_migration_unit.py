@@ -196,3 +196,128 @@ def test_process_photo_migration_conform(monkeypatch):
     # On compare le contenu, pas l'identité
     assert out.equals(gdf)
 
+
+
+# =========================================================
+# PhotoIndex
+# =========================================================
+
+def test_photo_index_scans_each_directory_once(monkeypatch, tmp_path):
+    pm = import_pm()
+    (tmp_path / "T001").mkdir()
+    (tmp_path / "T001" / "a.jpg").write_text("a")
+    (tmp_path / "T002").mkdir()
+    (tmp_path / "T002" / "b.jpg").write_text("b")
+
+    scanned = []
+    real_scan = pm._scan_dir
+    monkeypatch.setattr(pm, "_scan_dir", lambda d: scanned.append(d) or real_scan(d))
+    monkeypatch.setattr(pm, "_file_exists", lambda p: False)
+
+    paths = [str(tmp_path / "T001" / "a.jpg"), str(tmp_path / "T002" / "b.jpg"),
+             str(tmp_path / "T001" / "absent.jpg"), str(tmp_path / "nope" / "c.jpg")]
+    index = pm.PhotoIndex(paths * 50, workers=4)
+
+    assert sorted(scanned) == sorted({os.path.dirname(p) for p in paths})
+    assert [index.exists(p) for p in paths] == [True, True, False, False]
+    assert index.lookup(paths[3]) is False
+    assert index.lookup(str(tmp_path / "autre" / "d.jpg")) is None
+
+
+def test_diagnose_paths_uses_index(monkeypatch, tmp_path):
+    pm = import_pm()
+    monkeypatch.setattr(pm, "PROJECT_DIR", str(tmp_path))
+    (tmp_path / "T001").mkdir()
+    (tmp_path / "T001" / "photo.jpg").write_text("x")
+
+    calls = []
+    monkeypatch.setattr(pm, "_file_exists", lambda p: calls.append(p) or os.path.exists(p))
+
+    gdf = pd.DataFrame([
+        {pm.COL_TRONCONS: "T001", "obs1_pho1_chemin": "T001/photo.jpg"},
+        {pm.COL_TRONCONS: "T001", "obs1_pho1_chemin": "T001/absente.jpg"},
+    ])
+    diag = pm._diagnose_paths(gdf)
+
+    assert diag["status"] == "missing"
+    assert diag["missing"] == [str(tmp_path / "T001" / "absente.jpg")]
+    # seul le fichier absent est confirmé par stat
+    assert calls == diag["missing"]
+
+
+def test_apply_relocation_keeps_index_up_to_date(tmp_path):
+    pm = import_pm()
+
+    src = tmp_path / "img" / "photoX.jpg"
+    src.parent.mkdir()
+    src.write_text("dummy")
+    dst1 = tmp_path / "T001" / "photoX.jpg"
+    dst2 = tmp_path / "T002" / "photoX.jpg"
+
+    index = pm.PhotoIndex([str(src)])
+    pm._apply_relocation({str(src): [str(dst1), str(dst2)]}, index)
+
+    assert dst1.exists() and dst2.exists() and not src.exists()
+    assert index.lookup(str(dst1)) is True
+    assert index.lookup(str(dst2)) is True
+    assert index.lookup(str(src)) is False
+
+
+@pytest.mark.parametrize("mode", ["copy", "hardlink", "reflink"])
+def test_apply_relocation_duplicate_modes(tmp_path, mode):
+    pm = import_pm()
+
+    mapping = {}
+    for i in range(6):
+        src = tmp_path / "img" / f"p{i}.jpg"
+        src.parent.mkdir(exist_ok=True)
+        src.write_text(f"photo {i}")
+        mapping[str(src)] = [str(tmp_path / t / f"p{i}.jpg") for t in ("T001", "T002", "T003")]
+
+    pm._apply_relocation(mapping, workers=3, mode=mode)
+
+    for i in range(6):
+        assert not (tmp_path / "img" / f"p{i}.jpg").exists()
+        for t in ("T001", "T002", "T003"):
+            assert (tmp_path / t / f"p{i}.jpg").read_text() == f"photo {i}"
+    if mode == "hardlink":
+        assert os.stat(tmp_path / "T001" / "p0.jpg").st_nlink == 3
+
+
+def test_apply_relocation_falls_back_to_copy(monkeypatch, tmp_path):
+    pm = import_pm()
+
+    def no_link(src, dst):
+        raise OSError("liens non supportés")
+
+    monkeypatch.setattr(pm.os, "link", no_link)
+    src = tmp_path / "photo.jpg"
+    src.write_text("x")
+    dst1, dst2 = tmp_path / "T001" / "photo.jpg", tmp_path / "T002" / "photo.jpg"
+
+    pm._apply_relocation({str(src): [str(dst1), str(dst2)]}, mode="hardlink")
+
+    assert dst1.read_text() == dst2.read_text() == "x"
+    assert os.stat(dst1).st_nlink == 1
+
+
+def test_apply_relocation_chained_targets_stay_ordered(tmp_path):
+    pm = import_pm()
+    (tmp_path / "T001").mkdir()
+    a, b, c = tmp_path / "a.jpg", tmp_path / "T001" / "b.jpg", tmp_path / "T001" / "c.jpg"
+    a.write_text("A")
+    b.write_text("B")
+
+    # b doit être libéré avant que a ne prenne sa place
+    pm._apply_relocation({str(b): [str(c)], str(a): [str(b)]}, workers=4)
+
+    assert b.read_text() == "A"
+    assert c.read_text() == "B"
+
+
+def test_apply_relocation_unknown_mode():
+    pm = import_pm()
+    from sirs_import.exceptions import PhotoMigrationError
+
+    with pytest.raises(PhotoMigrationError):
+        pm._apply_relocation({}, mode="symlink")
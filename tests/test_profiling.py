@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+
+def import_prof():
+    import sirs_import.profiling as prof
+    return prof
+
+
+def test_stage_records_timings(tmp_path, capsys):
+    prof = import_prof()
+    profiler = prof.StageProfiler(enabled=True)
+
+    with profiler.stage("diagnose_mapping", rows=1000):
+        sum(range(10000))
+    with profiler.stage("json") as st:
+        st["docs"] = 250
+
+    first, second = profiler.stages
+    assert first["stage"] == "diagnose_mapping"
+    assert first["rows"] == 1000 and first["wall_s"] >= 0 and first["cpu_s"] >= 0
+    assert second["docs"] == 250
+    assert second["status"] == "ok"
+
+    profiler.print_summary()
+    out = capsys.readouterr().out
+    assert "diagnose_mapping" in out and "total" in out
+
+    path = profiler.write_json(str(tmp_path / "couche.profile.json"))
+    report = json.loads(open(path, encoding="utf-8").read())
+    assert [s["stage"] for s in report["stages"]] == ["diagnose_mapping", "json"]
+
+
+def test_rss_is_measured_per_stage():
+    prof = import_prof()
+    if prof.current_rss_mb() is None:
+        pytest.skip("/proc/self/statm requis")
+    profiler = prof.StageProfiler(enabled=True)
+
+    with profiler.stage("allocation"):
+        block = bytearray(200 * 1024 * 1024)
+        block[::4096] = b"x" * len(block[::4096])
+        del block
+    with profiler.stage("petite"):
+        sum(range(1000))
+
+    big, small = profiler.stages
+    assert big["stage_rss_increase_mb"] > 150
+    # le pic du processus reste élevé, pas celui de l'étape suivante
+    assert small["stage_rss_increase_mb"] < 50
+    assert small["stage_peak_rss_mb"] < small["process_peak_rss_mb"] - 100
+
+
+def test_stage_failure_is_recorded():
+    prof = import_prof()
+    profiler = prof.StageProfiler(enabled=True)
+
+    with pytest.raises(ValueError):
+        with profiler.stage("dates"):
+            raise ValueError("boom")
+
+    assert profiler.stages[0]["status"] == "erreur"
+
+
+def test_disabled_profiler_records_nothing():
+    prof = import_prof()
+    profiler = prof.StageProfiler()
+
+    with profiler.stage("json") as st:
+        st["docs"] = 1
+
+    assert profiler.stages == []
+
+
+def test_cprofile_dump_per_stage(tmp_path):
+    import pstats
+    prof = import_prof()
+    profiler = prof.StageProfiler(cprofile_prefix=str(tmp_path / "couche"))
+
+    with profiler.stage("normalisation"):
+        sorted(range(1000), key=lambda x: -x)
+
+    path = profiler.stages[0]["cprofile"]
+    assert path.endswith("couche.01_normalisation.prof")
+    assert pstats.Stats(path).total_calls > 0
@@ -0,0 +1,157 @@
+import json
+
+
+def import_rc():
+    import sirs_import.refcache as rc
+    return rc
+
+
+TRONCON = "fr.sirs.core.model.TronconDigue"
+CONTACT = "fr.sirs.core.model.Contact"
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeCouch:
+    """Base minimale : update_seq et flux _changes filtré."""
+
+    def __init__(self, docs, seq=10):
+        self.docs = {d["_id"]: d for d in docs}
+        self.seq = seq
+        self.changes = []
+        self.changes_status = 200
+        self.calls = []
+
+    def change(self, doc, deleted=False):
+        self.seq += 1
+        if deleted:
+            self.docs.pop(doc["_id"], None)
+        else:
+            self.docs[doc["_id"]] = doc
+        self.changes.append((self.seq, doc, deleted))
+
+    def get(self, url, timeout=None):
+        self.calls.append("db")
+        return FakeResponse(200, {"update_seq": self.seq})
+
+    def post(self, url, params=None, json=None, timeout=None):
+        self.calls.append(("changes", params["since"]))
+        if self.changes_status != 200:
+            return FakeResponse(self.changes_status, {})
+        classes = json["selector"]["$or"][0]["@class"]["$in"]
+        results = []
+        for seq, doc, deleted in self.changes:
+            if seq <= params["since"]:
+                continue
+            if deleted:
+                results.append({"seq": seq, "id": doc["_id"], "deleted": True,
+                                "doc": {"_id": doc["_id"], "_deleted": True}})
+            elif doc.get("@class") in classes:
+                results.append({"seq": seq, "id": doc["_id"], "doc": doc})
+        results = results[:params["limit"]]
+        last = results[-1]["seq"] if results else params["since"]
+        return FakeResponse(200, {"results": results, "last_seq": last})
+
+    def find(self, selector, fields=None):
+        self.calls.append(("find", selector["@class"]))
+        return [
+            {k: d[k] for k in fields if k in d}
+            for d in sorted(self.docs.values(), key=lambda d: d["_id"])
+            if d.get("@class") == selector["@class"]
+        ]
+
+    def close(self):
+        pass
+
+
+def setup(monkeypatch, rc, couch, tmp_path):
+    monkeypatch.setattr(rc, "_couch_session", lambda: couch)
+    monkeypatch.setattr(rc, "couchdb_find", couch.find)
+    monkeypatch.setattr(rc, "REF_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(rc, "COUCH_PAGE_SIZE", 2)
+    rc.reset_state()
+
+
+DOCS = [
+    {"_id": "t2", "@class": TRONCON, "libelle": "T2", "designation": "2", "geom": "x"},
+    {"_id": "t1", "@class": TRONCON, "libelle": "T1", "designation": "1"},
+    {"_id": "c1", "@class": CONTACT, "nom": "N", "prenom": "P"},
+    {"_id": "o1", "@class": "fr.sirs.core.model.Autre"},
+]
+
+
+def test_cold_run_fetches_and_saves(monkeypatch, tmp_path):
+    rc = import_rc()
+    couch = FakeCouch(DOCS)
+    setup(monkeypatch, rc, couch, tmp_path)
+
+    troncons = rc.cached_reference_docs(TRONCON)
+
+    assert troncons == [
+        {"_id": "t1", "designation": "1", "libelle": "T1"},
+        {"_id": "t2", "designation": "2", "libelle": "T2"},
+    ]
+    saved = json.loads(open(rc.cache_path(), encoding="utf-8").read())
+    assert saved["update_seq"] == 10
+    assert sorted(saved["classes"][CONTACT]) == ["c1"]
+
+
+def test_warm_run_applies_only_changes(monkeypatch, tmp_path):
+    rc = import_rc()
+    couch = FakeCouch(DOCS)
+    setup(monkeypatch, rc, couch, tmp_path)
+    rc.sync_reference_cache()
+
+    couch.change({"_id": "t3", "@class": TRONCON, "libelle": "T3"})
+    couch.change({"_id": "t1", "@class": TRONCON, "libelle": "T1bis"})
+    couch.change({"_id": "t2"}, deleted=True)
+    couch.change({"_id": "o2", "@class": "fr.sirs.core.model.Autre"})
+    couch.calls.clear()
+    rc.reset_state()
+
+    troncons = rc.cached_reference_docs(TRONCON)
+
+    assert troncons == [
+        {"_id": "t1", "libelle": "T1bis"},
+        {"_id": "t3", "libelle": "T3"},
+    ]
+    assert not [c for c in couch.calls if c[0] == "find"]
+    assert couch.calls == [("changes", 10), ("changes", 12)]
+    assert rc.sync_reference_cache()["update_seq"] == 13
+
+    # un seul passage par exécution
+    rc.cached_reference_docs(CONTACT)
+    assert len(couch.calls) == 2
+
+
+def test_unusable_changes_feed_refetches(monkeypatch, tmp_path):
+    rc = import_rc()
+    couch = FakeCouch(DOCS)
+    setup(monkeypatch, rc, couch, tmp_path)
+    rc.sync_reference_cache()
+
+    couch.changes_status = 400
+    couch.docs.pop("c1")
+    rc.reset_state()
+
+    assert rc.cached_reference_docs(CONTACT) == []
+    assert ("find", CONTACT) in couch.calls
+
+
+def test_cache_for_other_database_is_ignored(monkeypatch, tmp_path):
+    rc = import_rc()
+    couch = FakeCouch(DOCS)
+    setup(monkeypatch, rc, couch, tmp_path)
+    rc.sync_reference_cache()
+    path = rc.cache_path()
+
+    monkeypatch.setattr(rc, "COUCH_DB", "autre_base")
+    assert rc.cache_path() != path
+    assert rc._load_cache(path) is None
@@ -0,0 +1,58 @@
+import io
+import json
+import sys
+
+
+def import_runlog():
+    import sirs_import.runlog as rl
+    return rl
+
+
+def import_prof():
+    import sirs_import.profiling as prof
+    return prof
+
+
+def test_log_is_buffered_until_stage_end(tmp_path):
+    rl = import_runlog()
+    prof = import_prof()
+    path = tmp_path / "couche.log"
+    log = rl.RunLog(str(path), str(tmp_path / "couche.log.jsonl"))
+    console = io.StringIO()
+    out = log.stream("stdout", console)
+    profiler = prof.StageProfiler(log=log)
+
+    with profiler.stage("diagnose_mapping"):
+        print("\x1b[1m🔎 Analyse\x1b[0m", file=out)
+        out.flush()
+        assert console.getvalue() == "\x1b[1m🔎 Analyse\x1b[0m\n"
+    assert path.read_text(encoding="utf-8") == "🔎 Analyse\n"
+
+    out.write("ligne ")
+    out.write("incomplète")
+    log.close()
+
+    assert path.read_text(encoding="utf-8") == "🔎 Analyse\nligne incomplète"
+    records = [json.loads(line) for line in open(tmp_path / "couche.log.jsonl", encoding="utf-8")]
+    assert [(r["stage"], r["stream"], r["text"]) for r in records] == [
+        ("diagnose_mapping", "stdout", "🔎 Analyse"),
+        (None, "stdout", "ligne incomplète"),
+    ]
+
+
+def test_install_restores_streams(tmp_path, monkeypatch):
+    rl = import_runlog()
+    console, errors = io.StringIO(), io.StringIO()
+    monkeypatch.setattr(sys, "stdout", console)
+    monkeypatch.setattr(sys, "stderr", errors)
+
+    log = rl.RunLog(str(tmp_path / "couche.log")).install()
+    print("sortie")
+    print("erreur", file=sys.stderr)
+    log.record("trace seule\n", "stderr")
+    log.close()
+    log.close()
+
+    assert sys.stdout is console and sys.stderr is errors
+    assert console.getvalue() == "sortie\n" and errors.getvalue() == "erreur\n"
+    assert (tmp_path / "couche.log").read_text(encoding="utf-8") == "sortie\nerreur\ntrace seule\n"
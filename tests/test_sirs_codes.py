@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def import_helpers():
+    import sirs_import.helpers as h
+    return h
+
+
+def import_dd():
+    import sirs_import.diag_des as dd
+    return dd
+
+
+COLUMNS = {
+    "int": pd.Series([1, 2, 99, 7, 8]),
+    "float": pd.Series([1.0, np.nan, 2.5, 100.0, 3.0]),
+    "bool": pd.Series([True, False]),
+    "str": pd.Series(["RefCote:1", " RefCote:2 ", "RefCote:42", "Cote:1", None, "", "NULL", "3"]),
+    "object": pd.Series(
+        ["RefCote:3", 4, 4.0, 4.5, True, np.int64(2), None, np.nan, "nan", "RefCote:9", [1]],
+        dtype=object,
+    ),
+    "empty": pd.Series([], dtype=object),
+    "all_na": pd.Series([None, np.nan], dtype=object),
+}
+
+CASES = [
+    ("RefCote:", "is_valid_cote"),
+    ("RefPosition:", "is_valid_position"),
+    ("RefSource:", "is_valid_source"),
+    ("RefTypeDesordre:", "is_valid_type_desordre"),
+    ("RefCategorieDesordre:", "is_valid_categorie_desordre"),
+    ("RefUrgence:", "is_valid_urgence"),
+    ("RefSuiteApporter:", "is_valid_suite_apporter"),
+    ("RefOrientationPhoto:", "is_valid_orientation_photo"),
+]
+
+
+def with_prefix(series, prefix):
+    # remplace RefCote: par le préfixe testé
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        return series.map(lambda v: v.replace("RefCote:", prefix) if isinstance(v, str) else v)
+    return series
+
+
+@pytest.mark.parametrize("prefix,validator", CASES)
+@pytest.mark.parametrize("name", list(COLUMNS))
+@pytest.mark.parametrize("ctype", ["str", "int32", "float"])
+def test_validate_mixed_matches_loop(monkeypatch, prefix, validator, name, ctype):
+    h = import_helpers()
+    series = with_prefix(COLUMNS[name], prefix)
+    fn = getattr(h, validator)
+
+    got = h.validate_mixed_sirs_column(series, ctype, fn, prefix, "label")
+    monkeypatch.setattr(h, "SIRS_CODE_VALUES", {})
+    expected = h.validate_mixed_sirs_column(series, ctype, fn, prefix, "label")
+
+    assert got == expected
+
+
+@pytest.mark.parametrize("prefix,validator", CASES[:5])
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_diag_generic_code_matches_loop(prefix, validator, name):
+    h = import_helpers()
+    dd = import_dd()
+    series = with_prefix(COLUMNS[name], prefix)
+    gdf = pd.DataFrame({"code": series})
+
+    def run(pre):
+        rows, errors = [], []
+        dd._diag_generic_code(
+            rows, errors, None, ["code"], gdf, "code", "label",
+            getattr(h, validator), None,
+            msg_invalid_col="valeurs invalides (ex: {})",
+            msg_invalid_fallback="",
+            msg_valid_col="",
+            msg_valid_fallback="",
+            msg_fallback_missing="",
+            prefix=pre,
+        )
+        return rows, errors
+
+    assert run(prefix) == run(None)
+
+
+def test_invalid_mask_examples():
+    h = import_helpers()
+    series = pd.Series(["RefCote:1", "RefCote:1 ", 2, 2.0, 2.5, True, None], dtype=object)
+
+    assert h.sirs_code_invalid_mask(series, "RefCote:").tolist() == [
+        False, True, False, False, True, True, False
+    ]
+    assert h.sirs_code_invalid_mask(series, "RefCote:", strip=True)[1] == False
+    assert h.sirs_code_invalid_mask(series, "RefCote:", allow_text=False)[0] == True
+
+
+# =========================================================
+# Normalisation par table de correspondance
+# =========================================================
+
+NORMALIZERS = [
+    "normalize_cote", "normalize_position", "normalize_source",
+    "normalize_type_desordre", "normalize_categorie_desordre",
+]
+
+
+@pytest.mark.parametrize("fn_name", NORMALIZERS)
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_normalize_column_matches_apply(fn_name, name):
+    h = import_helpers()
+    fn = getattr(h, fn_name)
+    series = COLUMNS[name].copy()
+    series.index = series.index + 10
+
+    got = h.normalize_column(series, fn)
+
+    pd.testing.assert_series_equal(got, series.apply(fn))
+
+
+def test_normalize_column_calls_fn_once_per_distinct_value():
+    h = import_helpers()
+    series = pd.Series(["RefCote:1", " RefCote:2 ", None, "RefCote:1", np.nan] * 1000, dtype=object)
+    seen = []
+
+    def fn(v):
+        seen.append(v)
+        return h.normalize_cote(v)
+
+    out = h.normalize_column(series, fn)
+
+    assert len(seen) == 3
+    assert out.iloc[:2].tolist() == ["RefCote:1", "RefCote:2"]
+    assert out.isna().sum() == 2000
+    pd.testing.assert_series_equal(out, series.apply(h.normalize_cote))
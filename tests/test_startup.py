@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "geopandas", "fiona", "shapely", "numpy", "pyogrio")
+# budget en secondes, vérifié seulement si renseigné (ex. SIRS_STARTUP_BUDGET=0.3) :
+# le temps mesuré dépend trop de la machine pour une CI partagée
+BUDGET = os.environ.get("SIRS_STARTUP_BUDGET")
+
+# mesure dans un interpréteur neuf : import du CLI + exécution de la commande
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+from sirs_import.__main__ import main
+try:
+    code = main(sys.argv[1:])
+except SystemExit as e:
+    code = e.code
+seconds = time.perf_counter() - start
+heavy = [m for m in %r if m in sys.modules]
+print("@@" + json.dumps({"seconds": seconds, "heavy": heavy, "code": code}))
+""" % (HEAVY,)
+
+
+def run_cli(cwd, *args):
+    env = dict(os.environ, PYTHONPATH=REPO)
+    best = None
+    for _ in range(3):
+        out = subprocess.run(
+            [sys.executable, "-c", SCRIPT, *args],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(out.split("@@")[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def write_config(directory):
+    (directory / "couche.gpkg").write_bytes(b"")
+    (directory / "config_sirs.toml").write_text(
+        'COUCH_URL = "http://localhost:5984"\n'
+        'COUCH_DB = "base"\n'
+        'GPKG_FILE = "couche.gpkg"\n'
+        'GPKG_LAYER = "couche"\n'
+        'COL_TRONCONS = "troncons"\n',
+        encoding="utf-8",
+    )
+
+
+def test_help_is_fast_and_needs_no_config(tmp_path):
+    result = run_cli(tmp_path, "--help")
+
+    assert result["code"] == 0
+    assert result["heavy"] == []
+    if BUDGET:
+        assert result["seconds"] < float(BUDGET)
+
+
+def test_check_config_is_fast(tmp_path):
+    write_config(tmp_path)
+
+    result = run_cli(tmp_path, "--check-config")
+
+    assert result["code"] == 0
+    assert result["heavy"] == []
+    if BUDGET:
+        assert result["seconds"] < float(BUDGET)
+
+
+def test_second_main_call_reloads_config(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        write_config(tmp_path / name)
+    (tmp_path / "b" / "config_sirs.toml").write_text(
+        (tmp_path / "a" / "config_sirs.toml").read_text(encoding="utf-8")
+        .replace('"base"', '"autre"'),
+        encoding="utf-8",
+    )
+    # deux exécutions dans le même interpréteur : les constantes lues à
+    # l'import suivent la nouvelle configuration, sys.argv n'est pas modifié
+    script = (
+        "import sys, json\n"
+        "from sirs_import.__main__ import main\n"
+        "argv = list(sys.argv)\n"
+        "seen = []\n"
+        "for name in ('a', 'b'):\n"
+        "    main(['--config', name + '/config_sirs.toml', '--check-config'])\n"
+        "    import sirs_import.couchdb as couchdb\n"
+        "    seen.append(couchdb.COUCH_DB)\n"
+        "print('@@' + json.dumps({'seen': seen, 'argv': sys.argv == argv}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=REPO), capture_output=True, text=True, check=True,
+    ).stdout
+
+    assert json.loads(out.split("@@")[-1]) == {"seen": ["base", "autre"], "argv": True}